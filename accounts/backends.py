@@ -0,0 +1,61 @@
+import copy
+import threading
+import time
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+
+
+class UserCache:
+    """
+    Per-process cache of the users loaded for the sessions of incoming requests,
+    holding each for a few seconds and at most `max_size` of them. Callers get
+    copies, so a request changing its request.user doesn't affect the others.
+    """
+
+    def __init__(self):
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        entry = self._users.get(str(user_id))
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return copy.copy(entry[1])
+
+    def set(self, user, timeout, max_size):
+        with self._lock:
+            if len(self._users) >= max_size:
+                # Evict the entry cached first
+                self._users.pop(next(iter(self._users)), None)
+            self._users[str(user.pk)] = (time.monotonic() + timeout, copy.copy(user))
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._users.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache()
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend keeping the users of authenticated requests in the user cache
+    for AUTH_USER_CACHE_TIMEOUT seconds. The cached users are invalidated when
+    saved (e.g. on a password change or login), deleted or logged out in this
+    process; other processes pick up the change within the timeout.
+    """
+
+    def get_user(self, user_id):
+        timeout = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 0)
+        if timeout <= 0:
+            return super().get_user(user_id)
+        user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                user_cache.set(user, timeout, getattr(settings, 'AUTH_USER_CACHE_SIZE', 1000))
+        return user
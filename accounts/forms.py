@@ -1,7 +1,28 @@
-from django.contrib.auth.forms import UserCreationForm
+import math
+from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
 from django.contrib.auth import password_validation
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
 from django import forms
+from .ratelimit import throttle_login
+
+
+class ThrottledAuthenticationForm(AuthenticationForm):
+    """Authentication form rejecting rate limited attempts before the password is hashed."""
+    error_messages = {
+        **AuthenticationForm.error_messages,
+        'rate_limited': 'Too many login attempts. Please try again in %(seconds)d seconds.',
+    }
+
+    def clean(self):
+        """Checks the rate limits of the client and the username, then authenticates."""
+        retry_after = throttle_login(self.request, self.cleaned_data.get('username', ''))
+        if retry_after is not None:
+            self.retry_after = math.ceil(retry_after)
+            raise ValidationError(
+                self.error_messages['rate_limited'], code='rate_limited', params={'seconds': self.retry_after}
+            )
+        return super().clean()
 
 
 class CustomUserCreationForm(UserCreationForm):
@@ -0,0 +1,39 @@
+"""
+Django's password hashers with their cost taken from the PASSWORD_HASHER_COST
+setting, so it can be tuned to the login rate the servers have to sustain
+(see the benchmark_hashers command). The algorithm names are unchanged:
+hashes made with other parameters still verify and are upgraded on the next
+successful login.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+def _cost(name, default):
+    return getattr(settings, 'PASSWORD_HASHER_COST', {}).get(name, default)
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return _cost('pbkdf2_iterations', super().iterations)
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return _cost('scrypt_work_factor', super().work_factor)
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return _cost('argon2_time_cost', super().time_cost)
+
+    @property
+    def memory_cost(self):
+        return _cost('argon2_memory_cost', super().memory_cost)
+
+    @property
+    def parallelism(self):
+        return _cost('argon2_parallelism', super().parallelism)
@@ -0,0 +1,52 @@
+import json
+import statistics
+import time
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand, CommandError
+
+
+PASSWORD = 'benchmark-password'
+
+
+class Command(BaseCommand):
+    """
+    Times the password verification done by a login with each configured hasher
+    and its PASSWORD_HASHER_COST, reporting milliseconds per login and the
+    logins a single core can verify per second as JSON.
+    """
+    help = 'Times password verification per login for the configured hashers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=5, help='Verifications timed per hasher.')
+        parser.add_argument(
+            '--hasher', action='append', dest='algorithms',
+            help='Algorithm to time, e.g. pbkdf2_sha256, can be repeated (default: all configured).'
+        )
+
+    def handle(self, *args, **options):
+        if options['rounds'] < 1:
+            raise CommandError('--rounds must be at least 1.')
+        report = {}
+        for hasher in get_hashers():
+            if options['algorithms'] and hasher.algorithm not in options['algorithms']:
+                continue
+            try:
+                encoded = hasher.encode(PASSWORD, hasher.salt())
+            except ValueError as error:
+                # The hasher's library (e.g. argon2-cffi) isn't installed
+                report[hasher.algorithm] = {'error': str(error)}
+                continue
+            durations = []
+            for _ in range(options['rounds']):
+                start = time.perf_counter()
+                hasher.verify(PASSWORD, encoded)
+                durations.append(time.perf_counter() - start)
+            mean = statistics.mean(durations)
+            report[hasher.algorithm] = {
+                'hasher': f'{type(hasher).__module__}.{type(hasher).__name__}',
+                'parameters': {key: value for key, value in hasher.decode(encoded).items() if key not in ('hash', 'salt')},
+                'mean_ms': round(mean * 1000, 2),
+                'min_ms': round(min(durations) * 1000, 2),
+                'logins_per_second_per_core': round(1 / mean, 1),
+            }
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,53 @@
+import hashlib
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+from todo_list.proxies import client_ip
+
+
+_lock = threading.Lock()
+
+
+class TokenBucket:
+    """
+    Token bucket of `capacity` tokens refilled at `rate` tokens per second,
+    kept in a cache so that it is shared by the processes using that cache.
+    Updates are serialized within a process only, so simultaneous attempts
+    from different processes may get an extra token or two.
+    """
+
+    def __init__(self, key, capacity, rate, cache):
+        self.key = key
+        self.capacity = capacity
+        self.rate = rate
+        self.cache = cache
+
+    def consume(self, now=None):
+        """Takes a token and returns None, or returns the seconds until the next token when empty."""
+        now = time.time() if now is None else now
+        with _lock:
+            tokens, updated = self.cache.get(self.key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            # Expires once full again, which is the state of a missing bucket
+            self.cache.set(self.key, (tokens, now), timeout=int((self.capacity - tokens) / self.rate) + 1)
+        return None if allowed else (1 - tokens) / self.rate
+
+
+def throttle(scope, identifier, now=None):
+    """
+    Consumes a token of the LOGIN_RATE_LIMITS[scope] bucket of the identifier
+    (e.g. a username) and returns None, or the seconds to wait when it is empty.
+    """
+    capacity, rate = settings.LOGIN_RATE_LIMITS[scope]
+    digest = hashlib.sha256(identifier.encode()).hexdigest()
+    cache = caches[getattr(settings, 'LOGIN_RATE_LIMIT_CACHE', 'ratelimit')]
+    return TokenBucket(f'ratelimit:{scope}:{digest}', capacity, rate, cache).consume(now)
+
+
+def throttle_login(request, username):
+    """Throttles a login attempt per client address and, if that passes, per username."""
+    return throttle('ip', client_ip(request)) or throttle('username', username.lower())
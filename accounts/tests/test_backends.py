@@ -0,0 +1,109 @@
+from importlib import import_module
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from accounts.backends import UserCache, user_cache
+from tasks.models import Task
+
+
+AUTH_TABLES = ('"django_session"', '"auth_user"')
+
+
+class TestUserCache(SimpleTestCase):
+    def setUp(self):
+        self.cache = UserCache()
+
+    def test_returns_copies(self):
+        self.cache.set(User(pk=1, username='testuser'), 30, 10)
+        user = self.cache.get(1)
+        user.username = 'changed'
+        self.assertEqual(self.cache.get('1').username, 'testuser')
+
+    def test_expiry_and_size(self):
+        self.cache.set(User(pk=1, username='expired'), -1, 10)
+        self.assertIsNone(self.cache.get(1))
+        for pk in range(2, 5):
+            self.cache.set(User(pk=pk, username=f'user{pk}'), 30, 2)
+        self.assertIsNone(self.cache.get(2))
+        self.assertIsNotNone(self.cache.get(4))
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+class TestCachedAuthentication(TestCase):
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.task = Task.objects.create(user=self.user, title='Task')
+        self.list_url = reverse('tasks')
+        self.client.login(username='testuser', password='testpass')
+        self.client.get(self.list_url)
+
+    def auth_queries(self, method, url):
+        with CaptureQueriesContext(connection) as captured:
+            response = method(url)
+        return response, [query['sql'] for query in captured if any(table in query['sql'] for table in AUTH_TABLES)]
+
+    def test_hot_requests_skip_session_and_user_queries(self):
+        """Once warm, the list and toggle requests should not load the session or the user from the database."""
+        response, queries = self.auth_queries(self.client.get, self.list_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, [])
+        response, queries = self.auth_queries(
+            self.client.post, reverse('task-toggle-status', kwargs={'pk': self.task.pk})
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(queries, [])
+
+    def test_password_change_invalidates(self):
+        """The sessions of a user whose password changed should be logged out, despite the cached user."""
+        self.user.set_password('newpass')
+        self.user.save()
+        response = self.client.get(self.list_url)
+        self.assertRedirects(response, f"{reverse('login')}?next={self.list_url}")
+
+    def test_logout_invalidates(self):
+        self.assertIsNotNone(user_cache.get(self.user.pk))
+        self.client.post(reverse('logout'))
+        self.assertIsNone(user_cache.get(self.user.pk))
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+class TestSignedCookieSessions(TestCase):
+    def test_no_session_or_user_queries(self):
+        user_cache.clear()
+        User.objects.create_user(username='testuser', password='testpass')
+        self.client.login(username='testuser', password='testpass')
+        self.client.get(reverse('tasks'))
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('tasks'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in captured if any(table in query['sql'] for table in AUTH_TABLES)])
+
+
+class TestSessionsAcrossProcesses(TestCase):
+    """Server processes with caches of their own, as with the default locmem cache."""
+
+    def process(self, name):
+        return override_settings(CACHES={
+            **settings.CACHES,
+            'sessions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'process-{name}'},
+        })
+
+    def test_flushed_session_rejected_by_other_process(self):
+        """A session flushed by one process (on logout) should no longer be valid in another."""
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        with self.process('first'):
+            session = store()
+            session['user'] = 'testuser'
+            session.save()
+        with self.process('second'):
+            self.assertEqual(store(session.session_key).load(), {'user': 'testuser'})
+        with self.process('first'):
+            store(session.session_key).flush()
+        with self.process('second'):
+            self.assertEqual(store(session.session_key).load(), {})
@@ -0,0 +1,31 @@
+import json
+from io import StringIO
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+
+COST = {'pbkdf2_iterations': 1000, 'scrypt_work_factor': 2 ** 4}
+
+
+@override_settings(PASSWORD_HASHER_COST=COST)
+class TestTunedHashers(TestCase):
+    def test_configured_cost(self):
+        self.assertTrue(make_password('secret').startswith('pbkdf2_sha256$1000$'))
+
+    def test_hash_upgraded_on_login(self):
+        """A hash made with another cost should still verify and be rehashed with the configured one."""
+        with self.settings(PASSWORD_HASHER_COST={'pbkdf2_iterations': 2000}):
+            user = User.objects.create_user(username='testuser', password='testpass123')
+        self.assertTrue(self.client.login(username='testuser', password='testpass123'))
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+
+    def test_benchmark(self):
+        output = StringIO()
+        call_command('benchmark_hashers', '--rounds', '2', '--hasher', 'pbkdf2_sha256', '--hasher', 'scrypt', stdout=output)
+        report = json.loads(output.getvalue())
+        self.assertEqual(report['pbkdf2_sha256']['parameters']['iterations'], 1000)
+        self.assertEqual(report['scrypt']['parameters']['work_factor'], 16)
+        self.assertGreater(report['scrypt']['logins_per_second_per_core'], 0)
@@ -0,0 +1,89 @@
+from unittest import mock
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from accounts.ratelimit import TokenBucket
+
+
+class TestTokenBucket(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.bucket = TokenBucket('test', capacity=2, rate=0.5, cache=cache)
+
+    def test_burst_then_refill(self):
+        self.assertIsNone(self.bucket.consume(now=100))
+        self.assertIsNone(self.bucket.consume(now=100))
+        self.assertAlmostEqual(self.bucket.consume(now=100), 2)
+        # One token is back after two seconds
+        self.assertIsNone(self.bucket.consume(now=102))
+        self.assertIsNotNone(self.bucket.consume(now=102))
+
+    def test_capacity_caps_refill(self):
+        self.bucket.consume(now=100)
+        self.assertIsNone(self.bucket.consume(now=1000))
+        self.assertIsNone(self.bucket.consume(now=1000))
+        self.assertIsNotNone(self.bucket.consume(now=1000))
+
+
+@override_settings(LOGIN_RATE_LIMITS={'ip': (4, 0.001), 'username': (2, 0.001), 'register': (1, 0.001)})
+class TestLoginRateLimit(TestCase):
+    def setUp(self):
+        caches['ratelimit'].clear()
+        self.login_url = reverse('login')
+        User.objects.create_user(username='testuser', password='testpass123')
+
+    def tearDown(self):
+        # Don't leave exhausted buckets to the other tests
+        caches['ratelimit'].clear()
+
+    def attempt(self, username, password='wrong', **extra):
+        return self.client.post(self.login_url, {'username': username, 'password': password}, **extra)
+
+    def test_username_limit(self):
+        """Attempts beyond the username's burst should be refused before authenticating."""
+        self.assertEqual(self.attempt('testuser').status_code, 200)
+        self.assertEqual(self.attempt('TestUser').status_code, 200)
+        with mock.patch.object(ModelBackend, 'authenticate') as authenticate:
+            response = self.attempt('testuser', 'testpass123')
+        authenticate.assert_not_called()
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertContains(response, 'Too many login attempts', status_code=429)
+        # Other usernames are still allowed
+        self.assertEqual(self.attempt('otheruser').status_code, 200)
+
+    def test_ip_limit(self):
+        for index in range(4):
+            self.attempt(f'user{index}')
+        self.assertEqual(self.attempt('user4').status_code, 429)
+        self.assertEqual(self.attempt('user4', REMOTE_ADDR='10.0.0.2').status_code, 200)
+
+    @override_settings(TRUSTED_PROXY_HOPS=1)
+    def test_ip_limit_behind_proxy(self):
+        """Behind a proxy, clients get buckets of their own, keyed by the address the proxy appended."""
+        proxy = {'REMOTE_ADDR': '10.0.0.1'}
+        for index in range(4):
+            self.attempt(f'user{index}', HTTP_X_FORWARDED_FOR='203.0.113.5', **proxy)
+        self.assertEqual(self.attempt('user4', HTTP_X_FORWARDED_FOR='203.0.113.5', **proxy).status_code, 429)
+        # Addresses prepended by the client are ignored
+        response = self.attempt('user4', HTTP_X_FORWARDED_FOR='198.51.100.1, 203.0.113.5', **proxy)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.attempt('user4', HTTP_X_FORWARDED_FOR='203.0.113.6', **proxy).status_code, 200)
+
+    def test_buckets_kept_apart_from_default_cache(self):
+        """Culling or clearing the default cache should not refill the buckets."""
+        for index in range(4):
+            self.attempt(f'user{index}')
+        cache.clear()
+        self.assertEqual(self.attempt('user4').status_code, 429)
+
+    def test_registration_limit(self):
+        data = {'password1': 'Str0ng-passw0rd', 'password2': 'Str0ng-passw0rd'}
+        response = self.client.post(reverse('register'), {'username': 'first', **data})
+        self.assertRedirects(response, reverse('tasks'))
+        self.client.logout()
+        response = self.client.post(reverse('register'), {'username': 'second', **data})
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(User.objects.filter(username='second').exists())
@@ -1,15 +1,27 @@
+import math
 from django.shortcuts import render
 from django.contrib.auth.views import LoginView
-from .forms import CustomUserCreationForm
+from .forms import CustomUserCreationForm, ThrottledAuthenticationForm
+from todo_list.proxies import client_ip
+from .ratelimit import throttle
 from django.views.generic.edit import FormView
 from django.contrib.auth import login
 from django.shortcuts import redirect
 from django.urls import reverse_lazy
+from django.core.exceptions import NON_FIELD_ERRORS
+
+
+def too_many_requests(response, retry_after):
+    """Turns a re-rendered form into a 429 response telling when to retry."""
+    response.status_code = 429
+    response['Retry-After'] = str(retry_after)
+    return response
 
 
 class CustomLoginView(LoginView):
     """Handles user login with redirection for authenticated users."""
     template_name = 'accounts/login.html'
+    form_class = ThrottledAuthenticationForm
     fields = '__all__'
     redirect_authenticated_user = True
 
@@ -17,6 +29,13 @@ class CustomLoginView(LoginView):
         """Redirect to the 'tasks' page upon successful login."""
         return reverse_lazy('tasks')
 
+    def form_invalid(self, form):
+        """Answer rate limited attempts with 429 Too Many Requests."""
+        response = super().form_invalid(form)
+        if form.has_error(NON_FIELD_ERRORS, 'rate_limited'):
+            return too_many_requests(response, form.retry_after)
+        return response
+
 
 class RegisterView(FormView):
     """Handles user registration and automatic login."""
@@ -25,7 +44,11 @@ class RegisterView(FormView):
     success_url = reverse_lazy('tasks')
 
     def form_valid(self, form):
-        """Save the user and log them in if the form is valid."""
+        """Save the user and log them in if the form is valid and the client isn't rate limited."""
+        retry_after = throttle('register', client_ip(self.request))
+        if retry_after is not None:
+            form.add_error(None, 'Too many accounts created. Please try again later.')
+            return too_many_requests(self.form_invalid(form), math.ceil(retry_after))
         user = form.save()
         if user is not None:
             login(self.request, user)
@@ -1,5 +1,168 @@
-from django.contrib import admin
-from .models import Task
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.widgets import ForeignKeyRawIdWidget
+from django.contrib.auth.models import User
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections, transaction
+from django.template.response import TemplateResponse
+from django.utils import timezone
+from django.utils.functional import cached_property
+from .models import DEADLINE_FILTERS, Task
+from .search import filter_tasks
+from .signals import tasks_reset_in_bulk
 
 
-admin.site.register(Task)
+def estimated_count(queryset):
+    """
+    Returns the row count of the queryset's table according to the database
+    statistics (sqlite_stat1 after ANALYZE, pg_class on PostgreSQL), or None
+    if there are none. sqlite_stat1 has a row per index, whose first number is
+    the number of rows in the index: the largest one is taken, as partial
+    indexes only count the rows they cover.
+    """
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    if connection.vendor == 'sqlite':
+        sql, params = 'SELECT MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 WHERE tbl = %s', [table]
+    elif connection.vendor == 'postgresql':
+        sql, params = 'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table]
+    else:
+        return None
+    try:
+        # In a savepoint, as a missing statistics table aborts a PostgreSQL transaction
+        with transaction.atomic(using=queryset.db), connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None or row[0] is None:
+        return None
+    estimate = int(row[0])
+    return estimate if estimate >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator which, for unfiltered lists of tables larger than
+    TASKS_ADMIN_EXACT_COUNT_LIMIT rows, takes the count from the database
+    statistics instead of a COUNT(*) over the whole table. Other lists are
+    counted up to one row past that limit, so a filter matching millions of
+    rows doesn't count them all; the pages past the limit aren't listed.
+    """
+    # Whether the count stopped at the limit, i.e. there are more rows than counted
+    count_capped = False
+
+    @cached_property
+    def count_limit(self):
+        return getattr(settings, 'TASKS_ADMIN_EXACT_COUNT_LIMIT', 100000)
+
+    @cached_property
+    def count(self):
+        if not self.object_list.query.where:
+            estimate = estimated_count(self.object_list)
+            if estimate is not None and estimate > self.count_limit:
+                return estimate
+        # SELECT COUNT(*) FROM (SELECT ... ORDER BY ... LIMIT n + 1), kept in the order of the list's index
+        count = self.object_list[:self.count_limit + 1].count()
+        self.count_capped = count > self.count_limit
+        return count
+
+
+class DeadlineListFilter(admin.SimpleListFilter):
+    """Filters by the task list's due date ranges, which are range scans of the due_date index."""
+    title = 'deadline'
+    parameter_name = 'due'
+
+    def lookups(self, request, model_admin):
+        return [(name, name.capitalize()) for name in DEADLINE_FILTERS] + [('none', 'No due date')]
+
+    def queryset(self, request, queryset):
+        if self.value() in DEADLINE_FILTERS or self.value() == 'none':
+            return queryset.due(self.value())
+        return queryset
+
+
+class ReassignForm(forms.Form):
+    user = forms.ModelChoiceField(
+        queryset=User.objects.all(),
+        widget=ForeignKeyRawIdWidget(Task._meta.get_field('user').remote_field, admin.site),
+        help_text='ID of the user the tasks are moved to.',
+    )
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    """
+    Task admin usable with millions of rows: the owners are joined instead of
+    loaded per row, the list is only sorted, filtered and searched along
+    indexes, large lists show an estimated or capped count, and the actions
+    run one statement over the whole selection.
+    """
+    list_display = ('title', 'user', 'is_completed', 'creation_date', 'due_date')
+    list_select_related = ('user',)
+    list_filter = ('is_completed', DeadlineListFilter)
+    sortable_by = ('creation_date', 'due_date')
+    raw_id_fields = ('user',)
+    readonly_fields = ('creation_date', 'completion_date')
+    search_fields = ('title',)
+    search_help_text = 'Searches titles and descriptions; "user:NAME" lists the tasks of a user.'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ['complete_tasks', 'reassign_tasks', 'purge_tasks']
+
+    def get_actions(self, request):
+        """Drops delete_selected, which loads every selected task to delete them one by one."""
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def get_search_results(self, request, queryset, search_term):
+        """Looks up the owner by the unique username, or searches the full-text index."""
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        if search_term.startswith('user:'):
+            return queryset.filter(user__username=search_term[len('user:'):].strip()), False
+        return filter_tasks(queryset, search_term), False
+
+    def _user_ids(self, queryset):
+        return list(queryset.order_by().values_list('user_id', flat=True).distinct())
+
+    @admin.action(description='Mark selected tasks as completed', permissions=['change'])
+    def complete_tasks(self, request, queryset):
+        with transaction.atomic():
+            user_ids = self._user_ids(queryset)
+            changed = queryset.filter(is_completed=False).update(is_completed=True, completion_date=timezone.now())
+            tasks_reset_in_bulk(user_ids)
+        self.message_user(request, f'{changed} task(s) marked as completed.', messages.SUCCESS)
+
+    @admin.action(description='Reassign selected tasks to another user', permissions=['change'])
+    def reassign_tasks(self, request, queryset):
+        form = ReassignForm(request.POST if 'apply' in request.POST else None)
+        if form.is_valid():
+            user = form.cleaned_data['user']
+            with transaction.atomic():
+                user_ids = self._user_ids(queryset)
+                changed = queryset.update(user=user)
+                tasks_reset_in_bulk(set(user_ids) | {user.pk})
+            self.message_user(request, f'{changed} task(s) reassigned to {user}.', messages.SUCCESS)
+            return None
+        return TemplateResponse(request, 'admin/tasks/task/reassign.html', {
+            **self.admin_site.each_context(request),
+            'title': 'Reassign tasks',
+            'opts': self.model._meta,
+            'form': form,
+            'media': self.media + form.media,
+            'selected': request.POST.getlist(admin.helpers.ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across') == '1',
+        })
+
+    @admin.action(description='Purge selected tasks', permissions=['delete'])
+    def purge_tasks(self, request, queryset):
+        with transaction.atomic():
+            user_ids = self._user_ids(queryset)
+            counts = queryset.delete_in_bulk()
+            tasks_reset_in_bulk(user_ids)
+        deleted = counts['completed_count'] + counts['incompleted_count']
+        self.message_user(request, f'{deleted} task(s) purged.', messages.SUCCESS)
@@ -0,0 +1,195 @@
+import json
+from django.conf import settings
+from django.contrib.auth.mixins import AccessMixin
+from django.db import transaction
+from django.forms import modelform_factory
+from django.http import JsonResponse
+from django.views import View
+from .events import publish_tasks
+from .forms import TaskCreateForm, TaskUpdateForm
+from .models import Task
+from .pagination import KeysetPaginator
+from .serializers import serialize_task
+from .signals import tasks_changed_in_bulk
+from .stats import stats_delta, task_state
+
+
+ITEM_NOT_OBJECT = {'__all__': [{'message': 'Item must be an object.', 'code': 'invalid'}]}
+
+NO_FIELDS = {'__all__': [{'message': 'No fields to update.', 'code': 'invalid'}]}
+
+DUPLICATE_ID = {'id': [{'message': 'The task is already updated by a previous item.', 'code': 'duplicate'}]}
+
+
+def is_id(value):
+    """Tells whether a JSON value is a task id: an integer, but not a boolean."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class ApiError(Exception):
+    """Raised for malformed API requests, turned into a 400 JSON response."""
+
+
+class ApiLoginRequiredMixin(AccessMixin):
+    """Answers anonymous API requests with a 401 JSON response instead of a login redirect."""
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required.'}, status=401)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse({'error': str(error)}, status=400)
+
+
+class TaskApiMixin(ApiLoginRequiredMixin):
+    """Common request parsing for the task API views."""
+
+    def get_queryset(self):
+        """Only return tasks owned by the current user."""
+        return Task.objects.filter(user=self.request.user)
+
+    def get_items(self, key):
+        """Returns the list stored under `key` of the JSON body, enforcing the batch size limit."""
+        try:
+            body = json.loads(self.request.body)
+        except ValueError:
+            raise ApiError('Request body must be valid JSON.')
+        items = body.get(key) if isinstance(body, dict) else None
+        if not isinstance(items, list):
+            raise ApiError(f'Request body must be an object with a "{key}" list.')
+        max_batch = getattr(settings, 'TASKS_API_MAX_BATCH', 1000)
+        if len(items) > max_batch:
+            raise ApiError(f'At most {max_batch} items can be sent at once.')
+        return items
+
+
+class TaskApiListView(TaskApiMixin, View):
+    """Lists the user's tasks (GET) and creates tasks in bulk (POST)."""
+
+    def get(self, request):
+        """Returns one keyset-paginated page of tasks."""
+        page_size = getattr(settings, 'TASKS_PAGE_SIZE', 50)
+        page = KeysetPaginator(self.get_queryset().rows('description'), page_size).get_page(request.GET.get('cursor'))
+        return JsonResponse({
+            'tasks': [serialize_task(task) for task in page],
+            'next': page.next_token,
+            'previous': page.previous_token,
+        })
+
+    def post(self, request):
+        """Validates every item with TaskCreateForm and inserts the valid ones with one bulk_create."""
+        items = self.get_items('tasks')
+        results, tasks = [], []
+        for index, item in enumerate(items):
+            form = TaskCreateForm(data=item) if isinstance(item, dict) else None
+            if form is None or not form.is_valid():
+                errors = form.errors.get_json_data() if form is not None else ITEM_NOT_OBJECT
+                results.append({'index': index, 'status': 'error', 'errors': errors})
+                continue
+            task = form.save(commit=False)
+            task.user = request.user
+            tasks.append(task)
+            results.append({'index': index, 'status': 'created', 'task': task})
+
+        if tasks:
+            with transaction.atomic():
+                Task.objects.bulk_create(tasks)
+                completed = sum(task.is_completed for task in tasks)
+                tasks_changed_in_bulk(
+                    request.user.pk, completed=completed, incompleted=len(tasks) - completed,
+                    stats=stats_delta(after=[task_state(task) for task in tasks]),
+                )
+                publish_tasks(request.user.pk, 'created', [task.pk for task in tasks])
+
+        for result in results:
+            if 'task' in result:
+                result['task'] = serialize_task(result['task'])
+        status = 201 if tasks else 400 if results else 200
+        return JsonResponse({'created': len(tasks), 'results': results}, status=status)
+
+
+class TaskApiBulkUpdateView(TaskApiMixin, View):
+    """Partially updates many tasks at once."""
+
+    def post(self, request):
+        """
+        Validates each item's fields with the TaskUpdateForm rules (only the
+        fields sent are validated) and writes all changes with one bulk_update.
+        """
+        items = self.get_items('tasks')
+        ids = [item['id'] if isinstance(item, dict) and is_id(item.get('id')) else None for item in items]
+        editable = TaskUpdateForm._meta.fields
+        # The tasks stay locked until written, so that concurrent changes aren't overwritten and the
+        # counter and statistics deltas computed from their loaded state are exact
+        with transaction.atomic():
+            existing = self.get_queryset().select_for_update().in_bulk([pk for pk in ids if pk is not None])
+
+            results, tasks, changed_fields, seen = [], [], set(), set()
+            completed = incompleted = 0
+            for index, (item, pk) in enumerate(zip(items, ids)):
+                # Each task is validated and written once: a later item would share (and could corrupt) its instance
+                if pk is not None and pk in seen:
+                    results.append({'index': index, 'status': 'error', 'errors': DUPLICATE_ID})
+                    continue
+                seen.add(pk)
+                task = existing.get(pk)
+                if task is None:
+                    results.append({'index': index, 'status': 'not_found'})
+                    continue
+                fields = [field for field in editable if field in item]
+                form_class = modelform_factory(Task, form=TaskUpdateForm, fields=fields)
+                was_completed = task.is_completed
+                form = form_class(data=item, instance=task)
+                if not fields or not form.is_valid():
+                    errors = form.errors.get_json_data() if fields else NO_FIELDS
+                    results.append({'index': index, 'status': 'error', 'errors': errors})
+                    # A failed validation may have modified the instance already
+                    existing.pop(task.pk, None)
+                    continue
+                if was_completed != task.is_completed:
+                    completed += 1 if task.is_completed else -1
+                    incompleted -= 1 if task.is_completed else -1
+                    task.update_completion_date()
+                    fields.append('completion_date')
+                # bulk_update() bypasses save(), which clears the completed occurrences and overdue mark
+                fields.extend(task.reset_schedule_state())
+                changed_fields.update(fields)
+                tasks.append(task)
+                results.append({'index': index, 'status': 'updated', 'task': task})
+
+            if tasks:
+                Task.objects.bulk_update(tasks, sorted(changed_fields))
+                tasks_changed_in_bulk(
+                    request.user.pk, completed=completed, incompleted=incompleted,
+                    stats=stats_delta([task._loaded_state for task in tasks], [task_state(task) for task in tasks]),
+                )
+                publish_tasks(request.user.pk, 'updated', [task.pk for task in tasks])
+
+        for result in results:
+            if 'task' in result:
+                result['task'] = serialize_task(result['task'])
+        return JsonResponse({'updated': len(tasks), 'results': results})
+
+
+class TaskApiBulkDeleteView(TaskApiMixin, View):
+    """Deletes many tasks at once."""
+
+    def post(self, request):
+        """Deletes the user's tasks with the given ids in one transaction."""
+        ids = self.get_items('ids')
+        with transaction.atomic():
+            queryset = self.get_queryset().filter(pk__in=[pk for pk in ids if is_id(pk)])
+            deleted = set(queryset.values_list('pk', flat=True))
+            before = list(queryset.stats_states())
+            counts = queryset.delete_in_bulk()
+            tasks_changed_in_bulk(
+                request.user.pk, completed=-counts['completed_count'], incompleted=-counts['incompleted_count'],
+                stats=stats_delta(before),
+            )
+            publish_tasks(request.user.pk, 'deleted', deleted)
+        results = [
+            {'index': index, 'id': pk, 'status': 'deleted' if is_id(pk) and pk in deleted else 'not_found'}
+            for index, pk in enumerate(ids)
+        ]
+        return JsonResponse({'deleted': len(deleted), 'results': results})
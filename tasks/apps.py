@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tasks'
+
+    def ready(self):
+        """Connects the task signal handlers and exposes the job queue metrics."""
+        from django.db.models.signals import post_migrate
+        from todo_list.metrics import registry
+        from . import jobs, signals
+        post_migrate.connect(signals.ensure_search_index, sender=self)
+        registry.add_collector(jobs.stats.render)
@@ -0,0 +1,29 @@
+from django.urls import path
+from .async_views import (
+    AsyncTaskListView, AsyncTaskCreateView, AsyncTaskUpdateView, AsyncTaskDeleteView, AsyncTaskToggleStatusView,
+    AsyncTaskExportView, TaskEventStreamView,
+)
+from .views import TaskBulkActionView, TaskStatsView, TaskImportView, TaskOccurrenceToggleView
+from .api import TaskApiListView, TaskApiBulkUpdateView, TaskApiBulkDeleteView
+
+
+# Same routes as tasks.urls, served by the async versions of the task views
+urlpatterns = [
+    path('', AsyncTaskListView.as_view(), name='tasks'),
+    path('task-create/', AsyncTaskCreateView.as_view(), name='task-create'),
+    path('task-update/<int:pk>/', AsyncTaskUpdateView.as_view(), name='task-update'),
+    path('task-delete/<int:pk>/', AsyncTaskDeleteView.as_view(), name='task-delete'),
+    path('task-toggle-status/<int:pk>/', AsyncTaskToggleStatusView.as_view(), name='task-toggle-status'),
+    path(
+        'task-toggle-occurrence/<int:pk>/<int:index>/', TaskOccurrenceToggleView.as_view(),
+        name='task-toggle-occurrence',
+    ),
+    path('events/', TaskEventStreamView.as_view(), name='task-events'),
+    path('task-bulk-action/', TaskBulkActionView.as_view(), name='task-bulk-action'),
+    path('stats/', TaskStatsView.as_view(), name='task-stats'),
+    path('export/', AsyncTaskExportView.as_view(), name='task-export'),
+    path('import/', TaskImportView.as_view(), name='task-import'),
+    path('api/tasks/', TaskApiListView.as_view(), name='api-tasks'),
+    path('api/tasks/bulk-update/', TaskApiBulkUpdateView.as_view(), name='api-tasks-bulk-update'),
+    path('api/tasks/bulk-delete/', TaskApiBulkDeleteView.as_view(), name='api-tasks-bulk-delete'),
+]
@@ -0,0 +1,199 @@
+import asyncio
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.middleware.csrf import get_token
+from django.views import View
+from .cache import afragment_key, aget_fragment, aset_fragment, get_fragment_cache
+from .events import hub, stream
+from .export import FORMATS, aiter_export
+from .models import Task, TaskCounter
+from .pagination import KeysetPage
+from .recurrence import upcoming_occurrences
+from .search import search_tasks
+from .views import (
+    TaskListView, TaskCreateView, TaskUpdateView, TaskDeleteView, TaskToggleStatusView, TaskExportView,
+)
+
+
+class AsyncLoginRequiredMixin(LoginRequiredMixin):
+    """
+    Async counterpart of LoginRequiredMixin. The lazy request.user is resolved
+    in a worker thread first, as touching the database is not allowed on the
+    event loop.
+    """
+    # Restricted to the handlers implemented asynchronously (a view can't mix sync and async handlers)
+    http_method_names = ['get', 'post', 'head', 'options']
+
+    async def dispatch(self, request, *args, **kwargs):
+        await sync_to_async(lambda: request.user.is_authenticated)()
+        response = super().dispatch(request, *args, **kwargs)
+        if asyncio.iscoroutine(response):
+            response = await response
+        return response
+
+
+class AsyncTaskObjectMixin:
+    """Fetches the task of the current user asynchronously."""
+
+    async def aget_object(self):
+        try:
+            return await Task.objects.aget(pk=self.kwargs['pk'], user=self.request.user)
+        except Task.DoesNotExist:
+            raise Http404('No task matches the given query.')
+
+
+class AsyncTaskListView(AsyncLoginRequiredMixin, TaskListView):
+    """Async version of TaskListView, using the async ORM methods."""
+
+    async def get(self, request, *args, **kwargs):
+        self.last_event_id = hub.last_id(request.user.pk)
+        self.fragment_key = await self.aget_fragment_key() if get_fragment_cache() is not None else None
+        cached = await aget_fragment(self.fragment_key) if self.fragment_key else None
+        self.object_list = self.get_queryset()
+        if cached is not None:
+            return self.render_to_response(dict(cached, search_input='', view=self))
+        return self.render_to_response(await self.aget_context_data())
+
+    async def aget_fragment_key(self):
+        """Asynchronous version of get_fragment_key()."""
+        parts = self.get_fragment_parts()
+        return await afragment_key(self.request.user.pk, *parts) if parts is not None else None
+
+    async def aget_counts(self):
+        """Asynchronous version of get_counts()."""
+        if getattr(settings, 'TASKS_USE_COUNTER_TABLE', False):
+            return await TaskCounter.aget_counts(self.request.user.pk)
+        return await Task.objects.filter(user=self.request.user).acounts()
+
+    async def aget_occurrences(self):
+        """Asynchronous version of get_occurrences()."""
+        if not self.shows_occurrences():
+            return []
+        after, before = self.get_occurrence_window()
+        tasks = [task async for task in self.get_recurring_tasks(before)]
+        return upcoming_occurrences(tasks, after, before, getattr(settings, 'TASKS_MAX_OCCURRENCES', 50))
+
+    async def aget_context_data(self, **kwargs):
+        """Asynchronous version of get_context_data()."""
+        context = super(TaskListView, self).get_context_data(**kwargs)
+        context['tasks'] = self.get_tasks(context['tasks'])
+        context.update(await self.aget_counts())
+        context['occurrences'] = await self.aget_occurrences()
+
+        search_input = self.get_search_input()
+        context['search_input'] = search_input
+
+        if search_input:
+            tasks = await sync_to_async(search_tasks)(
+                context['tasks'], self.request.user, search_input, self.get_page_size()
+            )
+            page = KeysetPage(tasks)
+        else:
+            page = await self.get_paginator(context['tasks']).aget_page(self.get_cursor())
+        context = self.add_page_to_context(context, page)
+        if self.fragment_key:
+            await aset_fragment(self.fragment_key, self.get_cached_context(context))
+        return context
+
+
+class AsyncTaskCreateView(AsyncLoginRequiredMixin, TaskCreateView):
+    """Async version of TaskCreateView."""
+
+    async def get(self, request, *args, **kwargs):
+        self.object = None
+        return self.render_to_response(self.get_context_data())
+
+    async def post(self, request, *args, **kwargs):
+        self.object = None
+        form = self.get_form()
+        if not form.is_valid():
+            return self.form_invalid(form)
+        form.instance.user = request.user
+        self.object = form.instance
+        await self.object.asave()
+        return HttpResponseRedirect(self.get_success_url())
+
+
+class AsyncTaskUpdateView(AsyncLoginRequiredMixin, AsyncTaskObjectMixin, TaskUpdateView):
+    """Async version of TaskUpdateView."""
+
+    async def get(self, request, *args, **kwargs):
+        self.object = await self.aget_object()
+        return self.render_to_response(self.get_context_data())
+
+    async def post(self, request, *args, **kwargs):
+        self.object = await self.aget_object()
+        form = self.get_form()
+        if not form.is_valid():
+            return self.form_invalid(form)
+        await self.object.asave()
+        return HttpResponseRedirect(self.get_success_url())
+
+
+class AsyncTaskToggleStatusView(AsyncLoginRequiredMixin, TaskToggleStatusView):
+    """Async version of TaskToggleStatusView, running the atomic toggle in a worker thread."""
+
+    async def post(self, request, pk):
+        task = await sync_to_async(self.toggle)(pk)
+        if task is None:
+            raise Http404('No task matches the given query.')
+        if self.wants_fragment():
+            return self.render_fragment(task, await TaskCounter.aget_counts(request.user.pk))
+        return self.render_toggled(task)
+
+
+class AsyncTaskDeleteView(AsyncLoginRequiredMixin, AsyncTaskObjectMixin, TaskDeleteView):
+    """Async version of TaskDeleteView."""
+
+    async def get(self, request, *args, **kwargs):
+        self.object = await self.aget_object()
+        return self.render_to_response(self.get_context_data(object=self.object))
+
+    async def post(self, request, *args, **kwargs):
+        self.object = await self.aget_object()
+        await self.object.adelete()
+        return HttpResponseRedirect(self.get_success_url())
+
+
+class AsyncTaskExportView(AsyncLoginRequiredMixin, TaskExportView):
+    """
+    Async version of TaskExportView. The export is streamed by an async
+    iterator, as Django would read a sync one to the end before sending it.
+    """
+
+    async def get(self, request):
+        file_format = request.GET.get('format', 'csv')
+        if file_format not in FORMATS:
+            return self.unknown_format()
+        # Search filters may query the database while the queryset is built
+        tasks = await sync_to_async(self.get_tasks)()
+        chunk_size = getattr(settings, 'TASKS_EXPORT_CHUNK_SIZE', 2000)
+        return self.export_response(aiter_export(tasks, file_format, chunk_size=chunk_size), file_format)
+
+
+class TaskEventStreamView(AsyncLoginRequiredMixin, View):
+    """
+    Server-Sent Events stream of the changes to the user's tasks (see tasks.events).
+    Served under ASGI only: under WSGI a stream would hold a worker for as long as
+    the page is open, so the client is told not to reconnect (204 No Content).
+    """
+    http_method_names = ['get']
+
+    def get_last_event_id(self):
+        """Returns the id of the last event the client has seen: the header of reconnecting clients, else the page's."""
+        return self.request.headers.get('Last-Event-ID', self.request.GET.get('last-event-id'))
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            return HttpResponse(status=204)
+        response = StreamingHttpResponse(
+            stream(request.user.pk, get_token(request), self.get_last_event_id()),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Keeps proxies such as nginx from buffering the events
+        response['X-Accel-Buffering'] = 'no'
+        return response
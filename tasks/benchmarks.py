@@ -0,0 +1,216 @@
+import gc
+import platform
+import subprocess
+import time
+import tracemalloc
+import uuid
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.template.loader import render_to_string
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from .cache import CSRF_PLACEHOLDER
+from .loadtest import DRIVERS, LoadTestRequest
+from .models import Task
+
+
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+SCENARIOS = ['login', 'list', 'search', 'create', 'toggle', 'delete']
+
+# Login throttling buckets large enough never to run out, so that the login scenario measures
+# the password hashing rather than 429 responses to all clients sharing one address
+BENCHMARK_RATE_LIMITS = {scope: (10 ** 9, 10 ** 9) for scope in ('ip', 'username', 'register')}
+
+
+def seed(users, tasks_per_user, prefix='benchmark', batch_size=1000, description_length=None):
+    """
+    Creates `users` users owning `tasks_per_user` tasks each. The password is
+    hashed once and shared, so seeding cost doesn't depend on the hasher.
+    Descriptions are padded to `description_length` characters if given.
+    """
+    password = make_password(BENCHMARK_PASSWORD)
+    created = User.objects.bulk_create(
+        User(username=f'{prefix}-{index}', password=password) for index in range(users)
+    )
+    created = list(User.objects.filter(username__in=[user.username for user in created]).order_by('pk'))
+    for user in created:
+        Task.objects.bulk_create(
+            (Task(user=user, title=f'Benchmark task {index}', description=_description(index, description_length))
+             for index in range(tasks_per_user)),
+            batch_size=batch_size,
+        )
+    return created
+
+
+def unique_prefix(prefix):
+    """Returns the prefix with a random suffix, so seeded usernames never collide with users kept by earlier runs."""
+    return f'{prefix}-{uuid.uuid4().hex[:8]}'
+
+
+def remove_seeded(users):
+    """
+    Removes seeded users. Their tasks are deleted first with a single DELETE,
+    as deleting the users would cascade to them with per-task signals.
+    """
+    Task.objects.filter(user__in=users).delete_in_bulk()
+    User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+
+def _description(index, length=None):
+    description = f'Seeded task number {index}'
+    return description.ljust(length, '.') if length else description
+
+
+def build_scenario(name, users, requests_per_client):
+    """
+    Returns the list of requests of every client for the scenario. Client `i`
+    is logged in as `users[i]`. Toggles and deletes split each user's tasks
+    between the clients sharing that user, so no task is deleted twice.
+    """
+    task_ids = {}
+    if name in ('toggle', 'delete'):
+        for user in set(users):
+            task_ids[user.pk] = list(Task.objects.filter(user=user).values_list('pk', flat=True))
+
+    request_lists = []
+    for index, user in enumerate(users):
+        if name == 'login':
+            data = {'username': user.username, 'password': BENCHMARK_PASSWORD}
+            requests = [LoadTestRequest('post', reverse('login'), data, anonymous=True)] * requests_per_client
+        elif name == 'list':
+            requests = [LoadTestRequest('get', reverse('tasks'))] * requests_per_client
+        elif name == 'search':
+            requests = [
+                LoadTestRequest('get', reverse('tasks'), {'search-area': f'task {number}'})
+                for number in range(requests_per_client)
+            ]
+        elif name == 'create':
+            requests = [
+                LoadTestRequest('post', reverse('task-create'), {'title': f'Created task {number}'})
+                for number in range(requests_per_client)
+            ]
+        elif name in ('toggle', 'delete'):
+            sharing = [position for position, other in enumerate(users) if other.pk == user.pk]
+            own_ids = task_ids[user.pk][sharing.index(index)::len(sharing)]
+            if name == 'toggle':
+                url_name = 'task-toggle-status'
+                ids = [own_ids[number % len(own_ids)] for number in range(requests_per_client)] if own_ids else []
+            else:
+                url_name = 'task-delete'
+                ids = own_ids[:requests_per_client]
+            requests = [LoadTestRequest('post', reverse(url_name, kwargs={'pk': pk})) for pk in ids]
+        else:
+            raise ValueError(f'Unknown scenario: {name}')
+        request_lists.append(requests)
+    return request_lists
+
+
+def get_revision():
+    """Returns the current git commit, if available."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(users, tasks_per_user=100, concurrency=4, requests_per_client=25,
+                  scenarios=SCENARIOS, interface='wsgi', prefix='benchmark', keep=False):
+    """
+    Seeds the data, runs every scenario against the real URLconf and returns a
+    JSON-serializable report. Seeded users and their tasks are removed at
+    the end unless `keep` is set; usernames get a unique prefix per run.
+    """
+    seeded = seed(users, tasks_per_user, prefix=unique_prefix(prefix))
+    clients = [seeded[index % len(seeded)] for index in range(concurrency)]
+    try:
+        results = {}
+        with override_settings(LOGIN_RATE_LIMITS=BENCHMARK_RATE_LIMITS):
+            for name in scenarios:
+                request_lists = build_scenario(name, clients, requests_per_client)
+                results[name] = DRIVERS[interface](clients, request_lists).as_dict()
+    finally:
+        if not keep:
+            remove_seeded(seeded)
+
+    return {
+        'revision': get_revision(),
+        'timestamp': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'config': {
+            'users': users,
+            'tasks_per_user': tasks_per_user,
+            'concurrency': concurrency,
+            'requests_per_client': requests_per_client,
+            'interface': interface,
+        },
+        'scenarios': results,
+    }
+
+
+# Ways of loading the task list compared by run_render_benchmark(): model instances (as before
+# TaskQuerySet.rows() was introduced) and the column-pruned TaskRow projection
+RENDER_VARIANTS = {
+    'models': lambda tasks: tasks,
+    'rows': lambda tasks: tasks.rows(),
+}
+
+
+def measure_render(queryset, repeat=3):
+    """
+    Loads and renders the task rows of the queryset like the task list does.
+    Returns the best fetch and render times of `repeat` runs, and the memory
+    held by the loaded tasks and at the peak of a run, measured with tracemalloc
+    in a separate run so that tracing doesn't distort the times.
+    """
+    fetch_times, render_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tasks = list(queryset.all())
+        fetched = time.perf_counter()
+        render_to_string('tasks/task_rows.html', {'tasks': tasks, 'csrf_token': CSRF_PLACEHOLDER})
+        fetch_times.append(fetched - start)
+        render_times.append(time.perf_counter() - fetched)
+        del tasks
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        tasks = list(queryset.all())
+        retained, _ = tracemalloc.get_traced_memory()
+        render_to_string('tasks/task_rows.html', {'tasks': tasks, 'csrf_token': CSRF_PLACEHOLDER})
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'fetch_ms': round(min(fetch_times) * 1000, 3),
+        'render_ms': round(min(render_times) * 1000, 3),
+        'retained_bytes': retained,
+        'peak_bytes': peak,
+    }
+
+
+def run_render_benchmark(rows=10000, repeat=3, description_length=500, prefix='render-benchmark', keep=False):
+    """
+    Seeds one user with `rows` tasks and measures loading and rendering them
+    all as the task list would, with every RENDER_VARIANTS entry. Returns a
+    JSON-serializable report; the seeded user is removed unless `keep` is set.
+    """
+    user, = seed(1, rows, prefix=unique_prefix(prefix), description_length=description_length)
+    try:
+        tasks = Task.objects.filter(user=user).with_deadline().order_by('-creation_date', '-id')
+        variants = {name: measure_render(variant(tasks), repeat) for name, variant in RENDER_VARIANTS.items()}
+    finally:
+        if not keep:
+            remove_seeded([user])
+
+    return {
+        'revision': get_revision(),
+        'timestamp': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'config': {'rows': rows, 'repeat': repeat, 'description_length': description_length},
+        'variants': variants,
+    }
@@ -0,0 +1,95 @@
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+# Stand-in for the CSRF token in cached fragments, replaced with the current token on every response
+CSRF_PLACEHOLDER = 'CSRF-TOKEN-PLACEHOLDER'
+
+
+def get_fragment_cache():
+    """Returns the cache backend used for task list fragments, or None if caching is disabled."""
+    alias = getattr(settings, 'TASKS_FRAGMENT_CACHE', None)
+    return caches[alias] if alias else None
+
+
+def _generation_key(user_id):
+    return f'tasks:generation:{user_id}'
+
+
+def get_generation(user_id):
+    """
+    Returns the current task generation of the user. A missing counter starts
+    from the current time in milliseconds, so that an evicted counter never
+    goes back to a value used by fragments that may still be cached.
+    """
+    cache = get_fragment_cache()
+    if cache is None:
+        return None
+    return cache.get_or_set(_generation_key(user_id), lambda: int(time.time() * 1000), timeout=None)
+
+
+async def aget_generation(user_id):
+    """Asynchronous version of get_generation()."""
+    cache = get_fragment_cache()
+    if cache is None:
+        return None
+    return await cache.aget_or_set(_generation_key(user_id), lambda: int(time.time() * 1000), timeout=None)
+
+
+def bump_generation(user_id):
+    """Invalidates every cached fragment of the user by moving to the next generation."""
+    cache = get_fragment_cache()
+    if cache is None:
+        return
+    try:
+        cache.incr(_generation_key(user_id))
+    except ValueError:
+        # Nothing cached for this user yet
+        pass
+
+
+def bump_generation_on_change(user_id):
+    """
+    Bumps the generation right away and once more when the current transaction
+    commits, so rows read by concurrent requests before the commit cannot stay cached.
+    """
+    bump_generation(user_id)
+    transaction.on_commit(lambda: bump_generation(user_id))
+
+
+def _fragment_key(user_id, generation, parts):
+    return ':'.join(['tasks:fragment', str(user_id), str(generation), *map(str, parts)])
+
+
+def fragment_key(user_id, *parts):
+    """Builds the cache key of a fragment for the user's current generation."""
+    return _fragment_key(user_id, get_generation(user_id), parts)
+
+
+async def afragment_key(user_id, *parts):
+    """Asynchronous version of fragment_key()."""
+    return _fragment_key(user_id, await aget_generation(user_id), parts)
+
+
+def get_fragment(key):
+    cache = get_fragment_cache()
+    return cache.get(key) if cache is not None else None
+
+
+async def aget_fragment(key):
+    cache = get_fragment_cache()
+    return await cache.aget(key) if cache is not None else None
+
+
+def set_fragment(key, value):
+    cache = get_fragment_cache()
+    if cache is not None:
+        cache.set(key, value, getattr(settings, 'TASKS_FRAGMENT_CACHE_TIMEOUT', 60))
+
+
+async def aset_fragment(key, value):
+    cache = get_fragment_cache()
+    if cache is not None:
+        await cache.aset(key, value, getattr(settings, 'TASKS_FRAGMENT_CACHE_TIMEOUT', 60))
@@ -0,0 +1,223 @@
+"""
+Live task events, streamed to the open task lists of their user as Server-Sent Events.
+
+Views and signal handlers publish an event once their transaction commits;
+the in-process hub hands it to every stream connection of the user, each of
+which buffers at most TASKS_EVENTS_BUFFER_SIZE events. A connection whose
+client does not keep up gets a single `reset` event instead of the events it
+missed, telling the client to reload the list. Event ids are numbered within
+the process and prefixed with a random epoch chosen when it starts, so ids
+handed out by other (or restarted) processes are told apart.
+"""
+import asyncio
+import itertools
+import json
+import threading
+import uuid
+from collections import defaultdict
+from django.conf import settings
+from django.db import transaction
+from django.template.loader import render_to_string
+from .cache import CSRF_PLACEHOLDER
+from .models import Task
+
+
+# Event types of changes to tasks, and the event telling clients to reload the list
+TASK_EVENTS = ('created', 'updated', 'toggled', 'deleted')
+RESET = 'reset'
+
+# Milliseconds clients wait before reconnecting a closed stream
+RETRY_MS = 3000
+
+
+class Event:
+    """One published event: its id (`<epoch>:<number>`, see EventHub), type and JSON data."""
+    __slots__ = ('id', 'type', 'data')
+
+    def __init__(self, id, type, data):
+        self.id = id
+        self.type = type
+        self.data = data
+
+    def __repr__(self):
+        return f'<Event: {self.id} {self.type}>'
+
+    def encode(self, csrf_token=''):
+        """Returns the event as an SSE message, with the rendered rows using the given CSRF token."""
+        data = json.dumps(self.data, separators=(',', ':')).replace(CSRF_PLACEHOLDER, csrf_token)
+        return f'id: {self.id}\nevent: {self.type}\ndata: {data}\n\n'
+
+
+class Subscription:
+    """
+    Bounded event buffer of one stream connection, filled by the publishing
+    threads and drained on the event loop serving the connection.
+    """
+
+    def __init__(self, user_id, size):
+        self.user_id = user_id
+        self.size = size
+        self.overflowed = False
+        self._events = []
+        self._lock = threading.Lock()
+        self._ready = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+
+    def put(self, event):
+        """Buffers the event, or drops the whole buffer once it is full (the client will have to reload)."""
+        with self._lock:
+            if self.overflowed:
+                return
+            if len(self._events) >= self.size:
+                self._events.clear()
+                self.overflowed = True
+            else:
+                self._events.append(event)
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            # The loop of the connection is closed
+            pass
+
+    async def get(self, timeout):
+        """
+        Waits up to `timeout` seconds for events and returns the buffered ones
+        and whether any were dropped since the previous call.
+        """
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._ready.clear()
+        with self._lock:
+            events, self._events = self._events, []
+            overflowed, self.overflowed = self.overflowed, False
+        return events, overflowed
+
+
+class EventHub:
+    """In-process fan-out of the published events to the stream connections of their user."""
+
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._numbers = itertools.count(1)
+        self._subscriptions = defaultdict(set)
+        self._last_numbers = {}
+
+    def subscribe(self, user_id, size):
+        """Opens a subscription to the events of the user. Must be called on the event loop of the connection."""
+        subscription = Subscription(user_id, size)
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.user_id, None)
+
+    def is_subscribed(self, user_id):
+        """Tells whether the user has a stream open in this process."""
+        return user_id in self._subscriptions
+
+    def last_id(self, user_id):
+        """Returns the id of the last event published for the user, numbered 0 if there was none."""
+        return f'{self.epoch}:{self._last_numbers.get(user_id, 0)}'
+
+    def missed(self, user_id, event_id):
+        """
+        Tells whether events were published for the user after the one with the
+        given id. Ids of other processes, or of an earlier run of this one, can't
+        be compared and are assumed to be up to date.
+        """
+        epoch, _, number = event_id.partition(':')
+        if epoch != self.epoch or not number.isdigit():
+            return False
+        return int(number) < self._last_numbers.get(user_id, 0)
+
+    def publish(self, user_id, type, data):
+        """Hands the event to every subscription of the user and returns it."""
+        with self._lock:
+            number = next(self._numbers)
+            event = Event(f'{self.epoch}:{number}', type, data)
+            self._last_numbers[user_id] = number
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.put(event)
+        return event
+
+
+hub = EventHub()
+
+
+def render_rows(user_id, ids):
+    """Returns the id, status and rendered row (with a placeholder CSRF token) of the given tasks of the user."""
+    rows = Task.objects.filter(user_id=user_id, pk__in=ids).with_deadline().rows()
+    return [
+        {
+            'id': row.pk, 'is_completed': row.is_completed,
+            'html': render_to_string('tasks/task_row.html', {'task': row, 'csrf_token': CSRF_PLACEHOLDER}),
+        }
+        for row in rows
+    ]
+
+
+def publish_tasks(user_id, type, ids):
+    """
+    Publishes a task event (see TASK_EVENTS) for the given tasks once the
+    current transaction commits. Except for deletions, the event carries the
+    re-rendered rows, which are read with one query and only while the user
+    has a stream open.
+    """
+    ids = list(ids)
+    if not ids:
+        return
+
+    def send():
+        if type != 'deleted' and hub.is_subscribed(user_id):
+            tasks = render_rows(user_id, ids)
+        else:
+            tasks = [{'id': pk} for pk in ids]
+        hub.publish(user_id, type, {'tasks': tasks})
+
+    transaction.on_commit(send)
+
+
+def publish_reset(user_ids):
+    """Tells the open task lists of the users to reload, once the current transaction commits."""
+    user_ids = list(user_ids)
+    transaction.on_commit(lambda: [hub.publish(user_id, RESET, {}) for user_id in user_ids])
+
+
+async def stream(user_id, csrf_token, last_event_id=None):
+    """
+    Yields the SSE messages of a stream connection of the user: the events
+    published for them, keep-alive comments every TASKS_EVENTS_HEARTBEAT seconds
+    and a `reset` when events were dropped, or published while the client was
+    reconnecting (its Last-Event-ID is older than the last id of the user). The stream
+    ends after TASKS_EVENTS_MAX_AGE seconds and the client reconnects, so that
+    connections the server cannot see closed are released.
+    """
+    subscription = hub.subscribe(user_id, getattr(settings, 'TASKS_EVENTS_BUFFER_SIZE', 100))
+    heartbeat = getattr(settings, 'TASKS_EVENTS_HEARTBEAT', 15)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + getattr(settings, 'TASKS_EVENTS_MAX_AGE', 300)
+    try:
+        # Starts from the last event id of the user, so that a reconnecting client can tell what it missed
+        last_id = hub.last_id(user_id)
+        yield f'retry: {RETRY_MS}\nid: {last_id}\n\n'
+        if last_event_id is not None and hub.missed(user_id, last_event_id):
+            yield Event(last_id, RESET, {}).encode()
+        while (remaining := deadline - loop.time()) > 0:
+            events, overflowed = await subscription.get(min(heartbeat, remaining))
+            if overflowed:
+                yield Event(hub.last_id(user_id), RESET, {}).encode()
+            elif events:
+                yield ''.join(event.encode(csrf_token) for event in events)
+            else:
+                yield ': keep-alive\n\n'
+    finally:
+        hub.unsubscribe(subscription)
@@ -0,0 +1,106 @@
+import csv
+import json
+from itertools import islice
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+from .search import filter_tasks
+
+
+# Exported columns, in order, and the Task fields they are read from
+EXPORT_FIELDS = (
+    'id', 'title', 'description', 'is_completed', 'creation_date', 'due_date', 'completion_date', 'recurrence',
+)
+USER_FIELD = ('user', 'user__username')
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+class Echo:
+    """File-like object handing back what is written to it, so csv.writer output can be streamed."""
+
+    def write(self, value):
+        return value
+
+
+def _value(value):
+    """Converts a field value to its exported (JSON-compatible) form."""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def _csv_value(value):
+    """Converts a field value to its CSV form: booleans as true/false, empty for missing values."""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return '' if value is None else _value(value)
+
+
+def export_queryset(queryset, due=None, search=None, user=None):
+    """
+    Returns the tasks to export in primary key order, narrowed by the same due
+    date filter and search as the task list.
+    """
+    if due:
+        queryset = queryset.due(due)
+    if search:
+        queryset = filter_tasks(queryset, search, user=user)
+    return queryset.order_by('pk')
+
+
+def _export_rows(queryset, file_format, include_user):
+    """
+    Returns the header line (None for JSON Lines), the row queryset and a
+    function encoding one row in the format.
+    """
+    columns = list(EXPORT_FIELDS)
+    fields = list(EXPORT_FIELDS)
+    if include_user:
+        columns.insert(1, USER_FIELD[0])
+        fields.insert(1, USER_FIELD[1])
+    rows = queryset.values_list(*fields)
+
+    if file_format == 'csv':
+        writer = csv.writer(Echo())
+        return writer.writerow(columns), rows, lambda row: writer.writerow([_csv_value(value) for value in row])
+    if file_format == 'jsonl':
+        return None, rows, lambda row: json.dumps(dict(zip(columns, map(_value, row))), ensure_ascii=False) + '\n'
+    raise ValueError(f'Unknown export format: {file_format}')
+
+
+def iter_export(queryset, file_format='csv', include_user=False, chunk_size=2000):
+    """
+    Yields the tasks as CSV lines or JSON Lines. Rows are fetched in chunks
+    with QuerySet.iterator(), so memory use doesn't depend on the row count.
+    """
+    header, rows, encode = _export_rows(queryset, file_format, include_user)
+    if header is not None:
+        yield header
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield encode(row)
+
+
+async def aiter_export(queryset, file_format='csv', include_user=False, chunk_size=2000):
+    """
+    Asynchronous version of iter_export(), fetching each chunk in a worker
+    thread. Under ASGI a StreamingHttpResponse has to be given an async
+    iterator: a sync one is consumed whole before anything is sent.
+    (QuerySet.aiterator() can't be used, in Django 4.2 it runs the query of
+    values_list() querysets on the event loop.)
+    """
+    header, rows, encode = _export_rows(queryset, file_format, include_user)
+    if header is not None:
+        yield header
+    rows = rows.iterator(chunk_size=chunk_size)
+    next_chunk = sync_to_async(lambda: list(islice(rows, chunk_size)))
+    while chunk := await next_chunk():
+        for row in chunk:
+            yield encode(row)
+
+
+def export_filename(file_format):
+    """Returns the download file name of an export made now."""
+    return f'tasks-{timezone.localtime():%Y%m%d-%H%M%S}.{file_format}'
@@ -1,5 +1,20 @@
 from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from .models import Task
+from .recurrence import InvalidRule, Rule
+
+
+class RecurrenceField(forms.CharField):
+    """Field for a recurrence rule, cleaned to its normalized RRULE form (empty for none)."""
+
+    def clean(self, value):
+        value = super().clean(value)
+        try:
+            return str(Rule.parse(value)) if value else ''
+        except InvalidRule:
+            # Reported by the model field validator
+            return value
 
 
 class TaskCreateForm(forms.ModelForm):
@@ -7,7 +22,8 @@ class TaskCreateForm(forms.ModelForm):
 
     class Meta:
         model = Task
-        fields = ['title', 'description', 'due_date']
+        fields = ['title', 'description', 'due_date', 'recurrence']
+        field_classes = {'recurrence': RecurrenceField}
         widgets = {
             'title': forms.TextInput(attrs={
                 'placeholder': "e.g. Read a book"
@@ -19,6 +35,9 @@ class TaskCreateForm(forms.ModelForm):
             'due_date': forms.DateTimeInput(attrs={
                 'type': 'datetime-local'
             }), 
+            'recurrence': forms.TextInput(attrs={
+                'placeholder': "e.g. weekly or FREQ=WEEKLY;BYDAY=MO,TH"
+            }),
         }
 
 
@@ -27,7 +46,8 @@ class TaskUpdateForm(forms.ModelForm):
 
     class Meta:
         model = Task
-        fields = ['title', 'description', 'is_completed', 'due_date']
+        fields = ['title', 'description', 'is_completed', 'due_date', 'recurrence']
+        field_classes = {'recurrence': RecurrenceField}
         widgets = {
             'title': forms.TextInput(attrs={
                 'placeholder': "This field cannot be empty"
@@ -39,4 +59,69 @@ class TaskUpdateForm(forms.ModelForm):
             'due_date': forms.DateTimeInput(attrs={
                 'type': 'datetime-local'
             }), 
+            'recurrence': forms.TextInput(attrs={
+                'placeholder': "Does not repeat"
+            }),
         }
+
+
+class IdListField(forms.Field):
+    """Field accepting a list of task ids (e.g. from checkboxes sharing one name)."""
+    widget = forms.MultipleHiddenInput
+    default_error_messages = {'required': 'Select the tasks to apply the action to.'}
+
+    def to_python(self, value):
+        if not value:
+            return []
+        try:
+            return [int(pk) for pk in value]
+        except (TypeError, ValueError):
+            raise ValidationError('Enter a list of task ids.', code='invalid')
+
+
+class TaskBulkActionForm(forms.Form):
+    """Form for applying one action to many tasks at once."""
+    ACTION_CHOICES = [
+        ('complete', 'Mark as completed'),
+        ('incomplete', 'Mark as incompleted'),
+        ('reschedule', 'Postpone due date'),
+        ('delete', 'Delete'),
+    ]
+
+    action = forms.ChoiceField(choices=ACTION_CHOICES)
+    ids = IdListField()
+    shift_days = forms.IntegerField(min_value=1, max_value=365, required=False)
+
+    def clean_ids(self):
+        """Limits the number of tasks changed by one request."""
+        ids = self.cleaned_data['ids']
+        max_batch = getattr(settings, 'TASKS_API_MAX_BATCH', 1000)
+        if len(ids) > max_batch:
+            raise ValidationError(f'At most {max_batch} tasks can be changed at once.', code='max_batch')
+        return ids
+
+    def clean(self):
+        """Requires the number of days for the reschedule action."""
+        cleaned_data = super().clean()
+        if cleaned_data.get('action') == 'reschedule' and not cleaned_data.get('shift_days'):
+            self.add_error('shift_days', 'Enter the number of days to postpone the tasks by.')
+        return cleaned_data
+
+
+class TaskImportForm(forms.Form):
+    """Form for uploading a CSV or JSON Lines file of tasks."""
+    file = forms.FileField()
+    file_format = forms.ChoiceField(choices=[('', 'From the file extension'), ('csv', 'CSV'), ('jsonl', 'JSON Lines')],
+                                    required=False)
+    resume = forms.IntegerField(required=False)
+
+    def clean(self):
+        """Determines the format from the file name when it isn't given."""
+        cleaned_data = super().clean()
+        upload = cleaned_data.get('file')
+        if upload and not cleaned_data.get('file_format'):
+            extension = upload.name.rsplit('.', 1)[-1].lower()
+            if extension not in ('csv', 'jsonl'):
+                self.add_error('file_format', 'Choose the format of the file.')
+            cleaned_data['file_format'] = extension
+        return cleaned_data
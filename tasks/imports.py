@@ -0,0 +1,125 @@
+import csv
+import json
+from itertools import islice
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+from django.forms.utils import ErrorDict, ErrorList
+from django.utils import timezone
+from .forms import TaskCreateForm
+from .models import Task, TaskImport
+from .signals import tasks_changed_in_bulk
+from .stats import stats_delta, task_state
+
+
+FORMATS = ('csv', 'jsonl')
+
+
+class RowValidator:
+    """
+    Validates input rows with the TaskCreateForm field rules followed by the
+    Task field validators (e.g. validate_due_date) and Task.clean() (e.g. a
+    recurrence needs a due date), as the form would, without
+    building a form per row. Besides the form fields, rows may set is_completed;
+    other columns (e.g. those of an export) are ignored.
+    """
+
+    def __init__(self):
+        self.fields = dict(TaskCreateForm.base_fields)
+        self.fields['is_completed'] = forms.BooleanField(required=False)
+        self.exclude = [field.name for field in Task._meta.fields if field.name not in self.fields]
+
+    def clean(self, row):
+        """Returns the task built from the row and None, or None and the errors as JSON data."""
+        if not isinstance(row, dict):
+            return None, {'__all__': [{'message': 'Row must be an object.', 'code': 'invalid'}]}
+        errors = ErrorDict()
+        values = {}
+        for name, field in self.fields.items():
+            try:
+                values[name] = field.clean(row.get(name))
+            except ValidationError as error:
+                errors[name] = ErrorList(error.error_list)
+        if errors:
+            return None, errors.get_json_data()
+
+        task = Task(**values)
+        try:
+            task.full_clean(exclude=self.exclude, validate_unique=False, validate_constraints=False)
+        except ValidationError as error:
+            for name, field_errors in error.error_dict.items():
+                errors[name] = ErrorList(field_errors)
+            return None, errors.get_json_data()
+        return task, None
+
+
+def read_rows(stream, file_format):
+    """Yields the rows of a text stream of CSV (with a header) or JSON Lines, one at a time."""
+    if file_format == 'csv':
+        yield from csv.DictReader(stream)
+    elif file_format == 'jsonl':
+        for line in stream:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+    else:
+        raise ValueError(f'Unknown import format: {file_format}')
+
+
+def import_tasks(task_import, stream, batch_size=1000, on_error=None):
+    """
+    Imports the rows of the stream for the user of `task_import`, validating
+    and inserting them batch by batch. Each batch is inserted with one
+    bulk_create in the same transaction that advances the import's progress,
+    so rows already processed by an interrupted run are skipped when the same
+    input is imported again. `on_error(row_number, errors)` is called for
+    every invalid row (numbered from 1, not counting a CSV header).
+    """
+    validator = RowValidator()
+    rows = read_rows(stream, task_import.file_format)
+    row_number = task_import.processed_rows
+    # Skip what a previous run has committed already
+    for _ in islice(rows, task_import.processed_rows):
+        pass
+
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        tasks, errors = [], 0
+        now = timezone.now()
+        for row in batch:
+            row_number += 1
+            task, row_errors = validator.clean(row)
+            if task is None:
+                errors += 1
+                if on_error:
+                    on_error(row_number, row_errors)
+                continue
+            task.user_id = task_import.user_id
+            task.update_completion_date(now)
+            tasks.append(task)
+
+        with transaction.atomic():
+            Task.objects.bulk_create(tasks)
+            completed = sum(task.is_completed for task in tasks)
+            tasks_changed_in_bulk(
+                task_import.user_id, completed=completed, incompleted=len(tasks) - completed,
+                stats=stats_delta(after=[task_state(task) for task in tasks]),
+            )
+            TaskImport.objects.filter(pk=task_import.pk).update(
+                processed_rows=F('processed_rows') + len(batch),
+                created_count=F('created_count') + len(tasks),
+                error_count=F('error_count') + errors,
+            )
+        task_import.processed_rows += len(batch)
+        task_import.created_count += len(tasks)
+        task_import.error_count += errors
+
+    task_import.finished_at = timezone.now()
+    task_import.save(update_fields=['finished_at'])
+    return task_import
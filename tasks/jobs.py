@@ -0,0 +1,318 @@
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import close_old_connections, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .cache import bump_generation_on_change
+from .models import Job, Task
+
+
+logger = logging.getLogger('tasks.jobs')
+
+# Job handlers by kind, registered with @handler
+HANDLERS = {}
+
+
+def handler(kind):
+    """Registers the decorated function as the handler of the jobs of the given kind, called with their payload."""
+    def register(function):
+        HANDLERS[kind] = function
+        return function
+    return register
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def enqueue(jobs):
+    """
+    Inserts the jobs with one statement. Jobs whose key is already taken are
+    skipped, so scheduling the same work again is harmless.
+    """
+    return Job.objects.bulk_create(jobs, ignore_conflicts=True)
+
+
+class JobStats:
+    """Process-local, thread-safe totals of the jobs run by the workers of this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.finished = defaultdict(int)
+            self.duration = defaultdict(float)
+            self.lag = defaultdict(float)
+
+    def record(self, kind, status, duration, lag):
+        with self._lock:
+            self.finished[kind, status] += 1
+            self.duration[kind] += duration
+            self.lag[kind] += lag
+
+    def render(self):
+        """Returns the totals, and the current queue depth, in the Prometheus text exposition format."""
+        with self._lock:
+            lines = [
+                '# HELP tasks_jobs_finished_total Jobs run by the workers of this process.',
+                '# TYPE tasks_jobs_finished_total counter',
+            ]
+            lines += [
+                f'tasks_jobs_finished_total{{kind="{kind}",status="{status}"}} {count}'
+                for (kind, status), count in sorted(self.finished.items())
+            ]
+            for name, values, help_text in (
+                ('tasks_jobs_duration_seconds_total', self.duration, 'Time spent running jobs.'),
+                ('tasks_jobs_lag_seconds_total', self.lag, 'Time between the due time of jobs and their start.'),
+            ):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+                lines += [f'{name}{{kind="{kind}"}} {value:.6f}' for kind, value in sorted(values.items())]
+        lines += ['# HELP tasks_jobs_queued Jobs waiting to be run.', '# TYPE tasks_jobs_queued gauge']
+        lines.append(f'tasks_jobs_queued {Job.objects.filter(status=Job.QUEUED).count()}')
+        return '\n'.join(lines) + '\n'
+
+
+stats = JobStats()
+
+
+def claim(worker, limit, now=None, using=None):
+    """
+    Claims up to `limit` due jobs for the worker and returns them. The claim is
+    a single UPDATE ... WHERE status = 'queued', so when workers race for a job
+    only one of them moves it to running; each claim gets a token of its own to
+    find its jobs afterwards. Databases supporting SKIP LOCKED let concurrent
+    workers pick different jobs instead of waiting for each other.
+    """
+    now = now or timezone.now()
+    token = f'{worker}:{uuid.uuid4().hex[:12]}'
+    jobs = Job.objects.db_manager(using)
+    with transaction.atomic(using=jobs.db):
+        queued = jobs.filter(status=Job.QUEUED, run_at__lte=now).order_by('run_at', 'id')
+        if connections[jobs.db].features.has_select_for_update_skip_locked:
+            queued = queued.select_for_update(skip_locked=True)
+        ids = list(queued.values_list('pk', flat=True)[:limit])
+        if not ids:
+            return []
+        jobs.filter(pk__in=ids, status=Job.QUEUED).update(status=Job.RUNNING, claimed_by=token, started_at=now)
+    return list(jobs.filter(pk__in=ids, claimed_by=token).order_by('run_at', 'id'))
+
+
+def run_jobs(jobs):
+    """Runs claimed jobs, marking the successful ones done with one statement and the others failed."""
+    done = []
+    for job in jobs:
+        start = time.perf_counter()
+        try:
+            function = HANDLERS.get(job.kind)
+            if function is None:
+                raise LookupError(f'No handler for jobs of kind {job.kind!r}')
+            function(job.payload)
+        except Exception as error:
+            logger.exception('Job %s failed', job)
+            status = Job.FAILED
+            Job.objects.filter(pk=job.pk).update(status=status, finished_at=timezone.now(), error=repr(error))
+        else:
+            status = Job.DONE
+            done.append(job.pk)
+        stats.record(job.kind, status, time.perf_counter() - start, (job.started_at - job.run_at).total_seconds())
+    if done:
+        Job.objects.filter(pk__in=done).update(status=Job.DONE, finished_at=timezone.now())
+    return len(done)
+
+
+def _scan(queryset, batch_size, max_batches):
+    """
+    Yields the (id, user_id, due_date) rows of the queryset in (due_date, id)
+    order, reading at most `max_batches` batches of `batch_size` rows, each
+    one starting after the last row of the previous batch.
+    """
+    position = None
+    for _ in range(max_batches):
+        batch = queryset
+        if position is not None:
+            batch = batch.filter(Q(due_date__gt=position[0]) | Q(due_date=position[0], pk__gt=position[1]))
+        rows = list(batch.order_by('due_date', 'id').values_list('pk', 'user_id', 'due_date')[:batch_size])
+        yield rows
+        if len(rows) < batch_size:
+            return
+        position = rows[-1][2], rows[-1][0]
+
+
+def schedule_reminders(now, batch_size, max_batches):
+    """
+    Enqueues a reminder for every open task whose due date is TASKS_REMINDER_OFFSETS
+    ahead, i.e. in [now + offset - lookback, now + offset). Scans run through the
+    due_date index; every reminder gets a key made of the task, the offset and the
+    due date, so overlapping scans don't enqueue a reminder twice, and a task
+    which is rescheduled gets reminded again.
+    """
+    lookback = _setting('TASKS_SCHEDULER_LOOKBACK', timedelta(hours=1))
+    scheduled = 0
+    for offset in _setting('TASKS_REMINDER_OFFSETS', [timedelta(days=1), timedelta(hours=1)]):
+        seconds = int(offset.total_seconds())
+        tasks = Task.objects.filter(
+            due_date__gte=now + offset - lookback, due_date__lt=now + offset, is_completed=False, recurrence='',
+        )
+        for rows in _scan(tasks, batch_size, max_batches):
+            enqueue([
+                Job(
+                    kind='reminder', key=f'reminder:{pk}:{seconds}:{due_date.timestamp():.0f}',
+                    payload={'task_id': pk, 'due_date': due_date.isoformat()}, run_at=now,
+                )
+                for pk, _, due_date in rows
+            ])
+            scheduled += len(rows)
+    return scheduled
+
+
+def mark_overdue(now, batch_size, max_batches):
+    """
+    Marks open tasks which passed their due date as overdue, batch by batch
+    through a partial index of the tasks not marked yet, and enqueues an
+    overdue notice for those which became overdue within TASKS_SCHEDULER_LOOKBACK
+    (older ones, e.g. after a downtime, are only marked).
+    """
+    lookback = _setting('TASKS_SCHEDULER_LOOKBACK', timedelta(hours=1))
+    pending = Task.objects.filter(overdue_at__isnull=True, is_completed=False, due_date__lt=now, recurrence='')
+    marked = 0
+    for _ in range(max_batches):
+        with transaction.atomic():
+            rows = list(pending.order_by('due_date', 'id').values_list('pk', 'user_id', 'due_date')[:batch_size])
+            Task.objects.filter(pk__in=[pk for pk, _, _ in rows], overdue_at__isnull=True).update(overdue_at=now)
+            enqueue([
+                Job(
+                    kind='overdue', key=f'overdue:{pk}:{due_date.timestamp():.0f}',
+                    payload={'task_id': pk, 'due_date': due_date.isoformat()}, run_at=now,
+                )
+                for pk, _, due_date in rows if due_date >= now - lookback
+            ])
+            for user_id in {user_id for _, user_id, _ in rows}:
+                bump_generation_on_change(user_id)
+        marked += len(rows)
+        if len(rows) < batch_size:
+            break
+    return marked
+
+
+def expire_jobs(now, batch_size):
+    """Marks jobs running for longer than TASKS_JOB_TIMEOUT as lost (they are not retried) and purges old jobs."""
+    timeout = _setting('TASKS_JOB_TIMEOUT', timedelta(minutes=10))
+    lost = Job.objects.filter(status=Job.RUNNING, started_at__lt=now - timeout).update(status=Job.LOST)
+    retention = _setting('TASKS_JOB_RETENTION', timedelta(days=7))
+    old = Job.objects.filter(created_at__lt=now - retention).exclude(status__in=[Job.QUEUED, Job.RUNNING])
+    # Nothing references Job and no signal handlers are connected to it, so the private _raw_delete()
+    # (a single DELETE, which also returns the row count) is safe
+    purged = old.filter(pk__in=list(old.values_list('pk', flat=True)[:batch_size]))._raw_delete(old.db)
+    return lost, purged
+
+
+def tick(now=None):
+    """Runs one round of the scheduler, every step bounded by TASKS_SCHEDULER_BATCH_SIZE and _MAX_BATCHES."""
+    now = now or timezone.now()
+    batch_size = _setting('TASKS_SCHEDULER_BATCH_SIZE', 500)
+    max_batches = _setting('TASKS_SCHEDULER_MAX_BATCHES', 10)
+    lost, purged = expire_jobs(now, batch_size)
+    return {
+        'reminders': schedule_reminders(now, batch_size, max_batches),
+        'overdue': mark_overdue(now, batch_size, max_batches),
+        'lost': lost,
+        'purged': purged,
+    }
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+
+class Worker:
+    """
+    Claims and runs due jobs in a loop, also running the scheduler every
+    TASKS_SCHEDULER_INTERVAL. Any number of workers (threads or processes) can
+    share the queue: scheduling is idempotent and claims are exclusive.
+    """
+
+    def __init__(self, name=None, batch_size=None, poll_interval=None, scheduler=True):
+        self.name = name or worker_name()
+        self.batch_size = batch_size or _setting('TASKS_JOB_BATCH_SIZE', 100)
+        self.poll_interval = poll_interval if poll_interval is not None else _setting('TASKS_JOB_POLL_INTERVAL', 1.0)
+        self.scheduler = scheduler
+        self.stopped = threading.Event()
+        self.last_tick = None
+
+    def run_once(self, now=None):
+        """Runs the scheduler if it is due, then one batch of jobs. Returns the number of jobs claimed."""
+        now = now or timezone.now()
+        interval = _setting('TASKS_SCHEDULER_INTERVAL', timedelta(minutes=1))
+        if self.scheduler and (self.last_tick is None or now - self.last_tick >= interval):
+            self.last_tick = now
+            logger.info('Scheduler tick: %s', tick(now))
+        jobs = claim(self.name, self.batch_size, now)
+        run_jobs(jobs)
+        return len(jobs)
+
+    def run(self):
+        """Runs until stop() is called, sleeping only when the queue has no due jobs."""
+        while not self.stopped.is_set():
+            try:
+                claimed = self.run_once()
+            except Exception:
+                logger.exception('Worker %s failed to process the queue', self.name)
+                claimed = 0
+            finally:
+                close_old_connections()
+            if not claimed:
+                self.stopped.wait(self.poll_interval)
+
+    def stop(self):
+        self.stopped.set()
+
+
+def start_in_process_worker():
+    """Runs a worker in a daemon thread of the web server process, when TASKS_JOBS_IN_PROCESS is set."""
+    if not _setting('TASKS_JOBS_IN_PROCESS', False):
+        return None
+    worker = Worker()
+    threading.Thread(target=worker.run, name='tasks-job-worker', daemon=True).start()
+    return worker
+
+
+def _notify(task, subject, message):
+    """Emails the owner of the task, if they have an address."""
+    if not task.user.email:
+        logger.info('No address to notify %s of: %s', task.user, subject)
+        return
+    send_mail(subject, message, None, [task.user.email])
+
+
+def _current_task(payload):
+    """Returns the task of a notification job if it is still open and due when the job was scheduled, else None."""
+    task = Task.objects.select_related('user').filter(pk=payload['task_id'], is_completed=False).first()
+    if task is None or task.due_date != parse_datetime(payload['due_date']):
+        return None
+    return task
+
+
+@handler('reminder')
+def send_reminder(payload):
+    task = _current_task(payload)
+    if task is not None:
+        due_date = timezone.localtime(task.due_date)
+        _notify(task, f'Reminder: {task.title}', f'"{task.title}" is due on {due_date:%Y-%m-%d %H:%M}.')
+
+
+@handler('overdue')
+def send_overdue_notice(payload):
+    task = _current_task(payload)
+    if task is not None:
+        _notify(task, f'Overdue: {task.title}', f'"{task.title}" has passed its due date.')
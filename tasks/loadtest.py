@@ -0,0 +1,191 @@
+import asyncio
+import statistics
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+
+URLCONFS = {
+    'wsgi': 'todo_list.urls',
+    'asgi': 'todo_list.async_urls',
+}
+
+# A single request issued by a load test client, `anonymous` requests are sent without the session cookie
+LoadTestRequest = namedtuple('LoadTestRequest', ['method', 'url', 'data', 'anonymous'], defaults=[None, False])
+
+
+class LoadTestResult:
+    """Latencies (in seconds) and query counts of the requests issued during one load test run."""
+
+    def __init__(self, interface, latencies, elapsed, errors, queries=None):
+        self.interface = interface
+        self.latencies = sorted(latencies)
+        self.elapsed = elapsed
+        self.errors = errors
+        self.queries = queries
+
+    def percentile(self, percent):
+        if not self.latencies:
+            return 0.0
+        index = min(len(self.latencies) - 1, round(percent / 100 * (len(self.latencies) - 1)))
+        return self.latencies[index]
+
+    @property
+    def requests_per_second(self):
+        return len(self.latencies) / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        """Returns the summary of the run, latencies in milliseconds."""
+        summary = {
+            'interface': self.interface,
+            'requests': len(self.latencies),
+            'errors': self.errors,
+            'requests_per_second': round(self.requests_per_second, 2),
+            'latency_ms': {
+                'mean': round(statistics.fmean(self.latencies) * 1000, 3) if self.latencies else 0.0,
+                'p50': round(self.percentile(50) * 1000, 3),
+                'p95': round(self.percentile(95) * 1000, 3),
+                'p99': round(self.percentile(99) * 1000, 3),
+            },
+        }
+        if self.queries:
+            summary['queries_per_request'] = {
+                'mean': round(statistics.fmean(self.queries), 2),
+                'max': max(self.queries),
+            }
+        return summary
+
+
+class QueryCounter:
+    """Database execute wrapper counting the queries run by the current thread's connection."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def build_requests(task_ids, count):
+    """Returns `count` requests alternating between list loads and toggles."""
+    requests = []
+    for index in range(count):
+        if index % 2 == 0 or not task_ids:
+            requests.append(LoadTestRequest('get', reverse('tasks')))
+        else:
+            task_id = task_ids[index % len(task_ids)]
+            requests.append(LoadTestRequest('post', reverse('task-toggle-status', kwargs={'pk': task_id})))
+    return requests
+
+
+def _send(client, request):
+    """Issues the request with the test client (a coroutine for the async client)."""
+    if request.anonymous:
+        client.cookies.clear()
+    return getattr(client, request.method)(request.url, request.data or {})
+
+
+def drive_wsgi(users, request_lists):
+    """
+    Sends each list of requests from its own client (logged in as the matching
+    user) through the WSGI request handler, one thread per client. A single
+    client runs on the current thread.
+    """
+    with override_settings(ROOT_URLCONF=URLCONFS['wsgi'], ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+        clients = []
+        for user in users:
+            client = Client(raise_request_exception=False)
+            client.force_login(user)
+            clients.append(client)
+
+        def worker(index):
+            latencies, queries, errors = [], [], 0
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                for request in request_lists[index]:
+                    counter.count = 0
+                    start = time.perf_counter()
+                    response = _send(clients[index], request)
+                    latencies.append(time.perf_counter() - start)
+                    queries.append(counter.count)
+                    errors += response.status_code >= 400
+            return latencies, queries, errors
+
+        start = time.perf_counter()
+        if len(clients) == 1:
+            results = [worker(0)]
+        else:
+            with ThreadPoolExecutor(max_workers=len(clients)) as executor:
+                results = list(executor.map(worker, range(len(clients))))
+        elapsed = time.perf_counter() - start
+    return LoadTestResult(
+        'wsgi',
+        [latency for latencies, _, _ in results for latency in latencies],
+        elapsed,
+        sum(errors for _, _, errors in results),
+        [count for _, queries, _ in results for count in queries],
+    )
+
+
+def drive_asgi(users, request_lists):
+    """
+    Sends each list of requests from its own client through the ASGI request
+    handler, one coroutine per client. Queries run on worker threads and are
+    not counted.
+    """
+    with override_settings(ROOT_URLCONF=URLCONFS['asgi'], ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+        clients = []
+        for user in users:
+            client = AsyncClient(raise_request_exception=False)
+            client.force_login(user)
+            clients.append(client)
+
+        async def worker(index):
+            latencies, errors = [], 0
+            for request in request_lists[index]:
+                start = time.perf_counter()
+                response = await _send(clients[index], request)
+                latencies.append(time.perf_counter() - start)
+                errors += response.status_code >= 400
+            return latencies, errors
+
+        async def main():
+            return await asyncio.gather(*(worker(index) for index in range(len(clients))))
+
+        start = time.perf_counter()
+        results = asyncio.run(main())
+        elapsed = time.perf_counter() - start
+    return LoadTestResult(
+        'asgi', [latency for latencies, _ in results for latency in latencies], elapsed,
+        sum(errors for _, errors in results),
+    )
+
+
+DRIVERS = {
+    'wsgi': drive_wsgi,
+    'asgi': drive_asgi,
+}
+
+
+def run_wsgi(user, task_ids, count, concurrency):
+    """Drives the sync views with a mix of list loads and toggles from `concurrency` clients."""
+    requests = build_requests(task_ids, count)
+    return drive_wsgi([user] * concurrency, [requests[index::concurrency] for index in range(concurrency)])
+
+
+def run_asgi(user, task_ids, count, concurrency):
+    """Drives the async views with a mix of list loads and toggles from `concurrency` clients."""
+    requests = build_requests(task_ids, count)
+    return drive_asgi([user] * concurrency, [requests[index::concurrency] for index in range(concurrency)])
+
+
+RUNNERS = {
+    'wsgi': run_wsgi,
+    'asgi': run_asgi,
+}
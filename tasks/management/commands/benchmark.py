@@ -0,0 +1,45 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from tasks.benchmarks import SCENARIOS, run_benchmark
+
+
+class Command(BaseCommand):
+    """
+    Seeds users and tasks, drives the real URLconf with concurrent clients and
+    reports throughput, latency percentiles and queries per request as JSON,
+    so that results of different revisions can be compared.
+    """
+    help = 'Runs the benchmark scenarios against the app and prints a JSON report.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=4, help='Number of seeded users.')
+        parser.add_argument('--tasks', type=int, default=1000, help='Tasks seeded per user.')
+        parser.add_argument('--concurrency', type=int, default=4, help='Number of concurrent clients.')
+        parser.add_argument('--requests', type=int, default=25, help='Requests per client and scenario.')
+        parser.add_argument(
+            '--scenario', action='append', choices=SCENARIOS, dest='scenarios',
+            help='Scenario to run, can be repeated (default: all of them).'
+        )
+        parser.add_argument('--interface', choices=['wsgi', 'asgi'], default='wsgi')
+        parser.add_argument('--output', help='Write the report to this file instead of stdout.')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded users and tasks.')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--users and --concurrency must be at least 1.')
+        report = run_benchmark(
+            users=options['users'],
+            tasks_per_user=options['tasks'],
+            concurrency=options['concurrency'],
+            requests_per_client=options['requests'],
+            scenarios=options['scenarios'] or SCENARIOS,
+            interface=options['interface'],
+            keep=options['keep'],
+        )
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+            self.stderr.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,36 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from tasks.benchmarks import run_render_benchmark
+
+
+class Command(BaseCommand):
+    """
+    Seeds a user with many tasks and reports the time and memory needed to
+    load and render them as the task list does, once as model instances and
+    once as the column-pruned rows the list uses, as JSON.
+    """
+    help = 'Measures loading and rendering the task list rows and prints a JSON report.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Number of seeded and rendered tasks.')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed runs per variant (the best one is reported).')
+        parser.add_argument('--description-length', type=int, default=500, help='Length of the seeded descriptions.')
+        parser.add_argument('--output', help='Write the report to this file instead of stdout.')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded user and tasks.')
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1 or options['repeat'] < 1:
+            raise CommandError('--rows and --repeat must be at least 1.')
+        report = run_render_benchmark(
+            rows=options['rows'],
+            repeat=options['repeat'],
+            description_length=options['description_length'],
+            keep=options['keep'],
+        )
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+            self.stderr.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
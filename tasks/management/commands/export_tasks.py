@@ -0,0 +1,42 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from tasks.export import FORMATS, export_queryset, iter_export
+from tasks.models import DEADLINE_FILTERS, Task
+
+
+class Command(BaseCommand):
+    """
+    Streams the tasks of some (or all) users as CSV or JSON Lines, reading
+    them in chunks so that memory use stays constant for any table size.
+    """
+    help = 'Exports tasks as CSV or JSON Lines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', dest='usernames', help='Only export this user, can be repeated.')
+        parser.add_argument('--format', choices=list(FORMATS), default='csv', dest='file_format')
+        parser.add_argument('--due', choices=[*DEADLINE_FILTERS, 'none'], help='Only export tasks with this deadline.')
+        parser.add_argument('--search', help='Only export tasks matching every word, like the task list search.')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched per database round trip.')
+        parser.add_argument('--output', help='Write the export to this file instead of stdout.')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+        tasks = Task.objects.all()
+        user = None
+        if options['usernames']:
+            users = list(User.objects.filter(username__in=options['usernames']))
+            missing = set(options['usernames']) - {user.username for user in users}
+            if missing:
+                raise CommandError(f"Unknown user(s): {', '.join(sorted(missing))}")
+            tasks = tasks.filter(user__in=users)
+            user = users[0] if len(users) == 1 else None
+
+        tasks = export_queryset(tasks, due=options['due'], search=options['search'], user=user)
+        lines = iter_export(tasks, options['file_format'], include_user=True, chunk_size=options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as file:
+                file.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
@@ -0,0 +1,66 @@
+import json
+import os
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from tasks.imports import FORMATS, import_tasks
+from tasks.models import TaskImport
+
+
+class Command(BaseCommand):
+    """
+    Streams a CSV or JSON Lines file of tasks into the account of a user,
+    validating and inserting the rows in batches. Progress is committed with
+    every batch, so `--resume` continues an interrupted import of the same
+    file where it stopped.
+    """
+    help = 'Imports tasks for a user from a CSV or JSON Lines file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (with a header row) or JSON Lines file.')
+        parser.add_argument('--user', required=True, help='Username of the owner of the imported tasks.')
+        parser.add_argument('--format', choices=FORMATS, dest='file_format', help='Default: the file extension.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows validated and inserted per transaction.')
+        parser.add_argument('--resume', action='store_true', help='Continue the unfinished import of this file.')
+        parser.add_argument('--errors', help='Write the rejected rows to this JSON Lines file instead of stderr.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"Unknown user: {options['user']}")
+        file_format = options['file_format'] or os.path.splitext(options['path'])[1].lstrip('.').lower()
+        if file_format not in FORMATS:
+            raise CommandError('Cannot tell the format from the file extension, use --format.')
+        source = os.path.abspath(options['path'])[-255:]
+
+        task_import = None
+        if options['resume']:
+            task_import = TaskImport.objects.filter(
+                user=user, source=source, finished_at__isnull=True
+            ).order_by('-started_at').first()
+            if task_import is None:
+                raise CommandError(f'No unfinished import of {source} to resume.')
+        else:
+            task_import = TaskImport.objects.create(user=user, source=source, file_format=file_format)
+
+        errors_file = open(options['errors'], 'a', encoding='utf-8') if options['errors'] else None
+        try:
+            def on_error(row_number, errors):
+                line = json.dumps({'row': row_number, 'errors': errors})
+                if errors_file:
+                    errors_file.write(line + '\n')
+                else:
+                    self.stderr.write(line)
+
+            with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+                import_tasks(task_import, stream, batch_size=options['batch_size'], on_error=on_error)
+        finally:
+            if errors_file:
+                errors_file.close()
+
+        self.stdout.write(
+            f'Import {task_import.pk}: {task_import.processed_rows} rows processed, '
+            f'{task_import.created_count} tasks created, {task_import.error_count} rows rejected.'
+        )
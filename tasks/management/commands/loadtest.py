@@ -0,0 +1,43 @@
+import json
+from django.core.management.base import BaseCommand
+from tasks.benchmarks import remove_seeded, seed, unique_prefix
+from tasks.loadtest import RUNNERS
+from tasks.models import Task
+
+
+class Command(BaseCommand):
+    """
+    Compares the WSGI (sync views) and ASGI (async views) request paths by
+    driving both in-process with concurrent clients.
+    """
+    help = 'Compares requests/second and latency percentiles of the WSGI and ASGI request paths.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interface', choices=['wsgi', 'asgi', 'both'], default='both')
+        parser.add_argument('--requests', type=int, default=500, help='Requests issued per interface.')
+        parser.add_argument('--concurrency', type=int, default=10, help='Number of concurrent clients.')
+        parser.add_argument('--tasks', type=int, default=100, help='Tasks created for the load test user.')
+        parser.add_argument('--json', action='store_true', help='Print the results as JSON.')
+
+    def handle(self, *args, **options):
+        user, = seed(1, options['tasks'], prefix=unique_prefix('loadtest'))
+        try:
+            task_ids = list(Task.objects.filter(user=user).values_list('pk', flat=True))
+            interfaces = ['wsgi', 'asgi'] if options['interface'] == 'both' else [options['interface']]
+            results = [
+                RUNNERS[interface](user, task_ids, options['requests'], options['concurrency']).as_dict()
+                for interface in interfaces
+            ]
+        finally:
+            remove_seeded([user])
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for result in results:
+            latency = result['latency_ms']
+            self.stdout.write(
+                f"{result['interface'].upper()}: {result['requests_per_second']} req/s, "
+                f"p50 {latency['p50']} ms, p95 {latency['p95']} ms, p99 {latency['p99']} ms, "
+                f"{result['errors']} errors"
+            )
@@ -0,0 +1,29 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from tasks.models import TaskCounter, TaskDailyStats
+
+
+class Command(BaseCommand):
+    """
+    Recomputes the task counters and daily statistics rollups from the Task
+    table, one user at a time with the tasks read in batches, e.g. after
+    bulk imports or to repair drift.
+    """
+    help = 'Rebuilds the per-user task counters and daily statistics from the Task table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users', help='Only rebuild this user id.')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows read and written per batch.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        users = User.objects.order_by('pk')
+        if options['users']:
+            users = users.filter(pk__in=options['users'])
+        rebuilt = 0
+        for user_id in users.values_list('pk', flat=True).iterator(chunk_size=options['batch_size']):
+            TaskCounter.rebuild(user_id)
+            TaskDailyStats.rebuild(user_id, batch_size=options['batch_size'])
+            rebuilt += 1
+        self.stdout.write(f'Rebuilt statistics of {rebuilt} user(s).')
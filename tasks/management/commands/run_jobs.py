@@ -0,0 +1,38 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from tasks.jobs import Worker, stats
+
+
+class Command(BaseCommand):
+    """
+    Runs a worker of the database-backed job queue: scans the due dates for
+    reminders and overdue tasks and runs the queued jobs. Any number of
+    workers can run side by side, each job is run by one of them at most.
+    """
+    help = 'Runs the scheduler and the queued background jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run one scheduler tick and all due jobs, then exit.')
+        parser.add_argument('--batch-size', type=int, help='Jobs claimed per round trip.')
+        parser.add_argument('--poll-interval', type=float, help='Seconds to wait when no job is due.')
+        parser.add_argument('--no-scheduler', action='store_false', dest='scheduler', help='Only run queued jobs.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] is not None and options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        worker = Worker(
+            batch_size=options['batch_size'], poll_interval=options['poll_interval'], scheduler=options['scheduler']
+        )
+        start = time.perf_counter()
+        if options['once']:
+            while worker.run_once():
+                pass
+        else:
+            self.stderr.write(f'Worker {worker.name} started.')
+            try:
+                worker.run()
+            except KeyboardInterrupt:
+                worker.stop()
+        elapsed = time.perf_counter() - start
+        finished = sum(stats.finished.values())
+        self.stdout.write(f'Ran {finished} job(s) in {elapsed:.1f} s ({finished / elapsed if elapsed else 0:.1f} jobs/s).')
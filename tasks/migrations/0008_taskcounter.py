@@ -0,0 +1,28 @@
+# Generated by Django 4.2.17 on 2026-10-18 16:38
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('tasks', '0007_task_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+                ('incompleted_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Task counter',
+                'verbose_name_plural': 'Task counters',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    from tasks.search import install_search_index
+    install_search_index(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    from tasks.search import uninstall_search_index
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    """Creates the SQLite FTS5 search index over task titles and descriptions (no-op on other backends)."""
+
+    dependencies = [
+        ('tasks', '0008_taskcounter'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.17 on 2026-10-18 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_task_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'due_date', 'id'], name='task_user_due_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.17 on 2026-10-18 17:09
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0010_task_due_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='completion_date',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='TaskDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('created_count', models.IntegerField(default=0)),
+                ('completed_count', models.IntegerField(default=0)),
+                ('completion_seconds', models.BigIntegerField(default=0)),
+                ('due_open_count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Daily task statistics',
+                'verbose_name_plural': 'Daily task statistics',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='taskdailystats',
+            constraint=models.UniqueConstraint(fields=('user', 'date'), name='task_daily_stats_user_date_unique'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.17 on 2026-10-18 17:50
+
+from django.db import migrations, models
+import tasks.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0013_task_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='completed_occurrences',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='recurrence',
+            field=models.CharField(blank=True, default='', max_length=200, validators=[tasks.models.validate_recurrence]),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.17 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0015_jobs'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_completed', True)), fields=['-creation_date', '-id'], name='task_completed_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_completed', False)), fields=['-creation_date', '-id'], name='task_open_created_idx'),
+        ),
+    ]
@@ -1,7 +1,13 @@
-from django.db import models
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, models, transaction
+from datetime import timedelta
+from django.db.models import Case, CharField, Count, DateTimeField, DurationField, ExpressionWrapper, F, Q, Value, When
+from django.db.models.query import ValuesListIterable
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import User
 from django.utils import timezone
+from .recurrence import InvalidRule, Rule
+from .stats import STATE_FIELDS, contributions, task_state
 
 
 def validate_due_date(date):
@@ -10,6 +16,162 @@ def validate_due_date(date):
         raise ValidationError('Due date cannot be in the past.')
 
 
+def validate_recurrence(rule):
+    """Validator to ensure the recurrence is a supported rule (see tasks.recurrence.Rule)."""
+    if rule:
+        try:
+            Rule.parse(rule)
+        except InvalidRule:
+            raise ValidationError('Enter daily, weekdays, weekly, monthly, yearly or a valid RRULE.', code='invalid')
+
+
+# Upper bounds of the deadline buckets, relative to now (tasks due later fall into the 'far' bucket)
+DEADLINE_BUCKETS = [
+    ('overdue', timedelta(0)),
+    ('soon', timedelta(hours=24)),
+    ('medium', timedelta(days=7)),
+]
+
+# Due date filters offered on the task list: (lower bound, upper bound) relative to now, None for unbounded
+DEADLINE_FILTERS = {
+    'overdue': (None, timedelta(0)),
+    'today': (timedelta(0), timedelta(hours=24)),
+    'week': (timedelta(0), timedelta(days=7)),
+    'later': (timedelta(days=7), None),
+}
+
+
+# Columns read for a row of the task list; the description is only loaded by the update view
+ROW_FIELDS = ('id', 'title', 'is_completed', 'creation_date', 'due_date', 'recurrence')
+
+
+class TaskRow:
+    """
+    Lightweight, read-only task of the task list, built from a values_list()
+    row instead of a model instance. Attributes which were not selected (e.g.
+    the description, or the deadline annotations) are None.
+    """
+    __slots__ = ROW_FIELDS + (
+        'description', 'completion_date', 'completed_occurrences', 'time_left', 'deadline_bucket', 'title_highlight',
+        'snippet',
+    )
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            setattr(self, name, values.get(name))
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __eq__(self, other):
+        """Rows are equal to other rows and to the Task instances with the same primary key."""
+        if not isinstance(other, (TaskRow, Task)):
+            return NotImplemented
+        return self.pk is not None and self.pk == other.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __str__(self):
+        return self.title
+
+    def __repr__(self):
+        return f'<TaskRow: {self.id}>'
+
+
+class TaskRowIterable(ValuesListIterable):
+    """Iterable returned by TaskQuerySet.rows() that yields a TaskRow for each row."""
+
+    def __iter__(self):
+        queryset = self.queryset
+        # values_list() rows hold the selected fields followed by any later annotations
+        fields = queryset._fields
+        names = [*fields, *(name for name in queryset.query.annotation_select if name not in fields)]
+        for values in super().__iter__():
+            yield TaskRow(**dict(zip(names, values)))
+
+
+class TaskQuerySet(models.QuerySet):
+    """Custom queryset with task-specific aggregations."""
+
+    def with_deadline(self, now=None):
+        """
+        Annotates each task with the time left until its due date (`time_left`)
+        and its urgency bucket (`deadline_bucket`: overdue, soon, medium or far,
+        None without a due date), both computed by the database.
+        """
+        now = now or timezone.now()
+        return self.annotate(
+            time_left=ExpressionWrapper(
+                F('due_date') - Value(now, output_field=DateTimeField()), output_field=DurationField()
+            ),
+            deadline_bucket=Case(
+                When(due_date__isnull=True, then=Value(None)),
+                *(When(due_date__lt=now + bound, then=Value(bucket)) for bucket, bound in DEADLINE_BUCKETS),
+                default=Value('far'),
+                output_field=CharField(),
+            ),
+        )
+
+    def due(self, name, now=None):
+        """
+        Filters the tasks by one of the DEADLINE_FILTERS ('none' for tasks without
+        a due date) with plain range conditions, so an index on due_date can be used.
+        """
+        if name == 'none':
+            return self.filter(due_date__isnull=True)
+        now = now or timezone.now()
+        lower, upper = DEADLINE_FILTERS[name]
+        conditions = {}
+        if lower is not None:
+            conditions['due_date__gte'] = now + lower
+        if upper is not None:
+            conditions['due_date__lt'] = now + upper
+        return self.filter(**conditions)
+
+    def rows(self, *fields):
+        """
+        Returns the tasks as TaskRow objects holding only the list columns
+        (ROW_FIELDS), the given extra fields and the deadline annotations, if any.
+        """
+        annotations = [name for name in self.query.annotations if name in TaskRow.__slots__]
+        queryset = self.values_list(*ROW_FIELDS, *fields, *annotations)
+        queryset._iterable_class = TaskRowIterable
+        return queryset
+
+    def counts(self):
+        """Returns completed and incompleted task counts using a single conditional aggregate."""
+        return self.aggregate(
+            completed_count=Count('pk', filter=Q(is_completed=True)),
+            incompleted_count=Count('pk', filter=Q(is_completed=False)),
+        )
+
+    def delete_in_bulk(self):
+        """
+        Deletes the tasks with a single DELETE statement and returns their counts.
+        Unlike delete(), no per-row signals are sent, so the caller is responsible
+        for their side effects (see tasks.signals.tasks_changed_in_bulk).
+        """
+        counts = self.counts()
+        # QuerySet.delete() would load every task to send the post_delete signals. The
+        # private _raw_delete() is safe here: no model references Task, so there is
+        # nothing to cascade to, and the signal handlers' work is left to the caller.
+        self._raw_delete(self.db)
+        return counts
+
+    def stats_states(self):
+        """Returns the statistics-relevant state of the tasks (see tasks.stats.STATE_FIELDS)."""
+        return self.order_by().values_list(*STATE_FIELDS)
+
+    async def acounts(self):
+        """Asynchronous version of counts()."""
+        return await self.aaggregate(
+            completed_count=Count('pk', filter=Q(is_completed=True)),
+            incompleted_count=Count('pk', filter=Q(is_completed=False)),
+        )
+
+
 class Task(models.Model):
     """Model representing a task associated with a user."""
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -18,15 +180,308 @@ class Task(models.Model):
     is_completed = models.BooleanField(default=False)
     creation_date = models.DateTimeField(auto_now_add=True)
     due_date = models.DateTimeField(null=True, blank=True, validators=[validate_due_date])
+    completion_date = models.DateTimeField(null=True, blank=True, editable=False)
+    # Recurrence rule, with due_date as the first occurrence (see tasks.recurrence)
+    recurrence = models.CharField(max_length=200, blank=True, default='', validators=[validate_recurrence])
+    # Bitmap of the completed occurrences: bit i is set once occurrence i has been completed
+    completed_occurrences = models.BinaryField(default=b'', editable=False)
+    # Set by the scheduler (see tasks.jobs) when the open task passes its due date
+    overdue_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = TaskQuerySet.as_manager()
 
     class Meta:
         """Meta options for the Task model."""
         ordering = ['-creation_date']  # Default ordering: Newest tasks first
         verbose_name = "Task"  # Name displayed in the admin interface
         verbose_name_plural = "Tasks"
+        indexes = [
+            # Task list and keyset pagination: WHERE user_id = ? ORDER BY creation_date DESC, id DESC
+            models.Index(fields=['user', '-creation_date', '-id'], name='task_user_created_idx'),
+            # Completed/incompleted counters: WHERE user_id = ? AND is_completed = ?
+            models.Index(fields=['user', 'is_completed'], name='task_user_completed_idx'),
+            # Deadline filters and the list sorted by urgency: WHERE user_id = ? AND due_date < ? ORDER BY due_date, id
+            models.Index(fields=['user', 'due_date', 'id'], name='task_user_due_idx'),
+            # Admin changelist of all users' tasks: ORDER BY creation_date DESC, id DESC
+            models.Index(fields=['-creation_date', '-id'], name='task_created_idx'),
+            # Admin status filter: WHERE [NOT] is_completed ORDER BY creation_date DESC, id DESC. Partial
+            # indexes, as SQLite can't search an index for the bare boolean column Django filters with
+            models.Index(
+                fields=['-creation_date', '-id'], name='task_completed_created_idx', condition=Q(is_completed=True),
+            ),
+            models.Index(
+                fields=['-creation_date', '-id'], name='task_open_created_idx', condition=Q(is_completed=False),
+            ),
+            # Admin deadline filter: WHERE due_date >= ? AND due_date < ?, and the reminder scan
+            models.Index(fields=['due_date'], name='task_due_idx'),
+            # Overdue sweep: open tasks not marked overdue yet, in due date order
+            models.Index(
+                fields=['due_date', 'id'], name='task_overdue_pending_idx',
+                condition=Q(overdue_at__isnull=True, is_completed=False, due_date__isnull=False),
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remembers the loaded completion status and statistics state so that saves can detect a change."""
+        instance = super().from_db(db, field_names, values)
+        if 'is_completed' in field_names:
+            instance._loaded_is_completed = instance.is_completed
+        if all(field in field_names for field in STATE_FIELDS):
+            instance._loaded_state = task_state(instance)
+        if 'recurrence' in field_names and 'due_date' in field_names:
+            instance._loaded_schedule = (instance.recurrence, instance.due_date)
+        return instance
+
+    def clean(self):
+        """Requires a due date, the first occurrence, for recurring tasks."""
+        if self.recurrence and self.due_date is None:
+            raise ValidationError({'due_date': 'Recurring tasks need a due date, the date of their first occurrence.'})
+
+    def update_completion_date(self, now=None):
+        """Stamps the completion date when the task gets completed, clearing it when it's reopened."""
+        if not self.is_completed:
+            self.completion_date = None
+        elif self.completion_date is None:
+            self.completion_date = now or timezone.now()
+
+    def reset_schedule_state(self):
+        """
+        Clears the state tied to the loaded due date and recurrence once they
+        changed, and returns the names of the cleared fields.
+        """
+        schedule = (self.recurrence, self.due_date)
+        loaded_schedule = getattr(self, '_loaded_schedule', schedule)
+        reset = []
+        # Occurrence indexes are only meaningful for the schedule they were completed in
+        if loaded_schedule != schedule and self.completed_occurrences:
+            self.completed_occurrences = b''
+            reset.append('completed_occurrences')
+        # A new due date may not have passed yet
+        if loaded_schedule[1] != self.due_date and self.overdue_at is not None:
+            self.overdue_at = None
+            reset.append('overdue_at')
+        return reset
+
+    def save(self, *args, **kwargs):
+        """Saves the task and its dependent counters and statistics in one transaction."""
+        self.update_completion_date()
+        reset = self.reset_schedule_state()
+        if reset and kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], *reset}
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+        self._loaded_is_completed = self.is_completed
+        self._loaded_state = task_state(self)
+        self._loaded_schedule = (self.recurrence, self.due_date)
 
     def __str__(self):
         """String representation of the task model."""
         return self.title
-     
 
+
+class TaskCounter(models.Model):
+    """Denormalized per-user task counters, kept up to date by task signals."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='task_counter')
+    completed_count = models.PositiveIntegerField(default=0)
+    incompleted_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        """Meta options for the TaskCounter model."""
+        verbose_name = "Task counter"
+        verbose_name_plural = "Task counters"
+
+    @classmethod
+    def rebuild(cls, user_id):
+        """Recomputes the counters of the user from the Task table."""
+        # In a transaction the tasks are read from the primary, not a lagging replica
+        with transaction.atomic():
+            counts = Task.objects.filter(user_id=user_id).counts()
+            counter, _ = cls.objects.update_or_create(user_id=user_id, defaults=counts)
+        return counter
+
+    @classmethod
+    def apply_delta(cls, user_id, completed=0, incompleted=0):
+        """
+        Atomically shifts the counters of the user. A missing row is left alone,
+        it will be built from the Task table on the next read.
+        """
+        cls.objects.filter(user_id=user_id).update(
+            completed_count=F('completed_count') + completed,
+            incompleted_count=F('incompleted_count') + incompleted,
+        )
+
+    @classmethod
+    def get_counts(cls, user_id):
+        """Returns the counters of the user as a dict, building the row on first use."""
+        counter = cls.objects.filter(user_id=user_id).first() or cls.rebuild(user_id)
+        return {'completed_count': counter.completed_count, 'incompleted_count': counter.incompleted_count}
+
+    @classmethod
+    async def aget_counts(cls, user_id):
+        """Asynchronous version of get_counts()."""
+        counter = await cls.objects.filter(user_id=user_id).afirst()
+        if counter is None:
+            return await sync_to_async(cls.get_counts)(user_id)
+        return {'completed_count': counter.completed_count, 'incompleted_count': counter.incompleted_count}
+
+    def __str__(self):
+        """String representation of the task counter model."""
+        return f'{self.user}: {self.incompleted_count} incompleted, {self.completed_count} completed'
+
+
+class TaskDailyStats(models.Model):
+    """
+    Per-user, per-day rollup of the task statistics (see tasks.stats),
+    maintained incrementally by task signals and bulk operations.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='task_daily_stats')
+    date = models.DateField()
+    created_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    completion_seconds = models.BigIntegerField(default=0)
+    due_open_count = models.IntegerField(default=0)
+
+    class Meta:
+        """Meta options for the TaskDailyStats model."""
+        verbose_name = "Daily task statistics"
+        verbose_name_plural = "Daily task statistics"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='task_daily_stats_user_date_unique'),
+        ]
+
+    @classmethod
+    def rebuild(cls, user_id, batch_size=2000):
+        """Recomputes the rollups of the user, reading the Task table (on the primary) in batches."""
+        with transaction.atomic():
+            states = Task.objects.filter(user_id=user_id).stats_states().iterator(chunk_size=batch_size)
+            days = contributions(states)
+            cls.objects.filter(user_id=user_id).delete()
+            cls.objects.bulk_create(
+                (cls(user_id=user_id, date=day, **values) for day, values in days.items()), batch_size=batch_size
+            )
+        return len(days)
+
+    @classmethod
+    def apply_delta(cls, user_id, delta):
+        """
+        Atomically shifts the rollups of the user by a tasks.stats.stats_delta().
+        Nothing is written for users without rollups yet, they are built from the
+        Task table on the next read.
+        """
+        has_rows = None
+        for day, values in delta.items():
+            changes = {field: F(field) + value for field, value in values.items()}
+            if cls.objects.filter(user_id=user_id, date=day).update(**changes):
+                continue
+            if has_rows is None:
+                has_rows = cls.objects.filter(user_id=user_id).exists()
+            if has_rows:
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(user_id=user_id, date=day, **values)
+                except IntegrityError:
+                    # Another request created the row in the meantime
+                    cls.objects.filter(user_id=user_id, date=day).update(**changes)
+
+    @classmethod
+    def ensure_built(cls, user_id):
+        """Builds the rollups of the user on first use."""
+        if not cls.objects.filter(user_id=user_id).exists():
+            cls.rebuild(user_id)
+
+    @classmethod
+    def summary(cls, user_id, days=30, today=None):
+        """
+        Returns the totals of the user and the rollup rows of the last `days` days,
+        reading only the rollups. Overdue tasks are the incomplete ones due before today.
+        """
+        cls.ensure_built(user_id)
+        today = today or timezone.localdate()
+        rows = cls.objects.filter(user_id=user_id)
+        totals = rows.aggregate(
+            completed=models.Sum('completed_count'),
+            completion_seconds=models.Sum('completion_seconds'),
+            overdue=models.Sum('due_open_count', filter=Q(date__lt=today)),
+        )
+        completed = totals['completed'] or 0
+        return {
+            'overdue_count': totals['overdue'] or 0,
+            'average_completion_seconds': (totals['completion_seconds'] or 0) / completed if completed else None,
+            'days': list(rows.filter(date__gt=today - timedelta(days=days), date__lte=today).order_by('date')),
+        }
+
+    def __str__(self):
+        """String representation of the daily task statistics model."""
+        return f'{self.user} on {self.date}: {self.created_count} created, {self.completed_count} completed'
+
+
+class TaskImport(models.Model):
+    """
+    Progress of a bulk import (see tasks.imports). The processed row count is
+    committed together with each inserted batch, so an interrupted import can
+    be resumed from where it stopped.
+    """
+    FORMAT_CHOICES = [('csv', 'CSV'), ('jsonl', 'JSON Lines')]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='task_imports')
+    source = models.CharField(max_length=255)
+    file_format = models.CharField(max_length=5, choices=FORMAT_CHOICES)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    processed_rows = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        """Meta options for the TaskImport model."""
+        verbose_name = "Task import"
+        verbose_name_plural = "Task imports"
+
+    @property
+    def is_finished(self):
+        return self.finished_at is not None
+
+    def __str__(self):
+        """String representation of the task import model."""
+        return f'{self.source} ({self.processed_rows} rows, {self.created_count} created)'
+
+
+class Job(models.Model):
+    """
+    Unit of work of the database-backed job queue (see tasks.jobs). A job is
+    claimed by exactly one worker, moving it from queued to running, and is
+    never queued again, so it runs at most once. Jobs with the same `key` are
+    only enqueued once.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    # Running for longer than TASKS_JOB_TIMEOUT, its worker presumably died
+    LOST = 'lost'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed'), (LOST, 'Lost')]
+
+    kind = models.CharField(max_length=50)
+    key = models.CharField(max_length=200, unique=True, null=True, blank=True)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    run_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_by = models.CharField(max_length=100, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        """Meta options for the Job model."""
+        verbose_name = "Job"
+        verbose_name_plural = "Jobs"
+        indexes = [
+            # Claiming: WHERE status = 'queued' AND run_at <= ? ORDER BY run_at, id
+            models.Index(fields=['status', 'run_at', 'id'], name='job_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        """String representation of the job model."""
+        return f'{self.kind} #{self.pk} ({self.status})'
@@ -0,0 +1,141 @@
+import base64
+import json
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(ValueError):
+    """Raised when a page token cannot be decoded."""
+
+
+def encode_cursor(direction, value, pk):
+    """Encodes a position in the list (a datetime key, possibly None, and the id) as an opaque, URL-safe page token."""
+    payload = json.dumps([direction, value.isoformat() if value is not None else None, pk], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Decodes a page token into a (direction, value, pk) tuple."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, raw_value, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value = parse_datetime(raw_value) if raw_value is not None else None
+    except (ValueError, TypeError):
+        raise InvalidCursor(token)
+    if direction not in ('next', 'previous') or (value is None and raw_value is not None) or not isinstance(pk, int):
+        raise InvalidCursor(token)
+    return direction, value, pk
+
+
+class KeysetPage:
+    """A single page of results together with the tokens of its neighbours."""
+
+    def __init__(self, object_list, next_token=None, previous_token=None):
+        self.object_list = object_list
+        self.next_token = next_token
+        self.previous_token = previous_token
+
+    @property
+    def has_next(self):
+        return self.next_token is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_token is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Paginates a queryset by the (field, id) key instead of OFFSET, so fetching
+    any page costs the same as fetching the first one. The list is ordered by
+    (creation_date, id) descending by default. Rows with a NULL key (allowed
+    for nullable fields) come last.
+    """
+
+    def __init__(self, queryset, page_size, field='creation_date', descending=True):
+        self.queryset = queryset
+        self.page_size = page_size
+        self.field = field
+        self.descending = descending
+        self.nullable = queryset.model._meta.get_field(field).null
+
+    def get_page(self, token=None):
+        """Returns the page identified by the token (the first page if it is missing or invalid)."""
+        direction, queryset = self._get_queryset(token)
+        return self._make_page(direction, list(queryset[:self.page_size + 1]))
+
+    async def aget_page(self, token=None):
+        """Asynchronous version of get_page()."""
+        direction, queryset = self._get_queryset(token)
+        return self._make_page(direction, [row async for row in queryset[:self.page_size + 1]])
+
+    def _get_queryset(self, token):
+        """Returns the direction of the token and the queryset fetching the rows after it."""
+        try:
+            direction, value, pk = decode_cursor(token) if token else (None, None, None)
+        except InvalidCursor:
+            direction = None
+        if direction is not None and value is None and not self.nullable:
+            direction = None
+
+        queryset = self.queryset
+        if direction == 'previous':
+            # Walks backwards from the first row of the current page
+            queryset = queryset.filter(self._before(value, pk)).order_by(*self._ordering(reverse=True))
+        else:
+            if direction == 'next':
+                queryset = queryset.filter(self._after(value, pk))
+            queryset = queryset.order_by(*self._ordering())
+        return direction, queryset
+
+    def _ordering(self, reverse=False):
+        """Returns the order_by() arguments of the list, or of the list read backwards."""
+        descending = self.descending != reverse
+        if not self.nullable:
+            prefix = '-' if descending else ''
+            return [f'{prefix}{self.field}', f'{prefix}id']
+        order = F(self.field).desc if descending else F(self.field).asc
+        nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+        return [order(**nulls), '-id' if descending else 'id']
+
+    def _after(self, value, pk):
+        """Returns the condition matching the rows which come after (value, pk) in the list."""
+        beyond = 'lt' if self.descending else 'gt'
+        if value is None:
+            return Q(**{f'{self.field}__isnull': True, f'pk__{beyond}': pk})
+        condition = Q(**{f'{self.field}__{beyond}': value}) | Q(**{self.field: value, f'pk__{beyond}': pk})
+        if self.nullable:
+            condition |= Q(**{f'{self.field}__isnull': True})
+        return condition
+
+    def _before(self, value, pk):
+        """Returns the condition matching the rows which come before (value, pk) in the list."""
+        before = 'gt' if self.descending else 'lt'
+        if value is None:
+            return Q(**{f'{self.field}__isnull': False}) | Q(**{f'{self.field}__isnull': True, f'pk__{before}': pk})
+        return Q(**{f'{self.field}__{before}': value}) | Q(**{self.field: value, f'pk__{before}': pk})
+
+    def _make_page(self, direction, rows):
+        """Builds the page from the fetched rows (one extra row tells whether there is anything beyond it)."""
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if direction == 'previous':
+            rows.reverse()
+
+        has_next = has_more if direction != 'previous' else True
+        has_previous = has_more if direction == 'previous' else direction == 'next'
+        if not rows:
+            return KeysetPage(rows)
+
+        first, last = rows[0], rows[-1]
+        return KeysetPage(
+            rows,
+            next_token=encode_cursor('next', getattr(last, self.field), last.pk) if has_next else None,
+            previous_token=encode_cursor('previous', getattr(first, self.field), first.pk) if has_previous else None,
+        )
@@ -0,0 +1,217 @@
+import calendar
+import heapq
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import islice, takewhile
+from django.utils import timezone
+
+
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY')
+WEEKDAYS = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+
+# Rules which can be entered by name instead of as an RRULE
+SHORTHANDS = {
+    'daily': 'FREQ=DAILY',
+    'weekdays': 'FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR',
+    'weekly': 'FREQ=WEEKLY',
+    'monthly': 'FREQ=MONTHLY',
+    'yearly': 'FREQ=YEARLY',
+}
+
+
+class InvalidRule(ValueError):
+    """Raised when a recurrence rule cannot be parsed."""
+
+
+class Rule:
+    """
+    Recurrence rule: a subset of the iCalendar RRULE (FREQ, INTERVAL, BYDAY
+    for weekly rules, COUNT and UNTIL) or one of the SHORTHANDS. Occurrences
+    keep the local wall-clock time of the first one across DST changes; monthly
+    and yearly rules fall back to the last day of months which are too short.
+    """
+    __slots__ = ('frequency', 'interval', 'weekdays', 'count', 'until')
+
+    def __init__(self, frequency, interval=1, weekdays=(), count=None, until=None):
+        self.frequency = frequency
+        self.interval = interval
+        self.weekdays = tuple(sorted(set(weekdays)))
+        self.count = count
+        self.until = until
+
+    @classmethod
+    def parse(cls, text):
+        """Parses a rule, e.g. 'weekly' or 'FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH;COUNT=10'."""
+        text = SHORTHANDS.get(text.strip().lower(), text.strip())
+        if text.upper().startswith('RRULE:'):
+            text = text[6:]
+        parts = {}
+        for part in filter(None, text.upper().split(';')):
+            name, _, value = part.partition('=')
+            if not value or name in parts:
+                raise InvalidRule(text)
+            parts[name] = value
+
+        frequency = parts.pop('FREQ', None)
+        count, byday, until = parts.pop('COUNT', None), parts.pop('BYDAY', None), parts.pop('UNTIL', None)
+        try:
+            interval = int(parts.pop('INTERVAL', 1))
+            count = int(count) if count is not None else None
+            weekdays = [WEEKDAYS.index(day) for day in byday.split(',')] if byday else ()
+            until = cls._parse_until(until) if until is not None else None
+        except ValueError:
+            raise InvalidRule(text)
+        if (
+            parts or frequency not in FREQUENCIES or interval < 1 or (count is not None and count < 1)
+            or (weekdays and frequency != 'WEEKLY') or (count is not None and until is not None)
+        ):
+            raise InvalidRule(text)
+        return cls(frequency, interval, weekdays, count, until)
+
+    @staticmethod
+    def _parse_until(value):
+        """Parses an UNTIL date (the end of that local day) or UTC date-time (YYYYMMDDTHHMMSSZ)."""
+        if len(value) == 8:
+            end = datetime.strptime(value, '%Y%m%d') + timedelta(days=1, microseconds=-1)
+            return timezone.make_aware(end)
+        return datetime.strptime(value, '%Y%m%dT%H%M%SZ').replace(tzinfo=dt_timezone.utc)
+
+    def __str__(self):
+        """Returns the rule as a normalized RRULE."""
+        parts = [f'FREQ={self.frequency}']
+        if self.interval != 1:
+            parts.append(f'INTERVAL={self.interval}')
+        if self.weekdays:
+            parts.append('BYDAY=' + ','.join(WEEKDAYS[day] for day in self.weekdays))
+        if self.count is not None:
+            parts.append(f'COUNT={self.count}')
+        if self.until is not None:
+            parts.append(f'UNTIL={self.until.astimezone(dt_timezone.utc):%Y%m%dT%H%M%SZ}')
+        return ';'.join(parts)
+
+    def _per_period(self):
+        """Returns the number of occurrences of every period (day, week, month or year) after the first one."""
+        return len(self.weekdays) or 1
+
+    def _period(self, base, number):
+        """Returns the (naive, local) occurrences of the given period, the first one starting at `base`."""
+        if self.frequency == 'DAILY':
+            return [base + timedelta(days=number * self.interval)]
+        if self.frequency == 'WEEKLY':
+            if not self.weekdays:
+                return [base + timedelta(weeks=number * self.interval)]
+            monday = base - timedelta(days=base.weekday())
+            days = [monday + timedelta(days=number * self.interval * 7 + day) for day in self.weekdays]
+            return [day for day in days if day >= base] if number == 0 else days
+        months = number * self.interval * (12 if self.frequency == 'YEARLY' else 1)
+        year, month = divmod(base.year * 12 + base.month - 1 + months, 12)
+        day = min(base.day, calendar.monthrange(year, month + 1)[1])
+        return [base.replace(year=year, month=month + 1, day=day)]
+
+    def _period_of(self, base, moment):
+        """Returns the number of the period (possibly negative) the naive local moment falls into."""
+        if self.frequency == 'DAILY':
+            return (moment.date() - base.date()).days // self.interval
+        if self.frequency == 'WEEKLY':
+            monday = base.date() - timedelta(days=base.weekday())
+            return (moment.date() - timedelta(days=moment.weekday()) - monday).days // 7 // self.interval
+        months = (moment.year - base.year) * 12 + moment.month - base.month
+        return months // (self.interval * (12 if self.frequency == 'YEARLY' else 1))
+
+    def occurrences(self, start, after=None):
+        """
+        Lazily yields the (index, date) pairs of the occurrences of a series
+        starting at `start`, from the first one at or after `after`. Periods
+        before `after` are skipped arithmetically, so a window far from the
+        start costs as much as one near it.
+        """
+        base = timezone.localtime(start).replace(tzinfo=None)
+        first_count = len(self._period(base, 0))
+        number = 0
+        if after is not None and after > start:
+            number = max(0, self._period_of(base, timezone.localtime(after).replace(tzinfo=None)))
+        index = 0 if number == 0 else first_count + (number - 1) * self._per_period()
+
+        while True:
+            for moment in self._period(base, number):
+                if self.count is not None and index >= self.count:
+                    return
+                date = timezone.make_aware(moment)
+                if self.until is not None and date > self.until:
+                    return
+                if after is None or date >= after:
+                    yield index, date
+                index += 1
+            number += 1
+
+    def occurrence(self, start, index):
+        """Returns the date of the occurrence with the given index, None if the series has no such occurrence."""
+        base = timezone.localtime(start).replace(tzinfo=None)
+        first = self._period(base, 0)
+        if index < 0 or (self.count is not None and index >= self.count):
+            return None
+        if index < len(first):
+            moment = first[index]
+        else:
+            number, position = divmod(index - len(first), self._per_period())
+            moment = self._period(base, number + 1)[position]
+        date = timezone.make_aware(moment)
+        return date if self.until is None or date <= self.until else None
+
+
+def is_done(bitmap, index):
+    """Tells whether bit `index` of the completed occurrences bitmap is set."""
+    byte = index >> 3
+    return byte < len(bitmap) and bool(bitmap[byte] >> (index & 7) & 1)
+
+
+def toggle_done(bitmap, index):
+    """Returns the bitmap with bit `index` flipped, without trailing zero bytes."""
+    bitmap = bytearray(bitmap)
+    byte = index >> 3
+    if byte >= len(bitmap):
+        bitmap.extend(bytes(byte + 1 - len(bitmap)))
+    bitmap[byte] ^= 1 << (index & 7)
+    return bytes(bitmap).rstrip(b'\0')
+
+
+def occurrence_window(days, now=None):
+    """Returns the [start, end) window of the occurrences shown: from the start of today to `days` days later."""
+    start = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+    return start, start + timedelta(days=days)
+
+
+class Occurrence:
+    """One occurrence of a recurring task, generated on demand rather than stored."""
+    __slots__ = ('task', 'index', 'due_date', 'is_completed')
+
+    def __init__(self, task, index, due_date, is_completed):
+        self.task = task
+        self.index = index
+        self.due_date = due_date
+        self.is_completed = is_completed
+
+    def __repr__(self):
+        return f'<Occurrence: {self.task.pk}#{self.index}>'
+
+
+def task_occurrences(task, after, before):
+    """
+    Lazily yields the occurrences of a recurring task (anything with `recurrence`,
+    `due_date` and `completed_occurrences`, e.g. a TaskRow) in [after, before).
+    """
+    if not task.recurrence or task.due_date is None:
+        return iter(())
+    bitmap = bytes(task.completed_occurrences or b'')
+    pairs = takewhile(lambda pair: pair[1] < before, Rule.parse(task.recurrence).occurrences(task.due_date, after))
+    return (Occurrence(task, index, date, is_done(bitmap, index)) for index, date in pairs)
+
+
+def upcoming_occurrences(tasks, after, before, limit=None):
+    """
+    Materializes the occurrences of the given recurring tasks in [after, before),
+    soonest first, by merging their lazy per-task generators. Nothing is read from
+    the database, so the tasks (and their completion bitmaps) can be loaded in a
+    single query.
+    """
+    merged = heapq.merge(*(task_occurrences(task, after, before) for task in tasks), key=lambda item: item.due_date)
+    return list(islice(merged, limit))
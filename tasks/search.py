@@ -0,0 +1,183 @@
+import re
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+
+FTS_TABLE = 'tasks_task_fts'
+
+# Private-use characters marking matches, replaced with <mark> tags once the text is escaped
+MARK_START, MARK_END = '\ue000', '\ue001'
+
+FTS_TRIGGERS = {
+    f'{FTS_TABLE}_ai': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON tasks_task BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, title, description, user_id)
+            VALUES (new.id, new.title, new.description, new.user_id);
+        END""",
+    f'{FTS_TABLE}_ad': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON tasks_task BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, user_id)
+            VALUES ('delete', old.id, old.title, old.description, old.user_id);
+        END""",
+    f'{FTS_TABLE}_au': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description, user_id ON tasks_task BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, user_id)
+            VALUES ('delete', old.id, old.title, old.description, old.user_id);
+            INSERT INTO {FTS_TABLE}(rowid, title, description, user_id)
+            VALUES (new.id, new.title, new.description, new.user_id);
+        END""",
+}
+
+_available = set()
+
+
+def fts5_supported(connection):
+    """Checks whether the connection is SQLite compiled with the FTS5 extension."""
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return any(option == 'ENABLE_FTS5' for option, in cursor.fetchall())
+
+
+def install_search_index(connection):
+    """
+    Creates the FTS5 index over task titles and descriptions together with the
+    triggers keeping it in sync. Safe to call repeatedly: the index is only
+    rebuilt when it or one of its triggers was missing (e.g. after SQLite
+    remade the tasks_task table during a migration).
+    """
+    if not fts5_supported(connection):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE name LIKE %s", [f'{FTS_TABLE}%'])
+        existing = {name for name, in cursor.fetchall()}
+        if {FTS_TABLE, *FTS_TRIGGERS} <= existing:
+            return True
+        # The owner id is indexed so that a user's matches are found by intersecting posting lists
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"title, description, user_id, content='tasks_task', content_rowid='id', prefix='2 3')"
+        )
+        for sql in FTS_TRIGGERS.values():
+            cursor.execute(sql)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return True
+
+
+def uninstall_search_index(connection):
+    """Drops the FTS5 index and its triggers."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name in FTS_TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    _available.discard(connection.alias)
+
+
+def search_index_available(connection):
+    """Checks whether the FTS5 index exists on the given connection."""
+    if connection.alias in _available:
+        return True
+    if connection.vendor != 'sqlite':
+        return False
+    if FTS_TABLE in connection.introspection.table_names():
+        _available.add(connection.alias)
+        return True
+    return False
+
+
+def tokenize(query):
+    """Splits the search input into words."""
+    return re.findall(r'\w+', query)
+
+
+def build_match_expression(user_id, query):
+    """Builds an FTS5 MATCH expression requiring every word (as a prefix) and the task owner, if given."""
+    words = ' AND '.join(f'{{title description}} : "{word}"*' for word in tokenize(query))
+    if not words or user_id is None:
+        return words or None
+    return f'user_id : "{int(user_id)}" AND {words}'
+
+
+def _highlight(text):
+    """Escapes the text and turns the match markers into <mark> tags."""
+    html = escape(text).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+    return mark_safe(html)
+
+
+def _filter_words(queryset, words):
+    """Substring search used on databases without FTS5: every word must occur in the title or description."""
+    for word in words:
+        queryset = queryset.filter(Q(title__icontains=word) | Q(description__icontains=word))
+    return queryset
+
+
+def _fallback_search(queryset, words, limit):
+    """Returns the newest substring matches, without highlights."""
+    tasks = list(_filter_words(queryset, words).order_by('-creation_date', '-id')[:limit])
+    for task in tasks:
+        task.title_highlight = None
+        task.snippet = None
+    return tasks
+
+
+def search_tasks(queryset, user, query, limit):
+    """
+    Returns up to `limit` tasks of the user matching every word of the query,
+    most relevant first. Each task gets `title_highlight` and `snippet`
+    attributes with the matched words wrapped in <mark> tags. The filters of
+    the queryset (e.g. a due date filter) are part of the ranked query, so they
+    are applied before the limit.
+    """
+    words = tokenize(query)
+    if not words:
+        return []
+    queryset = queryset.filter(user=user)
+    connection = connections[queryset.db]
+    if not search_index_available(connection):
+        return _fallback_search(queryset, words, limit)
+
+    candidates, params = queryset.order_by().values('pk').query.get_compiler(connection=connection).as_sql()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, highlight({FTS_TABLE}, 0, %s, %s), snippet({FTS_TABLE}, 1, %s, %s, '…', 12) "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid IN ({candidates}) "
+            f"ORDER BY bm25({FTS_TABLE}, 10.0, 1.0, 0.0) LIMIT %s",
+            [MARK_START, MARK_END, MARK_START, MARK_END, build_match_expression(user.pk, query), *params, limit],
+        )
+        hits = cursor.fetchall()
+
+    tasks = queryset.in_bulk([pk for pk, _, _ in hits])
+    results = []
+    for pk, title, snippet in hits:
+        task = tasks.get(pk)
+        if task is None:
+            continue
+        task.title_highlight = _highlight(title)
+        task.snippet = _highlight(snippet) if snippet and MARK_START in snippet else None
+        results.append(task)
+    return results
+
+
+def filter_tasks(queryset, query, user=None):
+    """
+    Restricts the queryset to the tasks (of the user, if given) matching every
+    word of the query, like search_tasks() but unranked and unlimited, so the
+    result can be further filtered, ordered and iterated lazily.
+    """
+    words = tokenize(query)
+    if not words:
+        return queryset.none()
+    if user is not None:
+        queryset = queryset.filter(user=user)
+    if not search_index_available(connections[queryset.db]):
+        return _filter_words(queryset, words)
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        [build_match_expression(user.pk if user is not None else None, query)],
+    ))
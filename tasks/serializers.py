@@ -0,0 +1,11 @@
+def serialize_task(task):
+    """Returns a JSON-serializable representation of a task."""
+    return {
+        'id': task.pk,
+        'title': task.title,
+        'description': task.description,
+        'is_completed': task.is_completed,
+        'creation_date': task.creation_date.isoformat() if task.creation_date else None,
+        'due_date': task.due_date.isoformat() if task.due_date else None,
+        'recurrence': task.recurrence,
+    }
@@ -0,0 +1,97 @@
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .cache import bump_generation_on_change
+from .events import publish_reset, publish_tasks
+from .models import Task, TaskCounter, TaskDailyStats
+from .search import install_search_index
+from .stats import stats_delta, task_state
+
+
+SEARCH_INDEX_MIGRATION = '0009_task_search_index'
+
+
+def _status_delta(is_completed, sign):
+    """Returns counter keyword arguments adding (or removing) one task of the given status."""
+    return {'completed': sign} if is_completed else {'incompleted': sign}
+
+
+@receiver(post_save, sender=Task)
+def update_counter_on_save(sender, instance, created, raw=False, **kwargs):
+    """Keeps the denormalized counters and the cached list in sync with created and re-saved tasks."""
+    if raw:
+        return
+    bump_generation_on_change(instance.user_id)
+    previous_state = getattr(instance, '_loaded_state', None)
+    if created or previous_state is not None:
+        before = [previous_state] if not created else []
+        TaskDailyStats.apply_delta(instance.user_id, stats_delta(before, [task_state(instance)]))
+    if created:
+        TaskCounter.apply_delta(instance.user_id, **_status_delta(instance.is_completed, 1))
+        return
+    previous = getattr(instance, '_loaded_is_completed', None)
+    if previous is not None and previous != instance.is_completed:
+        delta = _status_delta(instance.is_completed, 1)
+        delta.update(_status_delta(previous, -1))
+        TaskCounter.apply_delta(instance.user_id, **delta)
+
+
+@receiver(post_delete, sender=Task)
+def update_counter_on_delete(sender, instance, **kwargs):
+    """Keeps the denormalized counters and the cached list in sync with deleted tasks."""
+    bump_generation_on_change(instance.user_id)
+    TaskCounter.apply_delta(instance.user_id, **_status_delta(instance.is_completed, -1))
+    TaskDailyStats.apply_delta(instance.user_id, stats_delta([task_state(instance)]))
+
+
+@receiver(post_save, sender=Task)
+def publish_on_save(sender, instance, created, raw=False, **kwargs):
+    """Streams created and saved tasks to the open lists of their user."""
+    if raw:
+        return
+    previous = getattr(instance, '_loaded_is_completed', None)
+    toggled = previous is not None and previous != instance.is_completed
+    publish_tasks(instance.user_id, 'created' if created else 'toggled' if toggled else 'updated', [instance.pk])
+
+
+@receiver(post_delete, sender=Task)
+def publish_on_delete(sender, instance, **kwargs):
+    publish_tasks(instance.user_id, 'deleted', [instance.pk])
+
+
+def tasks_changed_in_bulk(user_id, completed=0, incompleted=0, stats=None):
+    """
+    Applies the side effects of the handlers above for bulk operations
+    (bulk_create, bulk_update, QuerySet.update), which send no signals.
+    `stats` is the tasks.stats.stats_delta() of the changed tasks.
+    """
+    bump_generation_on_change(user_id)
+    if completed or incompleted:
+        TaskCounter.apply_delta(user_id, completed=completed, incompleted=incompleted)
+    if stats:
+        TaskDailyStats.apply_delta(user_id, stats)
+
+
+def tasks_reset_in_bulk(user_ids):
+    """
+    Side effects of bulk operations over the tasks of many users (e.g. admin
+    actions): instead of computing per-user deltas, the counters and rollups
+    of the users are dropped and rebuilt from the Task table on their next read,
+    and their open task lists are told to reload.
+    """
+    publish_reset(user_ids)
+    for user_id in user_ids:
+        bump_generation_on_change(user_id)
+    TaskCounter.objects.filter(user_id__in=user_ids).delete()
+    TaskDailyStats.objects.filter(user_id__in=user_ids).delete()
+
+
+def ensure_search_index(sender, using, **kwargs):
+    """
+    Re-creates the search index triggers if a migration remade the tasks_task
+    table (SQLite drops triggers together with the table they belong to).
+    """
+    connection = connections[using]
+    if ('tasks', SEARCH_INDEX_MIGRATION) in MigrationRecorder(connection).applied_migrations():
+        install_search_index(connection)
@@ -0,0 +1,48 @@
+from collections import defaultdict
+from django.utils import timezone
+
+
+# Task fields the daily statistics are computed from
+STATE_FIELDS = ('creation_date', 'is_completed', 'completion_date', 'due_date')
+
+# Columns of the daily rollup rows
+STAT_FIELDS = ('created_count', 'completed_count', 'completion_seconds', 'due_open_count')
+
+
+def task_state(task):
+    """Returns the statistics-relevant state of a task instance, in STATE_FIELDS order."""
+    return tuple(getattr(task, field) for field in STATE_FIELDS)
+
+
+def contributions(states):
+    """
+    Returns what the tasks in the given states add to the daily rollups, as a
+    {date: {stat field: value}} mapping. Days are local dates:
+    - created_count and due_open_count count tasks by their creation day and
+      by the due day of the incomplete ones,
+    - completed_count and completion_seconds count the completed tasks (and
+      their time from creation to completion) by their completion day.
+    """
+    days = defaultdict(lambda: dict.fromkeys(STAT_FIELDS, 0))
+    for creation_date, is_completed, completion_date, due_date in states:
+        days[timezone.localdate(creation_date)]['created_count'] += 1
+        if is_completed and completion_date is not None:
+            day = days[timezone.localdate(completion_date)]
+            day['completed_count'] += 1
+            day['completion_seconds'] += max(0, round((completion_date - creation_date).total_seconds()))
+        elif not is_completed and due_date is not None:
+            days[timezone.localdate(due_date)]['due_open_count'] += 1
+    return days
+
+
+def stats_delta(before=(), after=()):
+    """Returns the change of the rollups when tasks move from the `before` to the `after` states."""
+    delta = defaultdict(dict)
+    for sign, days in ((-1, contributions(before)), (1, contributions(after))):
+        for day, values in days.items():
+            for field, value in values.items():
+                delta[day][field] = delta[day].get(field, 0) + sign * value
+    return {
+        day: {field: value for field, value in values.items() if value}
+        for day, values in delta.items() if any(values.values())
+    }
@@ -0,0 +1,127 @@
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from tasks.admin import EstimatedCountPaginator, estimated_count
+from tasks.models import Task, TaskCounter
+
+
+class TestTaskAdmin(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(username='admin', password='adminpass')
+        self.alice = User.objects.create_user(username='alice', password='alicepass')
+        self.bob = User.objects.create_user(username='bob', password='bobpass')
+        self.alice_task = Task.objects.create(user=self.alice, title='Buy milk')
+        self.bob_task = Task.objects.create(
+            user=self.bob, title='Pay bills', due_date=timezone.now() + timedelta(hours=2)
+        )
+        self.url = reverse('admin:tasks_task_changelist')
+        self.client.force_login(self.admin)
+
+    def titles(self, response):
+        return sorted(task.title for task in response.context['cl'].result_list)
+
+    def action(self, action, tasks, **data):
+        return self.client.post(self.url, {'action': action, '_selected_action': [task.pk for task in tasks], **data})
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Owners should be joined, not loaded per row."""
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(self.url)
+        Task.objects.bulk_create(Task(user=user, title='More') for user in [self.alice, self.bob] * 10)
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(self.url)
+        self.assertEqual(len(many), len(few))
+
+    def test_search(self):
+        self.assertEqual(self.titles(self.client.get(self.url, {'q': 'milk'})), ['Buy milk'])
+        self.assertEqual(self.titles(self.client.get(self.url, {'q': 'user:bob'})), ['Pay bills'])
+
+    def test_deadline_filter(self):
+        self.assertEqual(self.titles(self.client.get(self.url, {'due': 'today'})), ['Pay bills'])
+        self.assertEqual(self.titles(self.client.get(self.url, {'due': 'none'})), ['Buy milk'])
+
+    def test_complete_action(self):
+        """Completing should be one UPDATE of the tasks, after which the counters are rebuilt correctly."""
+        TaskCounter.rebuild(self.alice.pk)
+        with CaptureQueriesContext(connection) as captured:
+            self.action('complete_tasks', [self.alice_task, self.bob_task])
+        updates = [query for query in captured if query['sql'].startswith('UPDATE "tasks_task" ')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(Task.objects.filter(is_completed=True).count(), 2)
+        self.assertIsNotNone(Task.objects.get(pk=self.alice_task.pk).completion_date)
+        self.assertEqual(TaskCounter.get_counts(self.alice.pk), {'completed_count': 1, 'incompleted_count': 0})
+
+    def test_reassign_action(self):
+        response = self.action('reassign_tasks', [self.alice_task])
+        self.assertTemplateUsed(response, 'admin/tasks/task/reassign.html')
+        self.assertContains(response, '1 selected task')
+        self.action('reassign_tasks', [self.alice_task], apply='1', user=self.bob.pk)
+        self.assertEqual(Task.objects.get(pk=self.alice_task.pk).user, self.bob)
+        self.assertEqual(TaskCounter.get_counts(self.bob.pk)['incompleted_count'], 2)
+
+    def test_purge_action(self):
+        with CaptureQueriesContext(connection) as captured:
+            self.action('purge_tasks', [self.alice_task, self.bob_task])
+        deletes = [query for query in captured if query['sql'].startswith('DELETE FROM "tasks_task" ')]
+        self.assertEqual(len(deletes), 1)
+        self.assertFalse(Task.objects.exists())
+        self.assertNotIn('delete_selected', self.client.get(self.url).context['action_form'].fields['action'].choices)
+
+
+@override_settings(TASKS_ADMIN_EXACT_COUNT_LIMIT=1)
+class TestEstimatedCountPaginator(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='testuser', password='testpass')
+        Task.objects.bulk_create(Task(user=user, title=f'Task {i}') for i in range(5))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE tasks_task')
+        Task.objects.bulk_create(Task(user=user, title=f'Task {i}', is_completed=True) for i in range(5, 8))
+
+    def test_unfiltered_uses_statistics(self):
+        """The count should come from the statistics gathered by ANALYZE, not COUNT(*)."""
+        with CaptureQueriesContext(connection) as captured:
+            count = EstimatedCountPaginator(Task.objects.all(), 10).count
+        self.assertEqual(count, 5)
+        self.assertFalse([query for query in captured if 'COUNT(' in query['sql']])
+
+    def test_partial_index_statistics_ignored(self):
+        """The overdue sweep's partial index only covers some rows, so its statistics aren't the table's size."""
+        Task.objects.filter(pk__in=Task.objects.order_by('pk')[:1]).update(due_date=timezone.now())
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE tasks_task')
+            # Put the partial index's row first, where an unordered lookup would find it
+            cursor.execute("SELECT tbl, idx, stat FROM sqlite_stat1 WHERE tbl = 'tasks_task' "
+                           "ORDER BY idx = 'task_overdue_pending_idx' DESC")
+            rows = cursor.fetchall()
+            cursor.execute("DELETE FROM sqlite_stat1 WHERE tbl = 'tasks_task'")
+            cursor.executemany('INSERT INTO sqlite_stat1 (tbl, idx, stat) VALUES (%s, %s, %s)', rows)
+        self.assertEqual(rows[0][1:], ('task_overdue_pending_idx', '1 1 1'))
+        self.assertEqual(estimated_count(Task.objects.all()), 8)
+
+    @override_settings(TASKS_ADMIN_EXACT_COUNT_LIMIT=5)
+    def test_filtered_counts_exactly(self):
+        self.assertEqual(EstimatedCountPaginator(Task.objects.filter(is_completed=True), 10).count, 3)
+
+    @override_settings(TASKS_ADMIN_EXACT_COUNT_LIMIT=2)
+    def test_filtered_count_capped(self):
+        """Filtered counts should stop one row past the limit instead of counting every match."""
+        paginator = EstimatedCountPaginator(Task.objects.filter(is_completed=True), 1)
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(paginator.count, 3)
+        self.assertIn('LIMIT 3', captured[0]['sql'])
+        self.assertTrue(paginator.count_capped)
+        admin = User.objects.create_superuser(username='admin', password='adminpass')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin:tasks_task_changelist'), {'is_completed__exact': '1'})
+        self.assertContains(response, 'More than 2 Tasks')
+
+    @override_settings(TASKS_ADMIN_EXACT_COUNT_LIMIT=100)
+    def test_small_tables_count_exactly(self):
+        self.assertEqual(EstimatedCountPaginator(Task.objects.all(), 10).count, 8)
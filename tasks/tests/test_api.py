@@ -0,0 +1,170 @@
+import json
+from unittest import mock
+from django.db.models.query import QuerySet
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.utils import timezone
+from datetime import timedelta
+from tasks.models import Task, TaskCounter
+
+
+class TaskApiTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.other_user = User.objects.create_user(username='otheruser', password='otherpass')
+        self.client.login(username='testuser', password='testpass')
+
+    def post_json(self, url_name, data):
+        return self.client.post(reverse(url_name), json.dumps(data), content_type='application/json')
+
+
+class TestTaskApiList(TaskApiTestCase):
+    def test_requires_login(self):
+        """Anonymous requests should get a 401 JSON response instead of a redirect."""
+        self.client.logout()
+        response = self.client.get(reverse('api-tasks'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_lists_only_own_tasks(self):
+        task = Task.objects.create(user=self.user, title='Mine')
+        Task.objects.create(user=self.other_user, title='Not mine')
+        data = self.client.get(reverse('api-tasks')).json()
+        self.assertEqual([item['id'] for item in data['tasks']], [task.pk])
+
+
+class TestTaskApiBulkCreate(TaskApiTestCase):
+    def test_bulk_create(self):
+        """Valid items should be created in one batch and reported per item."""
+        TaskCounter.rebuild(self.user.pk)
+        due_date = (timezone.now() + timedelta(days=1)).isoformat()
+        response = self.post_json('api-tasks', {'tasks': [
+            {'title': 'First', 'due_date': due_date},
+            {'title': 'Second', 'description': 'Details'},
+        ]})
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual(data['created'], 2)
+        self.assertEqual([result['status'] for result in data['results']], ['created', 'created'])
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(TaskCounter.get_counts(self.user.pk)['incompleted_count'], 2)
+
+    def test_bulk_create_reports_invalid_items(self):
+        """Invalid items should be reported with form errors while valid ones are created."""
+        past = (timezone.now() - timedelta(days=1)).isoformat()
+        response = self.post_json('api-tasks', {'tasks': [
+            {'title': ''},
+            {'title': 'Late', 'due_date': past},
+            'not an object',
+            {'title': 'Fine'},
+        ]})
+        data = response.json()
+        self.assertEqual(data['created'], 1)
+        statuses = [result['status'] for result in data['results']]
+        self.assertEqual(statuses, ['error', 'error', 'error', 'created'])
+        self.assertIn('title', data['results'][0]['errors'])
+        self.assertIn('due_date', data['results'][1]['errors'])
+        self.assertEqual(list(Task.objects.values_list('title', flat=True)), ['Fine'])
+
+    def test_malformed_body(self):
+        response = self.client.post(reverse('api-tasks'), 'nope', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        response = self.post_json('api-tasks', {'items': []})
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_size_limit(self):
+        with self.settings(TASKS_API_MAX_BATCH=2):
+            response = self.post_json('api-tasks', {'tasks': [{'title': 'Task'}] * 3})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Task.objects.exists())
+
+
+class TestTaskApiBulkUpdate(TaskApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.task1 = Task.objects.create(user=self.user, title='One')
+        self.task2 = Task.objects.create(user=self.user, title='Two', description='Keep me')
+        self.other_task = Task.objects.create(user=self.other_user, title='Other')
+
+    def test_bulk_update(self):
+        """Only the fields sent should change, and the counters should follow status changes."""
+        TaskCounter.rebuild(self.user.pk)
+        response = self.post_json('api-tasks-bulk-update', {'tasks': [
+            {'id': self.task1.pk, 'is_completed': True},
+            {'id': self.task2.pk, 'title': 'Two renamed'},
+        ]})
+        data = response.json()
+        self.assertEqual(data['updated'], 2)
+        self.task1.refresh_from_db()
+        self.task2.refresh_from_db()
+        self.assertTrue(self.task1.is_completed)
+        self.assertEqual(self.task1.title, 'One')
+        self.assertEqual(self.task2.title, 'Two renamed')
+        self.assertEqual(self.task2.description, 'Keep me')
+        self.assertEqual(TaskCounter.get_counts(self.user.pk), {'completed_count': 1, 'incompleted_count': 1})
+
+    def test_bulk_update_locks_tasks(self):
+        """The tasks should be read with SELECT ... FOR UPDATE, so that a concurrent write can't make the deltas stale."""
+        in_bulk = QuerySet.in_bulk
+        locked = []
+
+        def record_lock(queryset, *args, **kwargs):
+            locked.append(queryset.query.select_for_update)
+            return in_bulk(queryset, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, 'in_bulk', autospec=True, side_effect=record_lock):
+            self.post_json('api-tasks-bulk-update', {'tasks': [{'id': self.task1.pk, 'is_completed': True}]})
+        self.assertEqual(locked, [True])
+
+    def test_bulk_update_errors_and_ownership(self):
+        """Invalid items and other users' tasks should be reported and left untouched."""
+        response = self.post_json('api-tasks-bulk-update', {'tasks': [
+            {'id': self.task1.pk, 'title': ''},
+            {'id': self.other_task.pk, 'title': 'Hijacked'},
+            {'id': self.task2.pk},
+        ]})
+        data = response.json()
+        self.assertEqual(data['updated'], 0)
+        self.assertEqual([result['status'] for result in data['results']], ['error', 'not_found', 'error'])
+        self.other_task.refresh_from_db()
+        self.assertEqual(self.other_task.title, 'Other')
+
+    def test_bulk_update_rejects_boolean_and_duplicate_ids(self):
+        """`true` is not the id 1, and a task sent twice is only updated by its first item."""
+        first, _ = Task.objects.update_or_create(pk=1, defaults={'user': self.user, 'title': 'First'})
+        response = self.post_json('api-tasks-bulk-update', {'tasks': [
+            {'id': True, 'title': 'Not an id'},
+            {'id': self.task2.pk, 'title': 'Renamed'},
+            {'id': self.task2.pk, 'title': ''},
+        ]})
+        data = response.json()
+        self.assertEqual([result['status'] for result in data['results']], ['not_found', 'updated', 'error'])
+        self.assertEqual(data['results'][2]['errors']['id'][0]['code'], 'duplicate')
+        self.task2.refresh_from_db()
+        self.assertEqual(self.task2.title, 'Renamed')
+        first.refresh_from_db()
+        self.assertEqual(first.title, 'First')
+
+
+class TestTaskApiBulkDelete(TaskApiTestCase):
+    def test_bulk_delete(self):
+        """Only the user's own tasks should be deleted."""
+        task1 = Task.objects.create(user=self.user, title='One')
+        task2 = Task.objects.create(user=self.user, title='Two', is_completed=True)
+        keep = Task.objects.create(user=self.user, title='Keep')
+        other_task = Task.objects.create(user=self.other_user, title='Other')
+        TaskCounter.rebuild(self.user.pk)
+
+        response = self.post_json('api-tasks-bulk-delete', {'ids': [task1.pk, task2.pk, other_task.pk]})
+        data = response.json()
+        self.assertEqual(data['deleted'], 2)
+        self.assertEqual([result['status'] for result in data['results']], ['deleted', 'deleted', 'not_found'])
+        self.assertEqual(list(Task.objects.filter(user=self.user)), [keep])
+        self.assertTrue(Task.objects.filter(pk=other_task.pk).exists())
+        self.assertEqual(TaskCounter.get_counts(self.user.pk), {'completed_count': 0, 'incompleted_count': 1})
+
+    def test_bulk_delete_rejects_boolean_ids(self):
+        task, _ = Task.objects.update_or_create(pk=1, defaults={'user': self.user, 'title': 'One'})
+        response = self.post_json('api-tasks-bulk-delete', {'ids': [True]})
+        self.assertEqual(response.json()['results'], [{'index': 0, 'id': True, 'status': 'not_found'}])
+        self.assertTrue(Task.objects.filter(pk=task.pk).exists())
@@ -0,0 +1,122 @@
+import asyncio
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.urls import reverse, resolve
+from django.contrib.auth.models import User
+from django.utils import timezone
+from tasks.models import Task
+from tasks.async_views import AsyncTaskExportView, AsyncTaskListView, AsyncTaskToggleStatusView
+
+
+@override_settings(ROOT_URLCONF='todo_list.async_urls')
+class TestAsyncTaskViews(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.task = Task.objects.create(user=self.user, title='Async task')
+        self.other_task = Task.objects.create(
+            user=User.objects.create_user(username='otheruser', password='otherpass'), title='Other task'
+        )
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+
+    def test_urls_resolve_to_async_views(self):
+        self.assertEqual(resolve(reverse('tasks')).func.view_class, AsyncTaskListView)
+        self.assertEqual(
+            resolve(reverse('task-toggle-status', args=[1])).func.view_class, AsyncTaskToggleStatusView
+        )
+
+    def test_list_requires_login(self):
+        self.client.logout()
+        response = self.client.get(reverse('tasks'))
+        self.assertRedirects(response, f"{reverse('login')}?next={reverse('tasks')}")
+
+    async def test_list_view(self):
+        """The async list should show the user's tasks and counters."""
+        response = await self.async_client.get(reverse('tasks'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Async task')
+        self.assertNotContains(response, 'Other task')
+        self.assertEqual(response.context['incompleted_count'], 1)
+
+    async def test_list_view_occurrences(self):
+        """Occurrences of recurring tasks should be materialized by the async list as well."""
+        await Task.objects.acreate(user=self.user, title='Daily chore', due_date=timezone.now(), recurrence='FREQ=DAILY')
+        response = await self.async_client.get(reverse('tasks'))
+        self.assertTrue(response.context['occurrences'])
+        self.assertContains(response, 'Coming up')
+
+    @override_settings(TASKS_FRAGMENT_CACHE='default')
+    async def test_list_view_cache_off_event_loop(self):
+        """The fragment cache should be read and written through the async cache API, not on the event loop."""
+        on_loop = []
+
+        def off_loop(method):
+            def wrapper(*args, **kwargs):
+                on_loop.append(asyncio._get_running_loop() is not None)
+                return method(*args, **kwargs)
+            return wrapper
+
+        with mock.patch.multiple(
+            cache, get=off_loop(cache.get), set=off_loop(cache.set), add=off_loop(cache.add),
+        ):
+            for _ in range(2):
+                response = await self.async_client.get(reverse('tasks'))
+                self.assertContains(response, 'Async task')
+        self.assertTrue(on_loop)
+        self.assertNotIn(True, on_loop)
+
+    def test_list_view_search(self):
+        response = self.client.get(reverse('tasks'), {'search-area': 'async'})
+        self.assertEqual(list(response.context['tasks']), [self.task])
+
+    def test_create_view(self):
+        response = self.client.post(reverse('task-create'), {'title': 'Created async'})
+        self.assertRedirects(response, reverse('tasks'))
+        self.assertTrue(Task.objects.filter(user=self.user, title='Created async').exists())
+        response = self.client.post(reverse('task-create'), {'title': ''})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'tasks/task_form.html')
+
+    def test_update_view(self):
+        url = reverse('task-update', kwargs={'pk': self.task.pk})
+        self.assertEqual(self.client.get(url).context['form'].instance, self.task)
+        self.assertRedirects(self.client.post(url, {'title': 'Updated async'}), reverse('tasks'))
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, 'Updated async')
+        url = reverse('task-update', kwargs={'pk': self.other_task.pk})
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_toggle_view(self):
+        url = reverse('task-toggle-status', kwargs={'pk': self.task.pk})
+        self.assertRedirects(self.client.post(url), reverse('tasks'))
+        self.task.refresh_from_db()
+        self.assertTrue(self.task.is_completed)
+        self.assertEqual(self.client.post(f'{url}?format=json').json()['is_completed'], False)
+        response = self.client.post(url, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertContains(response, f'id="task-{self.task.pk}"')
+        self.assertContains(response, 'id="task-summary"')
+        url = reverse('task-toggle-status', kwargs={'pk': self.other_task.pk})
+        self.assertEqual(self.client.post(url).status_code, 404)
+
+    @override_settings(TASKS_EXPORT_CHUNK_SIZE=1)
+    async def test_export_view(self):
+        """Under ASGI the export should be streamed by an async iterator, not buffered whole."""
+        self.assertEqual(resolve(reverse('task-export')).func.view_class, AsyncTaskExportView)
+        await Task.objects.acreate(user=self.user, title='Second')
+        response = await self.async_client.get(reverse('task-export'), {'format': 'jsonl'})
+        self.assertTrue(response.is_async)
+        lines = [line async for line in response.streaming_content]
+        self.assertEqual(len(lines), 2)
+        self.assertIn(b'"title": "Async task"', lines[0])
+        response = await self.async_client.get(reverse('task-export'), {'format': 'jsonl', 'search-area': 'second'})
+        self.assertEqual(len([line async for line in response.streaming_content]), 1)
+        response = await self.async_client.get(reverse('task-export'), {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_delete_view(self):
+        url = reverse('task-delete', kwargs={'pk': self.task.pk})
+        self.assertTemplateUsed(self.client.get(url), 'tasks/task_confirm_delete.html')
+        self.assertRedirects(self.client.post(url), reverse('tasks'))
+        self.assertFalse(Task.objects.filter(pk=self.task.pk).exists())
@@ -0,0 +1,74 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from tasks.benchmarks import (
+    RENDER_VARIANTS, SCENARIOS, build_scenario, remove_seeded, run_benchmark, run_render_benchmark, seed,
+)
+from tasks.models import Task
+
+
+class TestBenchmarkSeed(TestCase):
+    def test_seed(self):
+        """Seeding should create the users with their tasks."""
+        users = seed(2, 3, prefix='seeded')
+        self.assertEqual([user.username for user in users], ['seeded-0', 'seeded-1'])
+        self.assertEqual(Task.objects.filter(user__in=users).count(), 6)
+
+    def test_delete_scenario_splits_tasks_between_clients(self):
+        """Clients sharing a user should never delete the same task."""
+        user, = seed(1, 4)
+        request_lists = build_scenario('delete', [user, user], 10)
+        urls = [request.url for requests in request_lists for request in requests]
+        self.assertEqual(len(urls), 4)
+        self.assertEqual(len(set(urls)), 4)
+
+    def test_remove_seeded(self):
+        """Seeded tasks should be deleted in bulk rather than one by one through the user cascade."""
+        users = seed(2, 50)
+        with CaptureQueriesContext(connection) as queries:
+            remove_seeded(users)
+        self.assertLess(len(queries), 30)
+        self.assertFalse(Task.objects.exists())
+        self.assertFalse(User.objects.filter(username__startswith='benchmark-').exists())
+
+
+class TestRunBenchmark(TestCase):
+    def test_report(self):
+        """Every scenario should be reported with throughput, latency and query counts."""
+        report = run_benchmark(users=1, tasks_per_user=5, concurrency=1, requests_per_client=2)
+        self.assertEqual(list(report['scenarios']), SCENARIOS)
+        for name, result in report['scenarios'].items():
+            self.assertEqual(result['requests'], 2, name)
+            self.assertEqual(result['errors'], 0, name)
+            self.assertGreater(result['requests_per_second'], 0, name)
+            self.assertIn('p99', result['latency_ms'])
+            self.assertGreater(result['queries_per_request']['mean'], 0, name)
+        self.assertFalse(User.objects.filter(username__startswith='benchmark-').exists())
+
+    def test_login_not_throttled(self):
+        """Logins beyond the rate limits should still be measured, not answered with 429."""
+        report = run_benchmark(users=1, tasks_per_user=1, concurrency=1, requests_per_client=8, scenarios=['login'])
+        self.assertEqual(report['scenarios']['login']['requests'], 8)
+        self.assertEqual(report['scenarios']['login']['errors'], 0)
+
+    def test_runs_after_kept_run(self):
+        """Users kept by an earlier run should not collide with the next run's."""
+        for _ in range(2):
+            report = run_benchmark(
+                users=1, tasks_per_user=1, concurrency=1, requests_per_client=1, scenarios=['list'], keep=True
+            )
+            self.assertEqual(report['scenarios']['list']['errors'], 0)
+        self.assertEqual(User.objects.filter(username__startswith='benchmark-').count(), 2)
+
+
+class TestRunRenderBenchmark(TestCase):
+    def test_report(self):
+        """Both ways of loading the list should be timed and measured, the rows holding less memory."""
+        report = run_render_benchmark(rows=200, repeat=1)
+        self.assertEqual(list(report['variants']), list(RENDER_VARIANTS))
+        for name, result in report['variants'].items():
+            self.assertGreater(result['render_ms'], 0, name)
+            self.assertGreaterEqual(result['peak_bytes'], result['retained_bytes'], name)
+        self.assertLess(report['variants']['rows']['retained_bytes'], report['variants']['models']['retained_bytes'])
+        self.assertFalse(User.objects.filter(username__startswith='render-benchmark-').exists())
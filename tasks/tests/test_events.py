@@ -0,0 +1,173 @@
+import threading
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from tasks.cache import CSRF_PLACEHOLDER
+from tasks.events import EventHub, hub, publish_tasks, stream
+from tasks.models import Task
+
+
+class TestEventHub(SimpleTestCase):
+    async def test_publish_to_subscriptions_of_user(self):
+        events = EventHub()
+        mine, other = events.subscribe(1, 10), events.subscribe(2, 10)
+        event = events.publish(1, 'deleted', {'tasks': [{'id': 5}]})
+        self.assertEqual(await mine.get(1), ([event], False))
+        self.assertEqual(await other.get(0), ([], False))
+        self.assertEqual((events.last_id(1), events.last_id(2)), (event.id, f'{events.epoch}:0'))
+        events.unsubscribe(mine)
+        self.assertFalse(events.is_subscribed(1))
+        self.assertTrue(events.is_subscribed(2))
+
+    def test_missed(self):
+        """Only older ids of this process tell that events were missed; ids of other processes are unknown."""
+        events, other = EventHub(), EventHub()
+        first = events.publish(1, 'updated', {'tasks': []})
+        events.publish(1, 'updated', {'tasks': []})
+        self.assertTrue(events.missed(1, first.id))
+        self.assertFalse(events.missed(1, events.last_id(1)))
+        self.assertFalse(events.missed(2, first.id))
+        self.assertFalse(events.missed(1, other.last_id(1)))
+        self.assertFalse(events.missed(1, 'garbage'))
+
+    async def test_publish_from_other_thread(self):
+        """Events published by request or worker threads should wake the connection's event loop."""
+        events = EventHub()
+        subscription = events.subscribe(1, 10)
+        publisher = threading.Thread(target=events.publish, args=(1, 'deleted', {'tasks': []}))
+        publisher.start()
+        received, _ = await subscription.get(5)
+        publisher.join()
+        self.assertEqual([event.type for event in received], ['deleted'])
+
+    async def test_bounded_buffer(self):
+        """A connection falling behind should drop its buffer and be told once, then buffer again."""
+        events = EventHub()
+        subscription = events.subscribe(1, 3)
+        for _ in range(5):
+            events.publish(1, 'updated', {'tasks': []})
+        self.assertEqual(await subscription.get(0), ([], True))
+        event = events.publish(1, 'updated', {'tasks': []})
+        self.assertEqual(await subscription.get(0), ([event], False))
+
+    @override_settings(TASKS_EVENTS_HEARTBEAT=0.01, TASKS_EVENTS_MAX_AGE=0.05)
+    async def test_stream(self):
+        """Streams start from the last id, keep the connection alive, and reset clients which missed events."""
+        messages = [message async for message in stream(-1, 'token')]
+        self.assertEqual(messages[0], f'retry: 3000\nid: {hub.last_id(-1)}\n\n')
+        self.assertIn(': keep-alive\n\n', messages)
+        self.assertFalse(hub.is_subscribed(-1))
+
+        hub.publish(-1, 'deleted', {'tasks': [{'id': 5}]})
+        messages = [message async for message in stream(-1, 'token', last_event_id=f'{hub.epoch}:0')]
+        self.assertIn('event: reset\n', messages[1])
+        messages = [message async for message in stream(-1, 'token', last_event_id=hub.last_id(-1))]
+        self.assertNotIn('event: reset\n', ''.join(messages))
+        # Ids of other processes can't be compared, and a reset could send balanced clients into a reload loop
+        messages = [message async for message in stream(-1, 'token', last_event_id=f'{EventHub().epoch}:0')]
+        self.assertNotIn('event: reset\n', ''.join(messages))
+
+
+class TestPublishedEvents(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.login(username='testuser', password='testpass')
+        self.task = Task.objects.create(user=self.user, title='Task')
+
+    def published(self, *requests):
+        """
+        Runs the requests (callables) one after the other and returns the (type, data)
+        of the events published for the user, as if they had a stream open.
+        """
+        events = []
+
+        def publish(user_id, type, data):
+            if user_id == self.user.pk:
+                events.append((type, data))
+
+        with mock.patch.object(hub, 'is_subscribed', return_value=True), \
+                mock.patch.object(hub, 'publish', side_effect=publish):
+            for request in requests:
+                with self.captureOnCommitCallbacks(execute=True):
+                    request()
+        return events
+
+    def test_single_task_views(self):
+        (type, data), = self.published(lambda: self.client.post(reverse('task-create'), {'title': 'New'}))
+        created = Task.objects.get(title='New')
+        self.assertEqual(type, 'created')
+        self.assertEqual(data['tasks'][0]['id'], created.pk)
+        self.assertIn(f'id="task-{created.pk}"', data['tasks'][0]['html'])
+        self.assertIn(CSRF_PLACEHOLDER, data['tasks'][0]['html'])
+
+        update = {'title': 'Renamed', 'is_completed': True}
+        events = self.published(
+            lambda: self.client.post(reverse('task-toggle-status', kwargs={'pk': created.pk})),
+            lambda: self.client.post(reverse('task-update', kwargs={'pk': created.pk}), update),
+            lambda: self.client.post(reverse('task-delete', kwargs={'pk': created.pk})),
+        )
+        self.assertEqual([type for type, _ in events], ['toggled', 'updated', 'deleted'])
+        self.assertTrue(events[0][1]['tasks'][0]['is_completed'])
+        self.assertIn('Renamed', events[1][1]['tasks'][0]['html'])
+        self.assertEqual(events[2][1], {'tasks': [{'id': created.pk}]})
+
+    def test_bulk_views(self):
+        """Bulk changes should be published as one event per request."""
+        ids = [self.task.pk, Task.objects.create(user=self.user, title='Other').pk]
+        events = self.published(
+            lambda: self.client.post(reverse('task-bulk-action'), {'action': 'complete', 'ids': ids}),
+            lambda: self.client.post(
+                reverse('api-tasks'), {'tasks': [{'title': 'A'}, {'title': 'B'}]}, content_type='application/json'
+            ),
+            lambda: self.client.post(reverse('api-tasks-bulk-delete'), {'ids': ids}, content_type='application/json'),
+        )
+        self.assertEqual([type for type, _ in events], ['toggled', 'created', 'deleted'])
+        self.assertEqual({task['id'] for task in events[0][1]['tasks']}, set(ids))
+        self.assertTrue(all(task['is_completed'] for task in events[0][1]['tasks']))
+        self.assertEqual(len(events[1][1]['tasks']), 2)
+        self.assertEqual(sorted(task['id'] for task in events[2][1]['tasks']), sorted(ids))
+
+    def test_not_rendered_without_streams(self):
+        """Rows are only read and rendered for users with a stream open."""
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(0):
+            publish_tasks(self.user.pk, 'updated', [self.task.pk])
+
+
+@override_settings(ROOT_URLCONF='todo_list.async_urls', TASKS_EVENTS_HEARTBEAT=0.01)
+class TestEventStreamView(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.task = Task.objects.create(user=self.user, title='Task')
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+
+    def toggle(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('task-toggle-status', kwargs={'pk': self.task.pk}))
+
+    async def test_stream(self):
+        """Changes made in another tab should reach the stream, rendered with the stream's CSRF token."""
+        response = await self.async_client.get(reverse('task-events'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        messages = response.streaming_content.__aiter__()
+        self.assertTrue((await messages.__anext__()).startswith(b'retry: '))
+        await sync_to_async(self.toggle)()
+        message = await messages.__anext__()
+        while message.startswith(b':'):
+            message = await messages.__anext__()
+        self.assertIn(b'event: toggled\n', message)
+        self.assertIn(f'id=\\"task-{self.task.pk}\\"'.encode(), message)
+        self.assertIn(b'csrfmiddlewaretoken', message)
+        self.assertNotIn(CSRF_PLACEHOLDER.encode(), message)
+        await response.streaming_content.aclose()
+
+    def test_not_streamed_under_wsgi(self):
+        self.assertEqual(self.client.get(reverse('task-events')).status_code, 204)
+
+    def test_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('task-events')).status_code, 302)
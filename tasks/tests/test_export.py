@@ -0,0 +1,98 @@
+import csv
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from tasks.export import iter_export
+from tasks.models import Task
+
+
+class TestTaskExportView(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.other_user = User.objects.create_user(username='otheruser', password='otherpass')
+        self.task = Task.objects.create(user=self.user, title='Buy milk', description='Semi-skimmed, "fresh"')
+        self.overdue = Task.objects.create(
+            user=self.user, title='Pay bills', due_date=timezone.now() - timedelta(days=1), is_completed=True
+        )
+        Task.objects.create(user=self.other_user, title='Buy bread')
+        self.url = reverse('task-export')
+        self.client.login(username='testuser', password='testpass')
+
+    def read(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_redirects_if_not_logged_in(self):
+        self.client.logout()
+        self.assertRedirects(self.client.get(self.url), f"{reverse('login')}?next={self.url}")
+
+    def test_csv_export(self):
+        """The user's tasks should be streamed as CSV, one row per task."""
+        response = self.client.get(self.url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment; filename="tasks-', response['Content-Disposition'])
+        rows = list(csv.DictReader(StringIO(self.read(response))))
+        self.assertEqual([row['title'] for row in rows], ['Buy milk', 'Pay bills'])
+        self.assertEqual(rows[0]['description'], 'Semi-skimmed, "fresh"')
+        self.assertEqual((rows[0]['is_completed'], rows[0]['due_date']), ('false', ''))
+        self.assertEqual(rows[1]['is_completed'], 'true')
+
+    def test_jsonl_export(self):
+        response = self.client.get(self.url, {'format': 'jsonl'})
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.task.pk, self.overdue.pk])
+        self.assertIs(rows[1]['is_completed'], True)
+        self.assertEqual(rows[1]['due_date'], self.overdue.due_date.isoformat())
+
+    def test_filters_match_task_list(self):
+        """The search and due date filter should select the same tasks as on the list."""
+        response = self.client.get(self.url, {'format': 'jsonl', 'search-area': 'buy'})
+        self.assertEqual([json.loads(line)['title'] for line in self.read(response).splitlines()], ['Buy milk'])
+        response = self.client.get(self.url, {'format': 'jsonl', 'due': 'overdue'})
+        self.assertEqual([json.loads(line)['title'] for line in self.read(response).splitlines()], ['Pay bills'])
+
+    def test_unknown_format(self):
+        self.assertEqual(self.client.get(self.url, {'format': 'xml'}).status_code, 400)
+
+
+class TestIterExport(TestCase):
+    def test_chunked_single_query(self):
+        """Rows should be read by one query in chunks, not loaded all at once."""
+        user = User.objects.create_user(username='testuser', password='testpass')
+        Task.objects.bulk_create(Task(user=user, title=f'Task {i}') for i in range(25))
+        lines = iter_export(Task.objects.order_by('pk'), 'jsonl', chunk_size=10)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(list(lines)), 25)
+
+
+class TestExportTasksCommand(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.other_user = User.objects.create_user(username='otheruser', password='otherpass')
+        Task.objects.create(user=self.user, title='Mine')
+        Task.objects.create(user=self.other_user, title='Theirs')
+
+    def test_all_users_to_stdout(self):
+        output = StringIO()
+        call_command('export_tasks', '--format', 'jsonl', stdout=output)
+        rows = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([(row['user'], row['title']) for row in rows], [('testuser', 'Mine'), ('otheruser', 'Theirs')])
+
+    def test_one_user_to_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'tasks.csv')
+            call_command('export_tasks', '--user', 'testuser', '--output', path)
+            with open(path, newline='', encoding='utf-8') as file:
+                rows = list(csv.DictReader(file))
+        self.assertEqual([row['title'] for row in rows], ['Mine'])
+
+    def test_unknown_user(self):
+        with self.assertRaises(CommandError):
+            call_command('export_tasks', '--user', 'nobody', stdout=StringIO())
@@ -3,7 +3,7 @@ from django.utils import timezone
 from datetime import timedelta
 from django.contrib.auth.models import User
 from tasks.models import Task
-from tasks.forms import TaskCreateForm, TaskUpdateForm
+from tasks.forms import TaskCreateForm, TaskUpdateForm, TaskBulkActionForm
 
 
 class TestTaskCreateForm(TestCase):
@@ -118,3 +118,22 @@ class TestTaskUpdateForm(TestCase):
         updated_task = form.save()
         self.assertTrue(updated_task.is_completed)
         self.assertEqual(updated_task.title, self.task.title) 
+
+
+class TestTaskBulkActionForm(TestCase):
+    def test_valid_action(self):
+        """Selected ids should be cleaned to integers."""
+        form = TaskBulkActionForm(data={'action': 'complete', 'ids': ['1', '2']})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['ids'], [1, 2])
+
+    def test_invalid_ids(self):
+        form = TaskBulkActionForm(data={'action': 'delete', 'ids': ['1', 'x']})
+        self.assertFalse(form.is_valid())
+        self.assertIn('ids', form.errors)
+
+    def test_reschedule_requires_days(self):
+        """Rescheduling without the number of days should be invalid."""
+        form = TaskBulkActionForm(data={'action': 'reschedule', 'ids': ['1']})
+        self.assertFalse(form.is_valid())
+        self.assertIn('shift_days', form.errors)
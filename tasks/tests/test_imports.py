@@ -0,0 +1,166 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from tasks.imports import RowValidator, import_tasks
+from tasks.models import Task, TaskCounter, TaskImport
+
+
+class TestRowValidator(TestCase):
+    def setUp(self):
+        self.validator = RowValidator()
+
+    def test_valid_row(self):
+        due_date = (timezone.now() + timedelta(days=1)).isoformat()
+        task, errors = self.validator.clean({'title': 'Task', 'due_date': due_date, 'is_completed': 'true'})
+        self.assertIsNone(errors)
+        self.assertEqual(task.title, 'Task')
+        self.assertTrue(task.is_completed)
+
+    def test_form_rules(self):
+        """Rows should be rejected by the same rules as TaskCreateForm."""
+        _, errors = self.validator.clean({'title': '', 'description': 'x' * 1001})
+        self.assertEqual(errors['title'][0]['code'], 'required')
+        self.assertEqual(errors['description'][0]['code'], 'max_length')
+
+    def test_past_due_date(self):
+        """The model validators, e.g. validate_due_date, should apply as well."""
+        _, errors = self.validator.clean({'title': 'Task', 'due_date': '2000-01-01T10:00'})
+        self.assertIn('due_date', errors)
+
+    def test_recurrence_needs_due_date(self):
+        """Task.clean() should apply as well: recurring tasks need a due date."""
+        _, errors = self.validator.clean({'title': 'Chore', 'recurrence': 'daily'})
+        self.assertIn('due_date', errors)
+
+    def test_not_an_object(self):
+        _, errors = self.validator.clean(None)
+        self.assertIn('__all__', errors)
+
+
+class InterruptedStream:
+    """Text stream raising after handing out `limit` lines, like a crashed import."""
+
+    def __init__(self, text, limit):
+        self.lines = iter(text.splitlines(keepends=True))
+        self.limit = limit
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.limit == 0:
+            raise KeyboardInterrupt
+        self.limit -= 1
+        return next(self.lines)
+
+
+class TestImportTasks(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        TaskCounter.rebuild(self.user.pk)
+
+    def start(self, file_format='jsonl'):
+        return TaskImport.objects.create(user=self.user, source='tasks', file_format=file_format)
+
+    def test_csv_batches(self):
+        """Valid rows should be inserted with one INSERT per batch and invalid ones reported."""
+        text = 'id,title,description\n' + ''.join(f'{i},Task {i},\n' for i in range(5)) + '6,,missing title\n'
+        errors = []
+        with CaptureQueriesContext(connection) as queries:
+            task_import = import_tasks(
+                self.start('csv'), StringIO(text), batch_size=2, on_error=lambda row, e: errors.append(row)
+            )
+        inserts = [query for query in queries if query['sql'].startswith('INSERT INTO "tasks_task" ')]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 5)
+        self.assertEqual(errors, [6])
+        self.assertEqual((task_import.processed_rows, task_import.created_count, task_import.error_count), (6, 5, 1))
+        self.assertTrue(task_import.is_finished)
+        self.assertEqual(TaskCounter.get_counts(self.user.pk), {'completed_count': 0, 'incompleted_count': 5})
+
+    def test_resume_after_interruption(self):
+        """Rerunning an interrupted import should only insert the rows not committed yet."""
+        text = ''.join(json.dumps({'title': f'Task {i}'}) + '\n' for i in range(5))
+        task_import = self.start()
+        with self.assertRaises(KeyboardInterrupt):
+            import_tasks(task_import, InterruptedStream(text, 3), batch_size=2)
+        task_import.refresh_from_db()
+        self.assertEqual(task_import.processed_rows, 2)
+        self.assertFalse(task_import.is_finished)
+
+        import_tasks(task_import, StringIO(text), batch_size=2)
+        titles = sorted(Task.objects.filter(user=self.user).values_list('title', flat=True))
+        self.assertEqual(titles, [f'Task {i}' for i in range(5)])
+        task_import.refresh_from_db()
+        self.assertEqual((task_import.processed_rows, task_import.created_count), (5, 5))
+
+    def test_invalid_json_line(self):
+        errors = []
+        import_tasks(self.start(), StringIO('{"title": "Ok"}\nnot json\n'), on_error=lambda row, e: errors.append(row))
+        self.assertEqual(errors, [2])
+
+
+class TestTaskImportView(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.url = reverse('task-import')
+        self.client.login(username='testuser', password='testpass')
+
+    def upload(self, name, content, **data):
+        return self.client.post(self.url, {'file': SimpleUploadedFile(name, content.encode()), **data})
+
+    def test_redirects_if_not_logged_in(self):
+        self.client.logout()
+        self.assertRedirects(self.client.get(self.url), f"{reverse('login')}?next={self.url}")
+
+    def test_upload_csv(self):
+        response = self.upload('tasks.csv', 'title,due_date\nFirst,\nSecond,2000-01-01T10:00\n')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(Task.objects.filter(user=self.user).values_list('title', flat=True)), ['First'])
+        self.assertEqual(response.context['row_errors'][0]['row'], 2)
+        self.assertContains(response, 'Imported <b>1</b> of 2 rows')
+
+    def test_unknown_extension(self):
+        response = self.upload('tasks.txt', 'title\nFirst\n')
+        self.assertFormError(response.context['form'], 'file_format', 'Choose the format of the file.')
+
+    def test_resume_requires_same_file(self):
+        task_import = TaskImport.objects.create(user=self.user, source='other.csv', file_format='csv')
+        response = self.upload('tasks.csv', 'title\nFirst\n', resume=task_import.pk)
+        self.assertFormError(response.context['form'], 'file', 'Upload the same file as the import being resumed.')
+        self.assertFalse(Task.objects.exists())
+
+
+class TestImportTasksCommand(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'tasks.jsonl')
+        with open(self.path, 'w', encoding='utf-8') as file:
+            file.write('{"title": "First"}\n{"title": ""}\n')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_import(self):
+        output, errors = StringIO(), StringIO()
+        call_command('import_tasks', self.path, '--user', 'testuser', stdout=output, stderr=errors)
+        self.assertIn('2 rows processed, 1 tasks created, 1 rows rejected', output.getvalue())
+        self.assertEqual(json.loads(errors.getvalue())['row'], 2)
+        self.assertEqual(Task.objects.get().title, 'First')
+
+    def test_resume_without_unfinished_import(self):
+        with self.assertRaises(CommandError):
+            call_command('import_tasks', self.path, '--user', 'testuser', '--resume', stdout=StringIO())
@@ -0,0 +1,168 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.db import OperationalError, connections
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from tasks import jobs
+from tasks.jobs import Worker, claim, enqueue, expire_jobs, mark_overdue, run_jobs, schedule_reminders, tick
+from tasks.models import Job, Task
+from todo_list.database import database_settings
+from todo_list.tests.utils import file_database
+
+
+class JobTestCase(TestCase):
+    def setUp(self):
+        jobs.stats.reset()
+        self.now = timezone.now()
+        self.user = User.objects.create_user(username='testuser', password='testpass', email='test@example.com')
+
+    def create(self, title, due_in, **fields):
+        return Task.objects.create(user=self.user, title=title, due_date=self.now + due_in, **fields)
+
+
+class TestScheduler(JobTestCase):
+    def test_reminders_enqueued_once(self):
+        """Open tasks due one offset ahead get one reminder, however many ticks see them."""
+        task = self.create('Soon', timedelta(minutes=30))
+        self.create('Done', timedelta(minutes=30), is_completed=True)
+        self.create('Later', timedelta(hours=5))
+        self.create('Repeating', timedelta(minutes=30), recurrence='FREQ=DAILY')
+        with self.settings(TASKS_REMINDER_OFFSETS=[timedelta(hours=1)]):
+            schedule_reminders(self.now, batch_size=10, max_batches=10)
+            schedule_reminders(self.now + timedelta(minutes=1), batch_size=10, max_batches=10)
+        job = Job.objects.get()
+        self.assertEqual((job.kind, job.payload['task_id']), ('reminder', task.pk))
+
+    def test_rescheduled_task_reminded_again(self):
+        task = self.create('Soon', timedelta(minutes=30))
+        with self.settings(TASKS_REMINDER_OFFSETS=[timedelta(hours=1)]):
+            schedule_reminders(self.now, batch_size=10, max_batches=10)
+            task.due_date += timedelta(minutes=10)
+            task.save()
+            schedule_reminders(self.now, batch_size=10, max_batches=10)
+        self.assertEqual(Job.objects.filter(kind='reminder').count(), 2)
+
+    def test_scan_is_bounded(self):
+        """A tick reads at most max_batches batches per scan; the rest waits for the next tick."""
+        for index in range(5):
+            self.create(f'Late {index}', -timedelta(minutes=index + 1))
+        self.assertEqual(mark_overdue(self.now, batch_size=2, max_batches=1), 2)
+        self.assertEqual(mark_overdue(self.now, batch_size=2, max_batches=10), 3)
+        self.assertEqual(Task.objects.filter(overdue_at=self.now).count(), 5)
+        self.assertEqual(mark_overdue(self.now, batch_size=2, max_batches=10), 0)
+
+    def test_overdue_notice_only_for_recent_transitions(self):
+        recent = self.create('Recent', -timedelta(minutes=5))
+        self.create('Old', -timedelta(days=3))
+        with self.settings(TASKS_SCHEDULER_LOOKBACK=timedelta(hours=1)):
+            mark_overdue(self.now, batch_size=10, max_batches=10)
+        self.assertEqual([job.payload['task_id'] for job in Job.objects.filter(kind='overdue')], [recent.pk])
+
+    def test_new_due_date_clears_overdue_mark(self):
+        task = self.create('Late', -timedelta(minutes=5))
+        mark_overdue(self.now, batch_size=10, max_batches=10)
+        task = Task.objects.get(pk=task.pk)
+        self.assertIsNotNone(task.overdue_at)
+        task.due_date = self.now + timedelta(days=1)
+        task.save()
+        self.assertIsNone(Task.objects.get(pk=task.pk).overdue_at)
+
+    def test_expire_jobs(self):
+        """Jobs stuck running are marked lost, not run again, and old finished jobs are purged."""
+        stuck, old = Job.objects.create(kind='reminder'), Job.objects.create(kind='reminder')
+        Job.objects.filter(pk=stuck.pk).update(status=Job.RUNNING, started_at=self.now - timedelta(hours=1))
+        Job.objects.filter(pk=old.pk).update(status=Job.DONE, created_at=self.now - timedelta(days=30))
+        self.assertEqual(expire_jobs(self.now, batch_size=10), (1, 1))
+        self.assertEqual(list(Job.objects.values_list('status', flat=True)), [Job.LOST])
+
+
+class TestQueue(JobTestCase):
+    def test_claim_is_exclusive(self):
+        enqueue([Job(kind='reminder', run_at=self.now) for _ in range(3)] + [Job(kind='reminder', run_at=self.now + timedelta(hours=1))])
+        first = claim('a', 2, self.now)
+        second = claim('b', 2, self.now)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertFalse({job.pk for job in first} & {job.pk for job in second})
+        self.assertEqual(claim('c', 2, self.now), [])
+
+    def test_jobs_deduplicated_by_key(self):
+        enqueue([Job(kind='reminder', key='same')])
+        enqueue([Job(kind='reminder', key='same'), Job(kind='reminder', key='other')])
+        self.assertEqual(Job.objects.count(), 2)
+
+    def test_reminder_delivered(self):
+        task = self.create('Pay rent', timedelta(minutes=30))
+        with self.settings(TASKS_REMINDER_OFFSETS=[timedelta(hours=1)]):
+            Worker('test').run_once(self.now)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Reminder: Pay rent')
+        self.assertEqual(mail.outbox[0].to, ['test@example.com'])
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+        # Completed before the reminder was run: nothing is sent
+        with self.settings(TASKS_REMINDER_OFFSETS=[timedelta(hours=2)]):
+            Task.objects.filter(pk=task.pk).update(is_completed=True)
+            tick(self.now)
+            run_jobs(claim('test', 10, self.now))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_failures_recorded(self):
+        jobs.HANDLERS['broken'] = lambda payload: 1 / 0
+        self.addCleanup(jobs.HANDLERS.pop, 'broken')
+        enqueue([Job(kind='broken'), Job(kind='unknown')])
+        with self.assertLogs('tasks.jobs', 'ERROR'):
+            run_jobs(claim('test', 10))
+        self.assertEqual(set(Job.objects.values_list('status', flat=True)), {Job.FAILED})
+        self.assertIn('ZeroDivisionError', Job.objects.get(kind='broken').error)
+        self.assertEqual(jobs.stats.finished['broken', Job.FAILED], 1)
+
+    def test_metrics_exposed(self):
+        enqueue([Job(kind='overdue', payload={'task_id': 0, 'due_date': self.now.isoformat()})])
+        run_jobs(claim('test', 10))
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1')
+        self.assertContains(response, 'tasks_jobs_finished_total{kind="overdue",status="done"} 1')
+        self.assertContains(response, 'tasks_jobs_queued 0')
+
+    def test_command(self):
+        self.create('Late', -timedelta(minutes=5))
+        output = StringIO()
+        call_command('run_jobs', '--once', stdout=output)
+        self.assertIn('Ran 1 job(s)', output.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class TestConcurrentWorkers(SimpleTestCase):
+    """Workers in separate threads (with connections of their own) claiming from one queue."""
+    threads = 4
+
+    def test_every_job_claimed_once(self):
+        with file_database('jobs', database_settings({}, '')) as jobs_connection:
+            with jobs_connection.schema_editor() as editor:
+                editor.create_model(Job)
+            Job.objects.using('jobs').bulk_create(Job(kind='reminder') for _ in range(200))
+            claimed, errors = [], []
+            barrier = threading.Barrier(self.threads)
+
+            def work():
+                try:
+                    barrier.wait()
+                    while batch := claim(threading.get_ident(), 7, using='jobs'):
+                        claimed.extend(job.pk for job in batch)
+                except OperationalError as error:
+                    errors.append(error)
+                finally:
+                    connections['jobs'].close()
+
+            workers = [threading.Thread(target=work) for _ in range(self.threads)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            self.assertEqual(errors, [])
+            self.assertEqual(sorted(claimed), list(Job.objects.using('jobs').values_list('pk', flat=True)))
@@ -0,0 +1,49 @@
+import json
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from tasks.loadtest import LoadTestResult, build_requests
+from tasks.models import Task
+
+
+class TestLoadTestResult(SimpleTestCase):
+    def test_summary(self):
+        """The summary should report throughput and latency percentiles in milliseconds."""
+        result = LoadTestResult('wsgi', [i / 1000 for i in range(1, 101)], elapsed=2.0, errors=1)
+        summary = result.as_dict()
+        self.assertEqual(summary['requests'], 100)
+        self.assertEqual(summary['requests_per_second'], 50.0)
+        self.assertEqual(summary['latency_ms']['p50'], 51.0)
+        self.assertEqual(summary['latency_ms']['p99'], 99.0)
+        self.assertEqual(summary['errors'], 1)
+
+    def test_query_counts(self):
+        """Query counts should be summarized when they were recorded."""
+        result = LoadTestResult('wsgi', [0.1, 0.2], elapsed=1.0, errors=0, queries=[3, 5])
+        self.assertEqual(result.as_dict()['queries_per_request'], {'mean': 4.0, 'max': 5})
+        self.assertNotIn('queries_per_request', LoadTestResult('asgi', [0.1], 1.0, 0).as_dict())
+
+    def test_empty_run(self):
+        self.assertEqual(LoadTestResult('asgi', [], elapsed=0, errors=0).as_dict()['latency_ms']['p99'], 0.0)
+
+    def test_build_requests_alternates_list_and_toggle(self):
+        requests = build_requests([7], 4)
+        self.assertEqual([(request.method, request.url) for request in requests], [
+            ('get', '/my-tasks/'),
+            ('post', '/my-tasks/task-toggle-status/7/'),
+            ('get', '/my-tasks/'),
+            ('post', '/my-tasks/task-toggle-status/7/'),
+        ])
+
+
+class TestLoadTestCommand(TestCase):
+    def test_run_removes_its_user(self):
+        """The load test user should get a name of its own and be removed with its tasks after the run."""
+        User.objects.create_user(username='loadtest-user')
+        output = StringIO()
+        call_command('loadtest', interface='wsgi', requests=2, concurrency=1, tasks=2, json=True, stdout=output)
+        result, = json.loads(output.getvalue())
+        self.assertEqual(result['errors'], 0)
+        self.assertEqual(list(User.objects.values_list('username', flat=True)), ['loadtest-user'])
+        self.assertFalse(Task.objects.exists())
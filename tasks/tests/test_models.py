@@ -2,8 +2,10 @@ from django.test import TestCase
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from datetime import timedelta
-from tasks.models import Task
+from tasks.models import Task, TaskCounter, TaskRow
 import time
 
 
@@ -64,3 +66,104 @@ class TestTaskModel(TestCase):
         tasks = list(Task.objects.all())
         self.assertEqual(tasks[0], task2)
         self.assertEqual(tasks[1], task1)
+
+
+class TestTaskQuerySet(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+
+    def test_counts_single_query(self):
+        """counts() should return both counters using one query."""
+        Task.objects.create(user=self.user, title='Open')
+        Task.objects.create(user=self.user, title='Done', is_completed=True)
+        Task.objects.create(user=self.user, title='Done too', is_completed=True)
+        with self.assertNumQueries(1):
+            counts = Task.objects.filter(user=self.user).counts()
+        self.assertEqual(counts, {'completed_count': 2, 'incompleted_count': 1})
+
+    def test_with_deadline(self):
+        """Each task should be annotated with its time left and urgency bucket."""
+        now = timezone.now()
+        for title, due_date in [
+            ('overdue', now - timedelta(hours=1)), ('soon', now + timedelta(hours=2)),
+            ('medium', now + timedelta(days=3)), ('far', now + timedelta(days=30)), ('none', None),
+        ]:
+            Task.objects.create(user=self.user, title=title, due_date=due_date)
+        tasks = {task.title: task for task in Task.objects.with_deadline(now)}
+        for title, task in tasks.items():
+            self.assertEqual(task.deadline_bucket, None if title == 'none' else title)
+        self.assertEqual(tasks['soon'].time_left, timedelta(hours=2))
+        self.assertIsNone(tasks['none'].time_left)
+
+    def test_due_filters(self):
+        """Due date filters should select the tasks by their distance to the deadline."""
+        now = timezone.now()
+        overdue = Task.objects.create(user=self.user, title='Overdue', due_date=now - timedelta(days=1))
+        today = Task.objects.create(user=self.user, title='Today', due_date=now + timedelta(hours=3))
+        later = Task.objects.create(user=self.user, title='Later', due_date=now + timedelta(days=10))
+        undated = Task.objects.create(user=self.user, title='Undated')
+        self.assertEqual(list(Task.objects.due('overdue', now)), [overdue])
+        self.assertEqual(list(Task.objects.due('today', now)), [today])
+        self.assertEqual(list(Task.objects.due('week', now)), [today])
+        self.assertEqual(list(Task.objects.due('later', now)), [later])
+        self.assertEqual(list(Task.objects.due('none', now)), [undated])
+
+    def test_rows(self):
+        """rows() should yield slotted TaskRow objects with the list columns and annotations only."""
+        now = timezone.now()
+        task = Task.objects.create(user=self.user, title='Task', description='Long text', due_date=now + timedelta(hours=2))
+        with CaptureQueriesContext(connection) as queries:
+            row, = Task.objects.with_deadline(now).rows()
+        self.assertNotIn('"description"', queries[0]['sql'])
+        self.assertIsInstance(row, TaskRow)
+        self.assertFalse(hasattr(row, '__dict__'))
+        self.assertEqual((row.pk, str(row), row.is_completed), (task.pk, 'Task', False))
+        self.assertEqual((row.deadline_bucket, row.time_left), ('soon', timedelta(hours=2)))
+        self.assertIsNone(row.description)
+        self.assertEqual(row, task)
+        self.assertEqual(Task.objects.rows('description').get().description, 'Long text')
+
+
+class TestTaskCounterModel(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+
+    def assertCounts(self, completed, incompleted):
+        counter = TaskCounter.objects.get(user=self.user)
+        self.assertEqual((counter.completed_count, counter.incompleted_count), (completed, incompleted))
+
+    def test_counter_built_on_first_read(self):
+        """A missing counter row should be built from the Task table on read."""
+        Task.objects.create(user=self.user, title='Open')
+        self.assertFalse(TaskCounter.objects.filter(user=self.user).exists())
+        self.assertEqual(TaskCounter.get_counts(self.user.pk), {'completed_count': 0, 'incompleted_count': 1})
+        self.assertCounts(0, 1)
+
+    def test_counter_follows_create_update_delete(self):
+        """Creating, toggling and deleting tasks should keep the counter row in sync."""
+        TaskCounter.rebuild(self.user.pk)
+        task = Task.objects.create(user=self.user, title='Task')
+        Task.objects.create(user=self.user, title='Done', is_completed=True)
+        self.assertCounts(1, 1)
+
+        task = Task.objects.get(pk=task.pk)
+        task.is_completed = True
+        task.save()
+        self.assertCounts(2, 0)
+
+        task.title = 'Renamed'
+        task.save()
+        self.assertCounts(2, 0)
+
+        task.delete()
+        self.assertCounts(1, 0)
+
+        Task.objects.filter(user=self.user).delete()
+        self.assertCounts(0, 0)
+
+    def test_counter_removed_with_user(self):
+        """Deleting a user should remove their tasks and counter row without errors."""
+        Task.objects.create(user=self.user, title='Task')
+        TaskCounter.rebuild(self.user.pk)
+        self.user.delete()
+        self.assertFalse(TaskCounter.objects.exists())
@@ -0,0 +1,89 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.utils import timezone
+from django.contrib.auth.models import User
+from tasks.models import Task
+from tasks.pagination import KeysetPaginator, InvalidCursor, encode_cursor, decode_cursor
+
+
+class TestCursorTokens(TestCase):
+    def test_token_round_trip(self):
+        """Encoded tokens should decode to the same direction, date and id."""
+        user = User.objects.create_user(username='testuser', password='testpass')
+        task = Task.objects.create(user=user, title='Task')
+        token = encode_cursor('next', task.creation_date, task.pk)
+        self.assertEqual(decode_cursor(token), ('next', task.creation_date, task.pk))
+
+    def test_null_value_round_trip(self):
+        """Positions on a NULL key should survive the round trip."""
+        self.assertEqual(decode_cursor(encode_cursor('previous', None, 3)), ('previous', None, 3))
+
+    def test_invalid_token_raises(self):
+        """Garbage tokens should raise InvalidCursor."""
+        with self.assertRaises(InvalidCursor):
+            decode_cursor('not-a-token')
+
+
+class TestKeysetPaginator(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.tasks = [Task.objects.create(user=self.user, title=f'Task {i}') for i in range(5)]
+        self.paginator = KeysetPaginator(Task.objects.filter(user=self.user), page_size=2)
+
+    def test_first_page(self):
+        """The first page should hold the newest tasks and have no previous page."""
+        page = self.paginator.get_page()
+        self.assertEqual(page.object_list, [self.tasks[4], self.tasks[3]])
+        self.assertTrue(page.has_next)
+        self.assertFalse(page.has_previous)
+
+    def test_walk_forward_and_back(self):
+        """Following next and previous tokens should visit every task exactly once."""
+        page1 = self.paginator.get_page()
+        page2 = self.paginator.get_page(page1.next_token)
+        page3 = self.paginator.get_page(page2.next_token)
+        self.assertEqual(page2.object_list, [self.tasks[2], self.tasks[1]])
+        self.assertEqual(page3.object_list, [self.tasks[0]])
+        self.assertFalse(page3.has_next)
+
+        back = self.paginator.get_page(page3.previous_token)
+        self.assertEqual(back.object_list, page2.object_list)
+        self.assertTrue(back.has_previous)
+        first = self.paginator.get_page(back.previous_token)
+        self.assertEqual(first.object_list, page1.object_list)
+        self.assertFalse(first.has_previous)
+
+    def test_invalid_token_returns_first_page(self):
+        """An undecodable token should fall back to the first page."""
+        page = self.paginator.get_page('garbage')
+        self.assertEqual(page.object_list, [self.tasks[4], self.tasks[3]])
+
+
+class TestKeysetPaginatorNullableField(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        now = timezone.now()
+        self.dated = [
+            Task.objects.create(user=self.user, title=f'Due {i}', due_date=now + timedelta(days=3 - i))
+            for i in range(3)
+        ]
+        self.undated = [Task.objects.create(user=self.user, title=f'Undated {i}') for i in range(2)]
+        self.paginator = KeysetPaginator(
+            Task.objects.filter(user=self.user), page_size=2, field='due_date', descending=False
+        )
+
+    def test_walk_forward_and_back(self):
+        """Tasks should be ordered soonest due first, tasks without a due date last."""
+        page1 = self.paginator.get_page()
+        page2 = self.paginator.get_page(page1.next_token)
+        page3 = self.paginator.get_page(page2.next_token)
+        self.assertEqual(page1.object_list, [self.dated[2], self.dated[1]])
+        self.assertEqual(page2.object_list, [self.dated[0], self.undated[0]])
+        self.assertEqual(page3.object_list, [self.undated[1]])
+        self.assertFalse(page3.has_next)
+
+        back = self.paginator.get_page(page3.previous_token)
+        self.assertEqual(back.object_list, page2.object_list)
+        first = self.paginator.get_page(back.previous_token)
+        self.assertEqual(first.object_list, page1.object_list)
+        self.assertFalse(first.has_previous)
@@ -0,0 +1,89 @@
+import re
+import unittest
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth.models import User
+from tasks.models import Task
+
+
+FULL_SCAN = re.compile(r'\bSCAN (tasks_task|auth_user|django_session)\b(?! USING (COVERING )?INDEX)')
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+class TestTaskQueryPlans(TestCase):
+    """
+    Runs every query issued by the task views through EXPLAIN QUERY PLAN
+    and fails if any of them falls back to a full table scan.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.tasks = [Task.objects.create(user=self.user, title=f'Task {i}') for i in range(5)]
+        self.task = self.tasks[0]
+        self.client.login(username='testuser', password='testpass')
+
+    def explain(self, sql):
+        """Returns the EXPLAIN QUERY PLAN details of the given statement as one string."""
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return '\n'.join(row[-1] for row in cursor.fetchall())
+
+    def assertNoFullScans(self, method, url, data=None):
+        """Issues the request and checks the plan of every SELECT/UPDATE/DELETE it ran."""
+        with CaptureQueriesContext(connection) as captured:
+            getattr(self.client, method)(url, data or {})
+        plans = []
+        for query in captured.captured_queries:
+            sql = query['sql']
+            if not sql.startswith(('SELECT', 'UPDATE', 'DELETE')):
+                continue
+            plan = self.explain(sql)
+            plans.append(plan)
+            self.assertIsNone(FULL_SCAN.search(plan), f'Full scan in plan:\n{plan}\nfor query:\n{sql}')
+        self.assertTrue(plans)
+        return plans
+
+    def test_list_view(self):
+        self.assertNoFullScans('get', reverse('tasks'))
+
+    def test_list_view_ordering_uses_index(self):
+        """The list query should read rows in index order instead of sorting them."""
+        plans = self.assertNoFullScans('get', reverse('tasks'), {'page-size': 2})
+        list_plans = [plan for plan in plans if 'task_user_created_idx' in plan]
+        self.assertTrue(list_plans)
+        for plan in list_plans:
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_list_view_next_page(self):
+        response = self.client.get(reverse('tasks'), {'page-size': 2})
+        self.assertNoFullScans('get', reverse('tasks') + response.context['next_page_url'])
+
+    def test_list_view_deadline_filter_and_sort(self):
+        self.assertNoFullScans('get', reverse('tasks'), {'due': 'overdue'})
+        self.assertNoFullScans('get', reverse('tasks'), {'due': 'week', 'sort': 'urgency'})
+
+    def test_list_view_search(self):
+        self.assertNoFullScans('get', reverse('tasks'), {'search-area': 'Task 1'})
+
+    def test_toggle_view(self):
+        self.assertNoFullScans('post', reverse('task-toggle-status', kwargs={'pk': self.task.pk}))
+
+    def test_update_view(self):
+        self.assertNoFullScans('get', reverse('task-update', kwargs={'pk': self.task.pk}))
+        self.assertNoFullScans('post', reverse('task-update', kwargs={'pk': self.task.pk}), {'title': 'New'})
+
+    def test_delete_view(self):
+        self.assertNoFullScans('get', reverse('task-delete', kwargs={'pk': self.task.pk}))
+        self.assertNoFullScans('post', reverse('task-delete', kwargs={'pk': self.task.pk}))
+
+    def test_admin_status_filter(self):
+        """The admin's status filter should count and list along an index, not scan all users' tasks."""
+        self.client.force_login(User.objects.create_superuser(username='admin', password='adminpass'))
+        for value, index in [('1', 'task_completed_created_idx'), ('0', 'task_open_created_idx')]:
+            plans = self.assertNoFullScans('get', reverse('admin:tasks_task_changelist'), {'is_completed__exact': value})
+            # The capped count and the page
+            self.assertEqual(len([plan for plan in plans if index in plan]), 2, plans)
@@ -0,0 +1,191 @@
+from datetime import datetime, timedelta
+from itertools import islice
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from tasks.forms import TaskCreateForm
+from tasks.models import Task
+from tasks.recurrence import InvalidRule, Rule, is_done, occurrence_window, toggle_done, upcoming_occurrences
+
+
+def local(*args):
+    return timezone.make_aware(datetime(*args))
+
+
+class TestRule(SimpleTestCase):
+    def test_parse_and_normalize(self):
+        self.assertEqual(str(Rule.parse('Weekly')), 'FREQ=WEEKLY')
+        self.assertEqual(str(Rule.parse('weekdays')), 'FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR')
+        self.assertEqual(str(Rule.parse('RRULE:freq=daily;interval=2;count=3')), 'FREQ=DAILY;INTERVAL=2;COUNT=3')
+
+    def test_invalid_rules(self):
+        for text in ['', 'hourly', 'FREQ=DAILY;INTERVAL=0', 'FREQ=MONTHLY;BYDAY=MO', 'FREQ=DAILY;BYHOUR=5',
+                     'FREQ=DAILY;COUNT=2;UNTIL=20300101', 'FREQ=WEEKLY;BYDAY=XX']:
+            with self.assertRaises(InvalidRule, msg=text):
+                Rule.parse(text)
+
+    def test_weekly_by_day(self):
+        """Occurrences before the first one in its week are skipped, the others follow the week days."""
+        start = local(2030, 1, 2, 9)  # Wednesday
+        rule = Rule.parse('FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE,FR')
+        dates = [date for _, date in islice(rule.occurrences(start), 4)]
+        self.assertEqual(
+            dates, [local(2030, 1, 2, 9), local(2030, 1, 4, 9), local(2030, 1, 14, 9), local(2030, 1, 16, 9)]
+        )
+
+    def test_skipping_matches_enumeration(self):
+        """Starting far from the first occurrence should yield the same indexes and dates as enumerating."""
+        start = local(2030, 1, 31, 18, 30)
+        after = local(2033, 6, 10)
+        for text in ['daily', 'FREQ=DAILY;INTERVAL=3', 'FREQ=WEEKLY;BYDAY=TU,SA', 'monthly', 'FREQ=YEARLY;INTERVAL=2']:
+            rule = Rule.parse(text)
+            expected = [pair for pair in islice(rule.occurrences(start), 2000) if pair[1] >= after][:5]
+            self.assertEqual(list(islice(rule.occurrences(start, after), 5)), expected, text)
+            for index, date in expected:
+                self.assertEqual(rule.occurrence(start, index), date, text)
+
+    def test_month_end_and_dst(self):
+        """Short months fall back to their last day; the local time is kept across DST changes."""
+        rule = Rule.parse('monthly')
+        dates = [date for _, date in islice(rule.occurrences(local(2030, 1, 31, 9)), 3)]
+        self.assertEqual(dates, [local(2030, 1, 31, 9), local(2030, 2, 28, 9), local(2030, 3, 31, 9)])
+        dates = [date for _, date in islice(Rule.parse('daily').occurrences(local(2030, 3, 30, 9)), 3)]
+        self.assertEqual([timezone.localtime(date).hour for date in dates], [9, 9, 9])
+
+    def test_count_and_until(self):
+        start = local(2030, 1, 1, 9)
+        self.assertEqual(len(list(Rule.parse('FREQ=DAILY;COUNT=3').occurrences(start))), 3)
+        self.assertEqual(len(list(Rule.parse('FREQ=DAILY;UNTIL=20300105').occurrences(start))), 5)
+        self.assertIsNone(Rule.parse('FREQ=DAILY;COUNT=3').occurrence(start, 3))
+
+    def test_bitmap(self):
+        bitmap = toggle_done(b'', 9)
+        self.assertEqual(bitmap, b'\0\x02')
+        self.assertTrue(is_done(bitmap, 9))
+        self.assertFalse(is_done(bitmap, 8))
+        self.assertFalse(is_done(bitmap, 100))
+        self.assertEqual(toggle_done(bitmap, 9), b'')
+
+
+class TestUpcomingOccurrences(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+
+    def test_merged_in_date_order(self):
+        start = local(2030, 1, 1, 8)
+        daily = Task.objects.create(user=self.user, title='Daily', due_date=start, recurrence='FREQ=DAILY')
+        weekly = Task.objects.create(
+            user=self.user, title='Weekly', due_date=start + timedelta(hours=1), recurrence='FREQ=WEEKLY',
+            completed_occurrences=toggle_done(b'', 1),
+        )
+        tasks = Task.objects.exclude(recurrence='').rows('completed_occurrences')
+        occurrences = upcoming_occurrences(tasks, local(2030, 1, 7), local(2030, 1, 10))
+        self.assertEqual(
+            [(occurrence.task, occurrence.index, occurrence.is_completed) for occurrence in occurrences],
+            [(daily, 6, False), (daily, 7, False), (weekly, 1, True), (daily, 8, False)],
+        )
+        self.assertEqual(len(upcoming_occurrences(tasks, local(2030, 1, 7), local(2030, 1, 10), limit=2)), 2)
+
+
+class TestRecurringTaskForm(TestCase):
+    def test_rule_normalized(self):
+        due_date = (timezone.now() + timedelta(days=1)).strftime('%Y-%m-%dT%H:%M')
+        form = TaskCreateForm(data={'title': 'Chore', 'due_date': due_date, 'recurrence': 'weekdays'})
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data['recurrence'], 'FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR')
+
+    def test_invalid_rule_and_missing_due_date(self):
+        form = TaskCreateForm(data={'title': 'Chore', 'recurrence': 'FREQ=HOURLY'})
+        self.assertIn('recurrence', form.errors)
+        form = TaskCreateForm(data={'title': 'Chore', 'recurrence': 'daily'})
+        self.assertIn('due_date', form.errors)
+
+    def test_schedule_change_resets_completions(self):
+        user = User.objects.create_user(username='testuser', password='testpass')
+        task = Task.objects.create(
+            user=user, title='Chore', due_date=timezone.now(), recurrence='FREQ=DAILY', completed_occurrences=b'\x01'
+        )
+        task = Task.objects.get(pk=task.pk)
+        task.title = 'Renamed'
+        task.save()
+        self.assertEqual(bytes(Task.objects.get(pk=task.pk).completed_occurrences), b'\x01')
+        task.recurrence = 'FREQ=WEEKLY'
+        task.save()
+        self.assertEqual(bytes(Task.objects.get(pk=task.pk).completed_occurrences), b'')
+
+    def test_bulk_schedule_changes_reset_completions(self):
+        """The bulk reschedule and the API bulk update, which bypass save(), should reset the completions too."""
+        user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_login(user)
+        due_date = timezone.now() + timedelta(days=1)
+        tasks = [
+            Task.objects.create(
+                user=user, title=f'Chore {index}', due_date=due_date, recurrence='FREQ=DAILY',
+                completed_occurrences=b'\x01',
+            )
+            for index in range(3)
+        ]
+        self.client.post(reverse('task-bulk-action'), {'action': 'reschedule', 'ids': [tasks[0].pk], 'shift_days': 1})
+        self.client.post(
+            reverse('api-tasks-bulk-update'),
+            {'tasks': [{'id': tasks[1].pk, 'recurrence': 'weekly'}, {'id': tasks[2].pk, 'title': 'Renamed'}]},
+            content_type='application/json',
+        )
+        self.assertEqual(
+            [bytes(task.completed_occurrences) for task in Task.objects.order_by('pk')], [b'', b'', b'\x01']
+        )
+
+
+class TestOccurrencesInTaskList(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.login(username='testuser', password='testpass')
+        self.start, _ = occurrence_window(7)
+        self.task = Task.objects.create(
+            user=self.user, title='Water plants', due_date=self.start - timedelta(days=30, hours=-9),
+            recurrence='FREQ=DAILY',
+        )
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+    def test_listed_with_one_query(self):
+        """All occurrences should come from one query of the recurring tasks, however many there are."""
+        for index in range(3):
+            Task.objects.create(
+                user=self.user, title=f'Chore {index}', due_date=self.start + timedelta(hours=index),
+                recurrence='FREQ=WEEKLY',
+            )
+        self.client.get(reverse('tasks'))
+        with self.settings(TASKS_FRAGMENT_CACHE=None):
+            # Task page, counters and recurring tasks (the session and user are cached)
+            with self.assertNumQueries(3):
+                response = self.client.get(reverse('tasks'))
+        dates = [occurrence.due_date for occurrence in response.context['occurrences']]
+        self.assertEqual(len(dates), 7 + 3)
+        self.assertEqual(dates, sorted(dates))
+        self.assertContains(response, 'Coming up')
+
+    def test_hidden_when_filtering(self):
+        response = self.client.get(reverse('tasks'), {'search-area': 'water'})
+        self.assertEqual(response.context['occurrences'], [])
+
+    def test_toggle_occurrence(self):
+        tasks = Task.objects.rows('completed_occurrences')
+        occurrence, = upcoming_occurrences(tasks, self.start, self.start + timedelta(days=1))
+        url = reverse('task-toggle-occurrence', kwargs={'pk': self.task.pk, 'index': occurrence.index})
+        response = self.client.post(f'{url}?format=json')
+        self.assertEqual(response.json(), {'id': self.task.pk, 'index': occurrence.index, 'is_completed': True})
+        self.task.refresh_from_db()
+        self.assertTrue(is_done(bytes(self.task.completed_occurrences), occurrence.index))
+        self.assertTrue(self.client.get(reverse('tasks')).context['occurrences'][0].is_completed)
+        self.assertRedirects(self.client.post(url), reverse('tasks'))
+        self.task.refresh_from_db()
+        self.assertEqual(bytes(self.task.completed_occurrences), b'')
+
+    def test_toggle_outside_window_or_of_other_user(self):
+        far = reverse('task-toggle-occurrence', kwargs={'pk': self.task.pk, 'index': 10000})
+        self.assertEqual(self.client.post(far).status_code, 404)
+        User.objects.create_user(username='otheruser', password='otherpass')
+        self.client.login(username='otheruser', password='otherpass')
+        url = reverse('task-toggle-occurrence', kwargs={'pk': self.task.pk, 'index': 0})
+        self.assertEqual(self.client.post(url).status_code, 404)
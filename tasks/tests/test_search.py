@@ -0,0 +1,80 @@
+from datetime import timedelta
+from unittest import mock
+from django.db import connection
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.utils import timezone
+from tasks.models import Task
+from tasks.search import search_tasks, search_index_available, build_match_expression
+
+
+class TestSearchTasks(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.other_user = User.objects.create_user(username='otheruser', password='otherpass')
+        self.book = Task.objects.create(user=self.user, title='Read a book', description='Atomic Habits')
+        self.milk = Task.objects.create(user=self.user, title='Buy milk', description='Also read the label')
+        self.other = Task.objects.create(user=self.other_user, title='Read news')
+
+    def search(self, query, limit=10):
+        return search_tasks(Task.objects.filter(user=self.user), self.user, query, limit)
+
+    def test_build_match_expression(self):
+        """Every word should become a prefix query, scoped to the owner."""
+        self.assertEqual(
+            build_match_expression(7, 'read boo!'),
+            'user_id : "7" AND {title description} : "read"* AND {title description} : "boo"*'
+        )
+        self.assertIsNone(build_match_expression(7, '!!'))
+
+    def test_index_available_on_sqlite(self):
+        self.assertEqual(search_index_available(connection), connection.vendor == 'sqlite')
+
+    def test_prefix_match_ranked_and_scoped(self):
+        """Title matches should rank above description matches, other users' tasks excluded."""
+        self.assertEqual(self.search('rea'), [self.book, self.milk])
+
+    def test_description_search(self):
+        """Words from the description should be searchable too."""
+        self.assertEqual(self.search('habit'), [self.book])
+
+    def test_highlights(self):
+        """Matched words should be wrapped in <mark> tags and the rest escaped."""
+        Task.objects.create(user=self.user, title='<b>Bold</b> plan')
+        task, = self.search('bold')
+        self.assertEqual(task.title_highlight, '&lt;b&gt;<mark>Bold</mark>&lt;/b&gt; plan')
+        task, = self.search('label')
+        self.assertIn('<mark>label</mark>', task.snippet)
+
+    def test_index_follows_update_and_delete(self):
+        """The index should be kept in sync with updated and deleted tasks."""
+        self.book.title = 'Write a letter'
+        self.book.description = ''
+        self.book.save()
+        self.assertEqual(self.search('book'), [])
+        self.assertEqual(self.search('letter'), [self.book])
+        Task.objects.filter(pk=self.milk.pk).delete()
+        self.assertEqual(self.search('milk'), [])
+
+    def test_limit(self):
+        self.assertEqual(len(self.search('read', limit=1)), 1)
+
+    def test_filters_applied_before_limit(self):
+        """Tasks excluded by the queryset (e.g. by a due date filter) should not take up the limit."""
+        Task.objects.bulk_create(Task(user=self.user, title='Read') for _ in range(5))
+        for index in range(3):
+            Task.objects.create(
+                user=self.user, title=f'Read the long chapter number {index} of the book',
+                due_date=timezone.now() - timedelta(days=1),
+            )
+        tasks = search_tasks(Task.objects.due('overdue'), self.user, 'read', 3)
+        self.assertEqual(len(tasks), 3)
+        self.assertTrue(all('chapter' in task.title for task in tasks))
+
+    def test_fallback_without_index(self):
+        """Without the FTS5 index, every word should be matched as a substring."""
+        with mock.patch('tasks.search.search_index_available', return_value=False):
+            self.assertEqual(self.search('ead'), [self.milk, self.book])
+            tasks = self.search('book habits')
+        self.assertEqual(tasks, [self.book])
+        self.assertIsNone(tasks[0].title_highlight)
@@ -0,0 +1,153 @@
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from tasks.models import Task, TaskDailyStats
+from tasks.stats import contributions, stats_delta
+
+
+class TestStatsDelta(SimpleTestCase):
+    def test_contributions(self):
+        """Tasks should be counted on their creation, completion and (if open) due days."""
+        created = timezone.now() - timedelta(days=2)
+        completed = created + timedelta(hours=5)
+        days = contributions([
+            (created, True, completed, None),
+            (created, False, None, created + timedelta(days=3)),
+        ])
+        self.assertEqual(days[timezone.localdate(created)]['created_count'], 2)
+        self.assertEqual(days[timezone.localdate(completed)]['completed_count'], 1)
+        self.assertEqual(days[timezone.localdate(completed)]['completion_seconds'], 5 * 3600)
+        self.assertEqual(days[timezone.localdate(created + timedelta(days=3))]['due_open_count'], 1)
+
+    def test_delta_drops_unchanged_values(self):
+        """Only the rollup values which actually change should be part of the delta."""
+        now = timezone.now()
+        before = [(now, False, None, None)]
+        after = [(now, True, now, None)]
+        self.assertEqual(stats_delta(before, after), {timezone.localdate(now): {'completed_count': 1}})
+        self.assertEqual(stats_delta(before, before), {})
+
+
+class TestTaskDailyStats(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.login(username='testuser', password='testpass')
+        # The rollups are maintained once they have been built
+        Task.objects.create(user=self.user, title='Seed')
+        TaskDailyStats.rebuild(self.user.pk)
+
+    def snapshot(self):
+        """Returns the non-empty rollup rows of the user."""
+        return {
+            row['date']: row for row in TaskDailyStats.objects.filter(user=self.user).values(
+                'date', 'created_count', 'completed_count', 'completion_seconds', 'due_open_count'
+            )
+            if any(value for key, value in row.items() if key != 'date')
+        }
+
+    def assertConsistent(self):
+        """The incrementally maintained rollups should equal the ones rebuilt from the Task table."""
+        maintained = self.snapshot()
+        TaskDailyStats.rebuild(self.user.pk)
+        self.assertEqual(maintained, self.snapshot())
+
+    def test_rollups_not_written_before_first_build(self):
+        other = User.objects.create_user(username='otheruser', password='otherpass')
+        Task.objects.create(user=other, title='Task')
+        self.assertFalse(TaskDailyStats.objects.filter(user=other).exists())
+
+    def test_single_task_operations(self):
+        """Creating, updating, toggling and deleting tasks through the views should keep the rollups exact."""
+        due_date = (timezone.now() + timedelta(days=2)).strftime('%Y-%m-%dT%H:%M')
+        self.client.post(reverse('task-create'), {'title': 'New', 'due_date': due_date})
+        self.assertConsistent()
+        task = Task.objects.get(title='New')
+        self.client.post(reverse('task-toggle-status', kwargs={'pk': task.pk}))
+        task.refresh_from_db()
+        self.assertIsNotNone(task.completion_date)
+        self.assertConsistent()
+        self.client.post(reverse('task-update', kwargs={'pk': task.pk}), {'title': 'New', 'is_completed': False})
+        self.assertConsistent()
+        self.client.post(reverse('task-delete', kwargs={'pk': task.pk}))
+        self.assertConsistent()
+
+    def test_bulk_operations(self):
+        """Bulk actions and the JSON API should keep the rollups exact."""
+        due_date = timezone.now() + timedelta(days=1)
+        ids = [Task.objects.create(user=self.user, title=f'Task {i}', due_date=due_date).pk for i in range(3)]
+        self.client.post(reverse('task-bulk-action'), {'action': 'complete', 'ids': ids[:2]})
+        self.assertConsistent()
+        self.client.post(reverse('task-bulk-action'), {'action': 'reschedule', 'ids': ids, 'shift_days': 3})
+        self.assertConsistent()
+        self.client.post(reverse('api-tasks'), {'tasks': [{'title': 'Via API'}]}, content_type='application/json')
+        self.assertConsistent()
+        self.client.post(
+            reverse('api-tasks-bulk-update'), {'tasks': [{'id': ids[2], 'is_completed': True}]},
+            content_type='application/json',
+        )
+        self.assertConsistent()
+        self.client.post(reverse('api-tasks-bulk-delete'), {'ids': ids[1:]}, content_type='application/json')
+        self.assertConsistent()
+        self.client.post(reverse('task-bulk-action'), {'action': 'delete', 'ids': ids[:1]})
+        self.assertConsistent()
+
+    def test_summary(self):
+        """The summary should report overdue tasks and the average time to complete."""
+        now = timezone.now()
+        Task.objects.create(user=self.user, title='Overdue', due_date=now - timedelta(days=2))
+        task = Task.objects.create(user=self.user, title='Done')
+        Task.objects.filter(pk=task.pk).update(creation_date=now - timedelta(hours=2))
+        task.refresh_from_db()
+        task.is_completed = True
+        task.save()
+        summary = TaskDailyStats.summary(self.user.pk)
+        self.assertEqual(summary['overdue_count'], 1)
+        self.assertAlmostEqual(summary['average_completion_seconds'], 2 * 3600, delta=5)
+        self.assertEqual(summary['days'][-1].date, timezone.localdate())
+
+
+class TestTaskStatsView(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        Task.objects.create(user=self.user, title='Open')
+        Task.objects.create(user=self.user, title='Done', is_completed=True)
+        self.url = reverse('task-stats')
+        self.client.login(username='testuser', password='testpass')
+
+    def test_redirects_if_not_logged_in(self):
+        self.client.logout()
+        self.assertRedirects(self.client.get(self.url), f"{reverse('login')}?next={self.url}")
+
+    def test_dashboard(self):
+        response = self.client.get(self.url)
+        self.assertTemplateUsed(response, 'tasks/task_stats.html')
+        self.assertEqual(response.context['completion_rate'], 0.5)
+        self.assertContains(response, '50%')
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+    def test_reads_only_rollups(self):
+        """Once built, the dashboard should not query the Task table."""
+        self.client.get(self.url)
+        response = self.client.get(f'{self.url}?format=json')
+        data = response.json()
+        self.assertEqual(data['completed_count'], 1)
+        self.assertEqual(data['days'][-1]['created'], 2)
+        with self.assertNumQueries(4):
+            # Counter row, the built check, rollup totals and rollup days (the session and user are cached)
+            self.client.get(f'{self.url}?format=json')
+
+
+class TestRebuildTaskStatsCommand(TestCase):
+    def test_rebuild(self):
+        user = User.objects.create_user(username='testuser', password='testpass')
+        Task.objects.bulk_create(Task(user=user, title=f'Task {i}') for i in range(5))
+        output = StringIO()
+        call_command('rebuild_task_stats', '--batch-size', '2', stdout=output)
+        self.assertIn('Rebuilt statistics of 1 user(s).', output.getvalue())
+        self.assertEqual(TaskDailyStats.objects.get(user=user).created_count, 5)
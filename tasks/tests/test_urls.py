@@ -1,6 +1,11 @@
 from django.test import SimpleTestCase
 from django.urls import reverse, resolve
-from tasks.views import TaskListView, TaskCreateView, TaskUpdateView, TaskToggleStatusView, TaskDeleteView
+from tasks.views import (
+    TaskListView, TaskCreateView, TaskUpdateView, TaskToggleStatusView, TaskDeleteView, TaskBulkActionView,
+    TaskStatsView, TaskExportView, TaskImportView, TaskOccurrenceToggleView,
+)
+from tasks.async_views import TaskEventStreamView
+from tasks.api import TaskApiListView, TaskApiBulkUpdateView, TaskApiBulkDeleteView
 
 
 class TestUrlResolution(SimpleTestCase):
@@ -29,6 +34,44 @@ class TestUrlResolution(SimpleTestCase):
         url = reverse('task-delete', args=[1])
         self.assertEqual(resolve(url).func.view_class, TaskDeleteView)
 
+    def test_task_toggle_occurrence_url_resolves(self):
+        """Task-toggle-occurrence URL should resolve to TaskOccurrenceToggleView."""
+        url = reverse('task-toggle-occurrence', args=[1, 3])
+        self.assertEqual(url, '/my-tasks/task-toggle-occurrence/1/3/')
+        self.assertEqual(resolve(url).func.view_class, TaskOccurrenceToggleView)
+
+    def test_task_events_url_resolves(self):
+        """Task-events URL should resolve to TaskEventStreamView."""
+        url = reverse('task-events')
+        self.assertEqual(url, '/my-tasks/events/')
+        self.assertEqual(resolve(url).func.view_class, TaskEventStreamView)
+
+    def test_task_bulk_action_url_resolves(self):
+        """Task-bulk-action URL should resolve to TaskBulkActionView."""
+        url = reverse('task-bulk-action')
+        self.assertEqual(resolve(url).func.view_class, TaskBulkActionView)
+
+    def test_task_stats_url_resolves(self):
+        """Task-stats URL should resolve to TaskStatsView."""
+        url = reverse('task-stats')
+        self.assertEqual(resolve(url).func.view_class, TaskStatsView)
+
+    def test_task_export_url_resolves(self):
+        """Task-export URL should resolve to TaskExportView."""
+        url = reverse('task-export')
+        self.assertEqual(resolve(url).func.view_class, TaskExportView)
+
+    def test_task_import_url_resolves(self):
+        """Task-import URL should resolve to TaskImportView."""
+        url = reverse('task-import')
+        self.assertEqual(resolve(url).func.view_class, TaskImportView)
+
+    def test_api_urls_resolve(self):
+        """Task API URLs should resolve to their API views."""
+        self.assertEqual(resolve('/my-tasks/api/tasks/').func.view_class, TaskApiListView)
+        self.assertEqual(resolve('/my-tasks/api/tasks/bulk-update/').func.view_class, TaskApiBulkUpdateView)
+        self.assertEqual(resolve('/my-tasks/api/tasks/bulk-delete/').func.view_class, TaskApiBulkDeleteView)
+
 
 class TestUrlReversal(SimpleTestCase):
     def test_reverse_tasks_url(self):
@@ -1,13 +1,17 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.core.cache import cache
 from django.urls import reverse
 from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import timedelta
-from tasks.models import Task
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from tasks.models import Task, TaskCounter
 
 
 class TestTaskListView(TestCase):
     def setUp(self):
+        cache.clear()
         self.list_url = reverse('tasks')
         self.user = User.objects.create_user(username='testuser', password='testpass')
         self.task1 = Task.objects.create(
@@ -51,12 +55,12 @@ class TestTaskListView(TestCase):
         self.assertIn(self.task2, tasks)
         self.assertNotIn(self.task_other_user, tasks)
 
-    def test_list_view_context_counts_and_hours_left(self):
+    def test_list_view_context_counts_and_time_left(self):
         """
         Check presence of the additional context data:
         - `incompleted_count`
         - `completed_count`
-        - `hours_left`
+        - `time_left` and `deadline_bucket` annotations
         """
         self.client.login(username='testuser', password='testpass')
         response = self.client.get(self.list_url)
@@ -68,9 +72,11 @@ class TestTaskListView(TestCase):
         tasks = response.context['tasks']
         for task in tasks:
             if task.due_date:
-                self.assertIsNotNone(task.hours_left)
+                self.assertIsNotNone(task.time_left)
+                self.assertIsNotNone(task.deadline_bucket)
             else:
-                self.assertIsNone(task.hours_left)
+                self.assertIsNone(task.time_left)
+                self.assertIsNone(task.deadline_bucket)
 
     def test_list_view_search_functionality(self):
         """If a 'search-area' query param is provided, the tasks should be filtered."""
@@ -88,6 +94,172 @@ class TestTaskListView(TestCase):
         self.assertIn(self.task2, tasks)
 
 
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+    def test_list_view_counts_query_count(self):
+        """The list header counters should not cost more than one query, with or without the counter row."""
+        self.client.login(username='testuser', password='testpass')
+        self.client.get(self.list_url)
+        for use_counter_table in (True, False):
+            with self.settings(TASKS_USE_COUNTER_TABLE=use_counter_table, TASKS_FRAGMENT_CACHE=None):
+                # Task page, counters and recurring tasks (the session and user are cached)
+                with self.assertNumQueries(3):
+                    response = self.client.get(self.list_url)
+                self.assertEqual(response.context['incompleted_count'], 1)
+                self.assertEqual(response.context['completed_count'], 1)
+
+    def test_list_view_reads_list_columns_only(self):
+        """The list should not load descriptions, which only the update view needs."""
+        self.client.login(username='testuser', password='testpass')
+        self.client.get(self.list_url)
+        with self.settings(TASKS_FRAGMENT_CACHE=None), CaptureQueriesContext(connection) as queries:
+            self.client.get(self.list_url)
+        task_queries = [query['sql'] for query in queries if 'FROM "tasks_task"' in query['sql']]
+        self.assertTrue(task_queries)
+        self.assertFalse([sql for sql in task_queries if '"description"' in sql])
+
+    def test_list_view_counts_follow_toggle(self):
+        """Toggling a task should be reflected in the counters of the next page load."""
+        self.client.login(username='testuser', password='testpass')
+        self.client.get(self.list_url)
+        self.client.post(reverse('task-toggle-status', kwargs={'pk': self.task1.pk}))
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.context['incompleted_count'], 0)
+        self.assertEqual(response.context['completed_count'], 2)
+
+
+class TestTaskListPagination(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.list_url = reverse('tasks')
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.tasks = [Task.objects.create(user=self.user, title=f'Task {i}') for i in range(5)]
+        self.client.login(username='testuser', password='testpass')
+
+    def test_page_size_limits_tasks(self):
+        """Only `page-size` tasks should be rendered, with a link to the next page."""
+        response = self.client.get(self.list_url, {'page-size': 2})
+        self.assertEqual(list(response.context['tasks']), [self.tasks[4], self.tasks[3]])
+        self.assertIsNotNone(response.context['next_page_url'])
+        self.assertIsNone(response.context['previous_page_url'])
+        self.assertEqual(response.context['incompleted_count'], 5)
+
+    def test_next_page_url(self):
+        """Following the next page link should show the following tasks."""
+        response = self.client.get(self.list_url, {'page-size': 2})
+        response = self.client.get(self.list_url + response.context['next_page_url'])
+        self.assertEqual(list(response.context['tasks']), [self.tasks[2], self.tasks[1]])
+        self.assertIsNotNone(response.context['previous_page_url'])
+
+    def test_json_format(self):
+        """Requesting `format=json` should return the page and its tokens as JSON."""
+        response = self.client.get(self.list_url, {'page-size': 3, 'format': 'json'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([task['id'] for task in data['tasks']], [task.pk for task in self.tasks[:1:-1]])
+        self.assertIsNone(data['previous'])
+
+        response = self.client.get(self.list_url, {'page-size': 3, 'format': 'json', 'cursor': data['next']})
+        data = response.json()
+        self.assertEqual([task['id'] for task in data['tasks']], [self.tasks[1].pk, self.tasks[0].pk])
+        self.assertIsNone(data['next'])
+
+
+class TestTaskListDeadlines(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        now = timezone.now()
+        self.overdue = Task.objects.create(user=self.user, title='Overdue', due_date=now - timedelta(hours=1))
+        self.this_week = Task.objects.create(user=self.user, title='This week', due_date=now + timedelta(days=2))
+        self.later = Task.objects.create(user=self.user, title='Later', due_date=now + timedelta(days=20))
+        self.undated = Task.objects.create(user=self.user, title='Undated')
+        self.client.login(username='testuser', password='testpass')
+
+    def get_tasks(self, **params):
+        return list(self.client.get(reverse('tasks'), params).context['tasks'])
+
+    def test_filter_by_deadline(self):
+        """Only the tasks in the requested deadline range should be listed."""
+        self.assertEqual(self.get_tasks(due='overdue'), [self.overdue])
+        self.assertEqual(self.get_tasks(due='week'), [self.this_week])
+        self.assertEqual(self.get_tasks(due='none'), [self.undated])
+        self.assertEqual(len(self.get_tasks(due='unknown')), 4)
+
+    def test_sort_by_urgency(self):
+        """Sorted by urgency, the soonest due tasks should come first and undated ones last."""
+        self.assertEqual(
+            self.get_tasks(sort='urgency'), [self.overdue, self.this_week, self.later, self.undated]
+        )
+
+    def test_bucket_rendered(self):
+        """The rows should use the bucket computed by the database as their CSS class."""
+        response = self.client.get(reverse('tasks'))
+        self.assertContains(response, 'time-counter overdue')
+        self.assertContains(response, 'time-counter medium')
+        self.assertContains(response, 'time-counter far')
+
+    def test_page_links_keep_filter_and_sort(self):
+        response = self.client.get(reverse('tasks'), {'due': 'week', 'sort': 'urgency', 'page-size': 1})
+        self.assertIsNone(response.context['next_page_url'])
+        response = self.client.get(reverse('tasks'), {'sort': 'urgency', 'page-size': 1})
+        next_url = response.context['next_page_url']
+        self.assertIn('sort=urgency', next_url)
+        self.assertEqual(list(self.client.get(reverse('tasks') + next_url).context['tasks']), [self.this_week])
+
+
+@override_settings(TASKS_FRAGMENT_CACHE='default', SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+class TestTaskListFragmentCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.list_url = reverse('tasks')
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.task = Task.objects.create(user=self.user, title='Cached task')
+        self.client.login(username='testuser', password='testpass')
+
+    def test_unchanged_list_served_from_cache(self):
+        """A second load of an unchanged list should not query the database at all."""
+        self.client.get(self.list_url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.list_url)
+        self.assertContains(response, 'Cached task')
+        self.assertEqual(response.context['incompleted_count'], 1)
+
+    def test_cached_rows_use_current_csrf_token(self):
+        """Cached rows should carry the CSRF token of the current request, not the placeholder."""
+        self.client.get(self.list_url)
+        response = self.client.get(self.list_url)
+        self.assertNotContains(response, 'CSRF-TOKEN-PLACEHOLDER')
+        self.assertContains(response, 'name="csrfmiddlewaretoken"')
+
+    def test_cache_invalidated_by_changes(self):
+        """Creating, toggling, updating and deleting tasks should invalidate the cached list."""
+        self.client.get(self.list_url)
+        self.client.post(reverse('task-create'), {'title': 'Fresh task'})
+        self.assertContains(self.client.get(self.list_url), 'Fresh task')
+
+        self.client.post(reverse('task-toggle-status', kwargs={'pk': self.task.pk}))
+        self.assertEqual(self.client.get(self.list_url).context['completed_count'], 1)
+
+        self.client.post(reverse('task-update', kwargs={'pk': self.task.pk}), {'title': 'Renamed task'})
+        self.assertContains(self.client.get(self.list_url), 'Renamed task')
+
+        self.client.post(reverse('task-delete', kwargs={'pk': self.task.pk}))
+        self.assertNotContains(self.client.get(self.list_url), 'Renamed task')
+
+    def test_cache_is_per_user(self):
+        """Users should never be served each other's cached lists."""
+        self.client.get(self.list_url)
+        User.objects.create_user(username='otheruser', password='otherpass')
+        self.client.login(username='otheruser', password='otherpass')
+        self.assertNotContains(self.client.get(self.list_url), 'Cached task')
+
+    def test_search_not_cached(self):
+        """Search results should always be computed from the database."""
+        self.client.get(self.list_url, {'search-area': 'cached'})
+        response = self.client.get(self.list_url, {'search-area': 'cached'})
+        self.assertIn(self.task, response.context['tasks'])
+
+
 class TestTaskCreateView(TestCase):
     def setUp(self):
         self.create_url = reverse('task-create')
@@ -212,6 +384,54 @@ class TestTaskToggleStatusView(TestCase):
         self.task.refresh_from_db()
         self.assertFalse(self.task.is_completed)
 
+    def test_toggle_view_single_update(self):
+        """The toggle should be one UPDATE of the status column instead of a read-modify-write save."""
+        self.client.login(username='testuser', password='testpass')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(self.toggle_url)
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "tasks_task" ')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('SET "is_completed" = NOT', updates[0])
+
+    def test_toggle_view_JSON(self):
+        """With `?format=json` the new state should be returned instead of a redirect."""
+        TaskCounter.rebuild(self.user.pk)
+        self.client.login(username='testuser', password='testpass')
+        response = self.client.post(f'{self.toggle_url}?format=json')
+        self.assertEqual(response.json(), {'id': self.task.pk, 'is_completed': True})
+        counter = TaskCounter.objects.get(user=self.user)
+        self.assertEqual((counter.completed_count, counter.incompleted_count), (1, 0))
+
+    def test_toggle_view_fragment(self):
+        """Scripted requests should get the re-rendered task row."""
+        self.client.login(username='testuser', password='testpass')
+        response = self.client.post(self.toggle_url, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertTemplateUsed(response, 'tasks/task_row.html')
+        self.assertContains(response, f'id="task-{self.task.pk}"')
+        self.assertContains(response, '<s>')
+
+    def test_toggle_view_fragment_counts(self):
+        """The fragment should carry the header summary with the counts after the toggle."""
+        Task.objects.create(title='Other', user=self.user)
+        self.client.login(username='testuser', password='testpass')
+        response = self.client.post(self.toggle_url, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertContains(response, 'id="task-summary"')
+        self.assertContains(response, 'You have <i>1</i> incomplete task')
+        response = self.client.post(
+            reverse('task-toggle-status', kwargs={'pk': Task.objects.get(title='Other').pk}),
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        self.assertContains(response, 'All task done')
+
+    def test_toggle_view_stale_state(self):
+        """
+        A toggle should flip the stored state, whatever state the page was rendered
+        with, so clicks from two tabs cancel out instead of both setting the same state.
+        """
+        Task.objects.filter(pk=self.task.pk).update(is_completed=True)
+        self.client.login(username='testuser', password='testpass')
+        self.assertFalse(self.client.post(f'{self.toggle_url}?format=json').json()['is_completed'])
+
     def test_toggle_view_POST_invalid_user(self):
         """
         A user who doesn't own the task should generally get a 404 or be prevented
@@ -258,3 +478,89 @@ class TestTaskDeleteView(TestCase):
         self.client.login(username='otheruser', password='otherpass')
         response = self.client.get(self.delete_url)
         self.assertEqual(response.status_code, 404)
+
+
+class TestTaskBulkActionView(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.other_user = User.objects.create_user(username='otheruser', password='otherpass')
+        self.due_date = timezone.now() + timedelta(days=1)
+        self.tasks = [
+            Task.objects.create(user=self.user, title=f'Task {index}', due_date=self.due_date) for index in range(3)
+        ]
+        self.other_task = Task.objects.create(user=self.other_user, title='Other task')
+        self.url = reverse('task-bulk-action')
+        self.client.login(username='testuser', password='testpass')
+
+    def post(self, action, tasks, **data):
+        return self.client.post(self.url, {'action': action, 'ids': [task.pk for task in tasks], **data})
+
+    def assertSingleStatement(self, queries, statement):
+        """Exactly one statement of the kind should touch the tasks table."""
+        matching = [query['sql'] for query in queries if query['sql'].startswith(f'{statement} "tasks_task" ')]
+        self.assertEqual(len(matching), 1, matching)
+
+    def test_redirects_if_not_logged_in(self):
+        self.client.logout()
+        response = self.post('complete', self.tasks)
+        self.assertRedirects(response, f"{reverse('login')}?next={self.url}")
+
+    def test_complete(self):
+        """Selected tasks should be completed with one UPDATE and the counters kept in sync."""
+        TaskCounter.rebuild(self.user.pk)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post('complete', self.tasks[:2])
+        self.assertSingleStatement(queries, 'UPDATE')
+        self.assertRedirects(response, reverse('tasks'))
+        self.assertEqual(Task.objects.filter(user=self.user, is_completed=True).count(), 2)
+        counter = TaskCounter.objects.get(user=self.user)
+        self.assertEqual((counter.completed_count, counter.incompleted_count), (2, 1))
+
+    def test_incomplete(self):
+        Task.objects.filter(user=self.user).update(is_completed=True)
+        TaskCounter.rebuild(self.user.pk)
+        self.post('incomplete', self.tasks[:1])
+        counter = TaskCounter.objects.get(user=self.user)
+        self.assertEqual((counter.completed_count, counter.incompleted_count), (2, 1))
+
+    def test_reschedule(self):
+        """Due dates should be shifted in the database, keeping tasks without one untouched."""
+        no_due_date = Task.objects.create(user=self.user, title='No due date')
+        with CaptureQueriesContext(connection) as queries:
+            self.post('reschedule', [self.tasks[0], no_due_date], shift_days=2)
+        self.assertSingleStatement(queries, 'UPDATE')
+        self.tasks[0].refresh_from_db()
+        no_due_date.refresh_from_db()
+        self.assertEqual(self.tasks[0].due_date, self.due_date + timedelta(days=2))
+        self.assertIsNone(no_due_date.due_date)
+
+    def test_delete(self):
+        """Selected tasks should be deleted with one DELETE and the counters kept in sync."""
+        TaskCounter.rebuild(self.user.pk)
+        with CaptureQueriesContext(connection) as queries:
+            self.post('delete', self.tasks[:2])
+        self.assertSingleStatement(queries, 'DELETE FROM')
+        self.assertEqual(list(Task.objects.filter(user=self.user)), self.tasks[2:])
+        counter = TaskCounter.objects.get(user=self.user)
+        self.assertEqual((counter.completed_count, counter.incompleted_count), (0, 1))
+
+    def test_scoped_to_owner(self):
+        """Tasks of other users should never be changed."""
+        self.post('complete', [self.other_task])
+        self.post('delete', [self.other_task])
+        self.other_task.refresh_from_db()
+        self.assertFalse(self.other_task.is_completed)
+
+    def test_invalid_action(self):
+        response = self.post('archive', self.tasks)
+        self.assertRedirects(response, reverse('tasks'))
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 3)
+
+    def test_invalid_form_reported(self):
+        """An invalid selection should be reported on the list instead of being silently ignored."""
+        response = self.client.post(self.url, {'action': 'reschedule'}, follow=True)
+        self.assertContains(response, 'Select the tasks to apply the action to.')
+        self.assertContains(response, 'Enter the number of days to postpone the tasks by.')
+        response = self.client.get(reverse('tasks'))
+        self.assertNotContains(response, 'Select the tasks to apply the action to.')
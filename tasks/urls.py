@@ -1,5 +1,10 @@
 from django.urls import path
-from .views import TaskListView, TaskCreateView, TaskUpdateView, TaskDeleteView, TaskToggleStatusView
+from .views import (
+    TaskListView, TaskCreateView, TaskUpdateView, TaskDeleteView, TaskToggleStatusView, TaskBulkActionView,
+    TaskStatsView, TaskExportView, TaskImportView, TaskOccurrenceToggleView,
+)
+from .async_views import TaskEventStreamView
+from .api import TaskApiListView, TaskApiBulkUpdateView, TaskApiBulkDeleteView
 
 
 urlpatterns = [
@@ -8,4 +13,16 @@ urlpatterns = [
     path('task-update/<int:pk>/', TaskUpdateView.as_view(), name='task-update'),
     path('task-delete/<int:pk>/', TaskDeleteView.as_view(), name='task-delete'),
     path('task-toggle-status/<int:pk>/', TaskToggleStatusView.as_view(), name='task-toggle-status'),
+    path(
+        'task-toggle-occurrence/<int:pk>/<int:index>/', TaskOccurrenceToggleView.as_view(),
+        name='task-toggle-occurrence',
+    ),
+    path('events/', TaskEventStreamView.as_view(), name='task-events'),
+    path('task-bulk-action/', TaskBulkActionView.as_view(), name='task-bulk-action'),
+    path('stats/', TaskStatsView.as_view(), name='task-stats'),
+    path('export/', TaskExportView.as_view(), name='task-export'),
+    path('import/', TaskImportView.as_view(), name='task-import'),
+    path('api/tasks/', TaskApiListView.as_view(), name='api-tasks'),
+    path('api/tasks/bulk-update/', TaskApiBulkUpdateView.as_view(), name='api-tasks-bulk-update'),
+    path('api/tasks/bulk-delete/', TaskApiBulkDeleteView.as_view(), name='api-tasks-bulk-delete'),
 ]
\ No newline at end of file
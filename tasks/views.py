@@ -1,42 +1,217 @@
-from django.shortcuts import render, get_object_or_404, redirect
+import csv
+import io
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.http import Http404, HttpResponseBadRequest, JsonResponse, QueryDict, StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from django.shortcuts import render, redirect
 from django.views import View
+from django.views.generic.base import TemplateView
 from django.views.generic.list import ListView
-from django.views.generic.edit import CreateView, UpdateView, DeleteView
+from django.views.generic.edit import CreateView, UpdateView, DeleteView, FormView
 from django.urls import reverse_lazy
+from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.utils import timezone
-from .forms import TaskCreateForm, TaskUpdateForm
-from .models import Task
+from .cache import CSRF_PLACEHOLDER, fragment_key, get_fragment, get_fragment_cache, set_fragment
+from .events import hub, publish_reset, publish_tasks
+from .export import FORMATS, export_filename, export_queryset, iter_export
+from .forms import TaskCreateForm, TaskUpdateForm, TaskBulkActionForm, TaskImportForm
+from .imports import import_tasks
+from .models import DEADLINE_FILTERS, Task, TaskCounter, TaskDailyStats, TaskImport
+from .pagination import KeysetPage, KeysetPaginator
+from .recurrence import Rule, is_done, occurrence_window, toggle_done, upcoming_occurrences
+from .search import search_tasks
+from .serializers import serialize_task
+from .signals import tasks_changed_in_bulk
+from .stats import stats_delta, task_state
 
 
 class TaskListView(LoginRequiredMixin, ListView):
     """Displays the list of tasks for the logged-in user."""
     model = Task
     context_object_name = 'tasks'
+    fragment_key = None
+    last_event_id = ''
+    cached_context_keys = (
+        'task_rows', 'occurrence_rows', 'incompleted_count', 'completed_count', 'next_page_url', 'previous_page_url',
+    )
+
+    def get_page_size(self):
+        """Returns the requested page size, bounded by the configured maximum."""
+        default = getattr(settings, 'TASKS_PAGE_SIZE', 50)
+        maximum = getattr(settings, 'TASKS_MAX_PAGE_SIZE', 200)
+        try:
+            page_size = int(self.request.GET.get('page-size', default))
+        except ValueError:
+            page_size = default
+        return max(1, min(page_size, maximum))
+
+    def get_page_url(self, token):
+        """Builds the list URL pointing at the given page token, keeping the requested page size."""
+        if token is None:
+            return None
+        params = QueryDict(mutable=True)
+        if 'page-size' in self.request.GET:
+            params['page-size'] = self.get_page_size()
+        for name, value in (('due', self.get_deadline_filter()), ('sort', self.get_sort())):
+            if value:
+                params[name] = value
+        params['cursor'] = token
+        return f'?{params.urlencode()}'
+
+    def get_search_input(self):
+        """Returns the search input, empty when the filter is being cleared."""
+        return self.request.GET.get('search-area', '') if 'clear' not in self.request.GET else ''
+
+    def get_deadline_filter(self):
+        """Returns the requested due date filter (see DEADLINE_FILTERS), empty if missing or unknown."""
+        name = self.request.GET.get('due', '')
+        return name if name in DEADLINE_FILTERS or name == 'none' else ''
+
+    def get_sort(self):
+        """Returns 'urgency' when the list is sorted by due date, empty for the newest-first default."""
+        return 'urgency' if self.request.GET.get('sort') == 'urgency' else ''
+
+    def get_tasks(self, queryset):
+        """
+        Restricts the tasks to the user and the due date filter, annotating their
+        deadline bucket. Only the list columns are read, as TaskRow objects (the
+        JSON format adds the description).
+        """
+        now = timezone.now()
+        tasks = queryset.filter(user=self.request.user).with_deadline(now)
+        if self.get_deadline_filter():
+            tasks = tasks.due(self.get_deadline_filter(), now)
+        return tasks.rows(*(['description'] if self.request.GET.get('format') == 'json' else []))
+
+    def shows_occurrences(self):
+        """Upcoming occurrences of recurring tasks are listed above the first page of the unfiltered list."""
+        return not (
+            self.get_search_input() or self.get_deadline_filter() or self.get_cursor()
+            or self.request.GET.get('format') == 'json'
+        )
+
+    def inserts_created_tasks(self):
+        """Tasks created elsewhere are streamed to the top of the first page of the unfiltered, newest-first list."""
+        return self.shows_occurrences() and not self.get_sort()
+
+    def get_occurrence_window(self):
+        return occurrence_window(getattr(settings, 'TASKS_OCCURRENCE_DAYS', 7))
+
+    def get_recurring_tasks(self, before):
+        """Returns the user's recurring tasks starting before `before`, with their completion bitmaps."""
+        return Task.objects.filter(
+            user=self.request.user, due_date__lt=before
+        ).exclude(recurrence='').rows('completed_occurrences')
+
+    def get_occurrences(self):
+        """Materializes the occurrences in the window from the recurring tasks, loaded by a single query."""
+        if not self.shows_occurrences():
+            return []
+        after, before = self.get_occurrence_window()
+        limit = getattr(settings, 'TASKS_MAX_OCCURRENCES', 50)
+        return upcoming_occurrences(self.get_recurring_tasks(before), after, before, limit)
+
+    def get_paginator(self, tasks):
+        """Paginates by creation date, or by due date (soonest first, undated last) when sorted by urgency."""
+        if self.get_sort() == 'urgency':
+            return KeysetPaginator(tasks, self.get_page_size(), field='due_date', descending=False)
+        return KeysetPaginator(tasks, self.get_page_size())
+
+    def get_fragment_parts(self):
+        """Returns what identifies the page in its cache key, or None for pages which are not cached."""
+        if self.request.GET.get('format') == 'json' or self.get_search_input():
+            return None
+        return 'list', self.get_cursor(), self.get_page_size(), self.get_deadline_filter(), self.get_sort()
+
+    def get_fragment_key(self):
+        """Returns the cache key of the rendered page, or None for pages which are not cached."""
+        parts = self.get_fragment_parts()
+        return fragment_key(self.request.user.pk, *parts) if parts is not None else None
+
+    def get(self, request, *args, **kwargs):
+        """Serves unchanged pages from the fragment cache without touching the Task table."""
+        # Streamed events after this one are not on the page yet
+        self.last_event_id = hub.last_id(request.user.pk)
+        self.fragment_key = self.get_fragment_key() if get_fragment_cache() is not None else None
+        cached = get_fragment(self.fragment_key) if self.fragment_key else None
+        if cached is not None:
+            self.object_list = self.get_queryset()
+            return self.render_to_response(dict(cached, search_input='', view=self))
+        return super().get(request, *args, **kwargs)
+
+    def get_counts(self):
+        """Returns the completed/incompleted counts from the counter row or a single aggregate."""
+        if getattr(settings, 'TASKS_USE_COUNTER_TABLE', False):
+            return TaskCounter.get_counts(self.request.user.pk)
+        return Task.objects.filter(user=self.request.user).counts()
+
+    def get_cursor(self):
+        """Returns the requested page token, ignored when the filter is being cleared."""
+        return self.request.GET.get('cursor', '') if 'clear' not in self.request.GET else ''
 
     def get_context_data(self, **kwargs):
         """Adds filtered tasks, counts, and search functionality to the context."""
         context = super().get_context_data(**kwargs)
-        context['tasks'] = context['tasks'].filter(user=self.request.user)
-        context['incompleted_count'] = context['tasks'].filter(is_completed=False).count()
-        context['completed_count'] = context['tasks'].filter(is_completed=True).count()
+        context['tasks'] = self.get_tasks(context['tasks'])
+        context.update(self.get_counts())
+        context['occurrences'] = self.get_occurrences()
 
         # Handle search and clear filter functionality
-        search_input = self.request.GET.get('search-area', '') if 'clear' not in self.request.GET else ''
-        if search_input:
-            context['tasks'] = context['tasks'].filter(title__icontains=search_input)
+        search_input = self.get_search_input()
         context['search_input'] = search_input
 
-        # Calculate hours left for each task
-        current_time = timezone.now()
-        for task in context['tasks']:
-            if task.due_date:
-                task.hours_left = (task.due_date - current_time).total_seconds() / 3600
-            else:
-                task.hours_left = None
-        
+        if search_input:
+            # Search results are ranked by relevance, so only the best matches are shown
+            page = KeysetPage(search_tasks(context['tasks'], self.request.user, search_input, self.get_page_size()))
+        else:
+            # Paginate by the (creation_date, id) or (due_date, id) key instead of OFFSET
+            page = self.get_paginator(context['tasks']).get_page(self.get_cursor())
+        context = self.add_page_to_context(context, page)
+        if self.fragment_key:
+            set_fragment(self.fragment_key, self.get_cached_context(context))
+        return context
+
+    def add_page_to_context(self, context, page):
+        """Adds the page, its rendered rows and links to the context."""
+        context['page'] = page
+        context['tasks'] = page.object_list
+        context['next_page_url'] = self.get_page_url(page.next_token)
+        context['previous_page_url'] = self.get_page_url(page.previous_token)
+
+        # Rendered with a placeholder CSRF token so that the rows can be cached and shared between sessions
+        context['task_rows'] = render_to_string(
+            'tasks/task_rows.html', {'tasks': context['tasks'], 'csrf_token': CSRF_PLACEHOLDER}
+        )
+        context['occurrence_rows'] = render_to_string(
+            'tasks/occurrence_rows.html', {'occurrences': context.get('occurrences'), 'csrf_token': CSRF_PLACEHOLDER}
+        )
         return context
 
+    def get_cached_context(self, context):
+        """Returns the part of the context stored in the fragment cache."""
+        return {key: context[key] for key in self.cached_context_keys}
+
+    def render_to_response(self, context, **response_kwargs):
+        """Returns the page as JSON when requested with `?format=json`."""
+        if self.request.GET.get('format') == 'json':
+            page = context['page']
+            return JsonResponse({
+                'tasks': [serialize_task(task) for task in page],
+                'next': page.next_token,
+                'previous': page.previous_token,
+                'incompleted_count': context['incompleted_count'],
+                'completed_count': context['completed_count'],
+            })
+        for key in ('task_rows', 'occurrence_rows'):
+            context[key] = mark_safe(context.get(key, '').replace(CSRF_PLACEHOLDER, get_token(self.request)))
+        return super().render_to_response(context, **response_kwargs)
+
 
 class TaskCreateView(LoginRequiredMixin, CreateView):
     """Handles task creation."""
@@ -74,11 +249,81 @@ class TaskUpdateView(LoginRequiredMixin, UpdateView):
     
 
 class TaskToggleStatusView(LoginRequiredMixin, View):
-    """Toggles the completion status of a task."""
+    """
+    Toggles the completion status of a task. Returns the new state as JSON for
+    `?format=json`, the re-rendered task row and header summary for scripted
+    (XMLHttpRequest) requests and redirects to the list otherwise.
+    """
     def post(self, request, pk):
-        task = get_object_or_404(Task, pk=pk, user=request.user)
-        task.is_completed = not task.is_completed
-        task.save()
+        task = self.toggle(pk)
+        if task is None:
+            raise Http404('No task matches the given query.')
+        return self.render_toggled(task)
+
+    def toggle(self, pk):
+        """
+        Flips the status with a single UPDATE ... SET is_completed = NOT is_completed,
+        so concurrent toggles never overwrite each other, and returns the updated
+        task (None if the user has no such task).
+        """
+        with transaction.atomic():
+            tasks = Task.objects.filter(pk=pk, user=self.request.user)
+            before = list(tasks.stats_states())
+            if not tasks.update(
+                is_completed=~F('is_completed'),
+                completion_date=Case(When(is_completed=False, then=Value(timezone.now())), default=None),
+            ):
+                return None
+            # Read inside the transaction, which still holds the row written above
+            task = tasks.with_deadline().rows('completion_date').get()
+            delta = 1 if task.is_completed else -1
+            tasks_changed_in_bulk(
+                self.request.user.pk, completed=delta, incompleted=-delta,
+                stats=stats_delta(before, [task_state(task)]),
+            )
+            publish_tasks(self.request.user.pk, 'toggled', [task.pk])
+        return task
+
+    def wants_fragment(self):
+        """Tells whether the toggle was scripted (see toggleTask in tasks/task_list.html)."""
+        return (
+            self.request.GET.get('format') != 'json'
+            and self.request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+        )
+
+    def render_toggled(self, task):
+        if self.request.GET.get('format') == 'json':
+            return JsonResponse({'id': task.pk, 'is_completed': task.is_completed})
+        if self.wants_fragment():
+            return self.render_fragment(task, TaskCounter.get_counts(self.request.user.pk))
+        return redirect('tasks')
+
+    def render_fragment(self, task, counts):
+        """Renders the task row, followed by the header's task summary with the user's new counts."""
+        return render(self.request, 'tasks/task_toggled.html', {'task': task, **counts})
+
+
+class TaskOccurrenceToggleView(LoginRequiredMixin, View):
+    """
+    Marks one occurrence of a recurring task as completed, or open again, by
+    flipping its bit in the task's completion bitmap. Only occurrences up to
+    the end of the listed window can be toggled. Returns the new state as JSON
+    for `?format=json` and redirects to the list otherwise.
+    """
+    def post(self, request, pk, index):
+        with transaction.atomic():
+            tasks = Task.objects.filter(pk=pk, user=request.user).exclude(recurrence='')
+            task = tasks.select_for_update().rows('completed_occurrences').first()
+            date = Rule.parse(task.recurrence).occurrence(task.due_date, index) if task and task.due_date else None
+            if date is None or date >= occurrence_window(getattr(settings, 'TASKS_OCCURRENCE_DAYS', 7))[1]:
+                raise Http404('No occurrence matches the given query.')
+            completed_occurrences = toggle_done(bytes(task.completed_occurrences), index)
+            tasks.update(completed_occurrences=completed_occurrences)
+            tasks_changed_in_bulk(request.user.pk)
+            publish_tasks(request.user.pk, 'updated', [task.pk])
+
+        if request.GET.get('format') == 'json':
+            return JsonResponse({'id': task.pk, 'index': index, 'is_completed': is_done(completed_occurrences, index)})
         return redirect('tasks')
 
 
@@ -91,3 +336,174 @@ class TaskDeleteView(LoginRequiredMixin, DeleteView):
     def get_queryset(self):
         """Only return tasks owned by the current user."""
         return Task.objects.filter(user=self.request.user)
+
+
+class TaskBulkActionView(LoginRequiredMixin, View):
+    """Completes, reschedules or deletes many tasks of the user with one statement."""
+    def post(self, request):
+        form = TaskBulkActionForm(request.POST)
+        if form.is_valid():
+            self.apply(form.cleaned_data['action'], form.cleaned_data['ids'], form.cleaned_data['shift_days'])
+        else:
+            for errors in form.errors.values():
+                for error in errors:
+                    messages.error(request, error)
+        return redirect('tasks')
+
+    def apply(self, action, ids, shift_days=None):
+        """Runs a single UPDATE/DELETE ... WHERE user_id = ? AND id IN (...) for the action."""
+        tasks = Task.objects.filter(user=self.request.user, pk__in=ids)
+        with transaction.atomic():
+            before = list(tasks.stats_states())
+            if action in ('complete', 'incomplete'):
+                is_completed = action == 'complete'
+                changed = tasks.filter(is_completed=not is_completed).update(
+                    is_completed=is_completed, completion_date=timezone.now() if is_completed else None
+                )
+                delta = changed if is_completed else -changed
+                tasks_changed_in_bulk(
+                    self.request.user.pk, completed=delta, incompleted=-delta,
+                    stats=stats_delta(before, tasks.stats_states()),
+                )
+                publish_tasks(self.request.user.pk, 'toggled', ids)
+            elif action == 'reschedule':
+                # The completed occurrences of recurring tasks belong to the old schedule (see Task.save)
+                tasks.filter(due_date__isnull=False).update(
+                    due_date=F('due_date') + timedelta(days=shift_days), overdue_at=None, completed_occurrences=b'',
+                )
+                tasks_changed_in_bulk(self.request.user.pk, stats=stats_delta(before, tasks.stats_states()))
+                publish_tasks(self.request.user.pk, 'updated', ids)
+            elif action == 'delete':
+                counts = tasks.delete_in_bulk()
+                tasks_changed_in_bulk(
+                    self.request.user.pk,
+                    completed=-counts['completed_count'], incompleted=-counts['incompleted_count'],
+                    stats=stats_delta(before),
+                )
+                publish_tasks(self.request.user.pk, 'deleted', ids)
+
+
+class TaskStatsView(LoginRequiredMixin, TemplateView):
+    """Dashboard of the user's task statistics, read from the counters and daily rollups only."""
+    template_name = 'tasks/task_stats.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        counts = TaskCounter.get_counts(self.request.user.pk)
+        total = counts['completed_count'] + counts['incompleted_count']
+        context.update(counts)
+        context['completion_rate'] = counts['completed_count'] / total if total else None
+        context.update(TaskDailyStats.summary(self.request.user.pk, getattr(settings, 'TASKS_STATS_DAYS', 30)))
+        average = context['average_completion_seconds']
+        context['average_completion_time'] = timedelta(seconds=round(average)) if average is not None else None
+        return context
+
+    def render_to_response(self, context, **response_kwargs):
+        """Returns the statistics as JSON when requested with `?format=json`."""
+        if self.request.GET.get('format') == 'json':
+            return JsonResponse({
+                'completed_count': context['completed_count'],
+                'incompleted_count': context['incompleted_count'],
+                'completion_rate': context['completion_rate'],
+                'overdue_count': context['overdue_count'],
+                'average_completion_seconds': context['average_completion_seconds'],
+                'days': [
+                    {
+                        'date': day.date.isoformat(),
+                        'created': day.created_count,
+                        'completed': day.completed_count,
+                    }
+                    for day in context['days']
+                ],
+            })
+        return super().render_to_response(context, **response_kwargs)
+
+
+class TaskExportView(LoginRequiredMixin, View):
+    """
+    Streams the user's tasks as CSV (`?format=csv`, the default) or JSON Lines
+    (`?format=jsonl`), narrowed by the same `due` and `search-area` parameters
+    as the task list.
+    """
+    def get(self, request):
+        file_format = request.GET.get('format', 'csv')
+        if file_format not in FORMATS:
+            return self.unknown_format()
+        chunk_size = getattr(settings, 'TASKS_EXPORT_CHUNK_SIZE', 2000)
+        return self.export_response(iter_export(self.get_tasks(), file_format, chunk_size=chunk_size), file_format)
+
+    def unknown_format(self):
+        return HttpResponseBadRequest(f"Unknown format, use one of: {', '.join(FORMATS)}.")
+
+    def get_tasks(self):
+        due = self.request.GET.get('due', '')
+        tasks = export_queryset(
+            Task.objects.filter(user=self.request.user),
+            due=due if due in DEADLINE_FILTERS or due == 'none' else None,
+            search=self.request.GET.get('search-area', ''),
+            user=self.request.user,
+        )
+        # The rows are read after the view returns, so choose the (replica) database now
+        return tasks.using(tasks.db)
+
+    def export_response(self, lines, file_format):
+        response = StreamingHttpResponse(lines, content_type=FORMATS[file_format])
+        response['Content-Disposition'] = f'attachment; filename="{export_filename(file_format)}"'
+        return response
+
+
+class TaskImportView(LoginRequiredMixin, FormView):
+    """
+    Imports an uploaded CSV or JSON Lines file of tasks (see tasks.imports).
+    An interrupted import can be resumed by uploading the same file again.
+    """
+    form_class = TaskImportForm
+    template_name = 'tasks/task_import.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['unfinished_imports'] = TaskImport.objects.filter(
+            user=self.request.user, finished_at__isnull=True
+        ).order_by('-started_at')
+        return context
+
+    def get_task_import(self, form):
+        """Returns the import to resume, or a new one for the uploaded file."""
+        upload = form.cleaned_data['file']
+        if form.cleaned_data['resume']:
+            task_import = TaskImport.objects.filter(
+                pk=form.cleaned_data['resume'], user=self.request.user, finished_at__isnull=True
+            ).first()
+            if task_import is None or task_import.source != upload.name:
+                form.add_error('file', 'Upload the same file as the import being resumed.')
+            return task_import
+        return TaskImport.objects.create(
+            user=self.request.user, source=upload.name, file_format=form.cleaned_data['file_format']
+        )
+
+    def form_valid(self, form):
+        task_import = self.get_task_import(form)
+        if not form.is_valid():
+            return self.form_invalid(form)
+
+        max_errors = getattr(settings, 'TASKS_IMPORT_MAX_REPORTED_ERRORS', 100)
+        row_errors = []
+
+        def on_error(row_number, errors):
+            if len(row_errors) < max_errors:
+                row_errors.append({'row': row_number, 'errors': errors})
+
+        stream = io.TextIOWrapper(form.cleaned_data['file'], encoding='utf-8-sig', newline='')
+        try:
+            import_tasks(
+                task_import, stream, batch_size=getattr(settings, 'TASKS_IMPORT_BATCH_SIZE', 1000), on_error=on_error
+            )
+        except (UnicodeDecodeError, csv.Error) as error:
+            form.add_error('file', f'The file could not be read after row {task_import.processed_rows}: {error}')
+            return self.form_invalid(form)
+        finally:
+            # Too many rows to stream: the open lists reload instead
+            publish_reset([self.request.user.pk])
+        return self.render_to_response(self.get_context_data(
+            form=self.get_form_class()(), task_import=task_import, row_errors=row_errors,
+        ))
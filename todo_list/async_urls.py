@@ -0,0 +1,17 @@
+"""
+URL configuration serving the task views asynchronously, selected with the
+TASKS_ASYNC_VIEWS setting for ASGI deployments (see todo_list/asgi.py).
+
+Routes are the same as in todo_list/urls.py.
+"""
+from django.contrib import admin
+from django.urls import path, include
+from .metrics import metrics_view
+
+
+urlpatterns = [
+    path('admin/', admin.site.urls),
+    path('metrics/', metrics_view, name='metrics'),
+    path('', include('accounts.urls')),
+    path('my-tasks/', include('tasks.async_urls')),
+]
@@ -0,0 +1,53 @@
+"""
+SQLite backend which applies PRAGMAs to every new connection and can start
+transactions with BEGIN IMMEDIATE.
+
+Besides the sqlite3.connect() arguments, OPTIONS accepts:
+    pragmas: {name: value}, run as "PRAGMA name = value" when connecting
+    transaction_mode: 'DEFERRED' (SQLite's default), 'IMMEDIATE' or 'EXCLUSIVE'
+
+A deferred transaction which reads before writing has to upgrade its lock,
+and when another connection wrote in the meantime SQLite fails at once with
+"database is locked" instead of waiting for busy_timeout. Taking the write
+lock at BEGIN makes concurrent writers queue up instead.
+"""
+import re
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+PRAGMA_NAME = re.compile(r'^[a-z_]+$')
+PRAGMA_VALUE = re.compile(r'^(-?\d+|[A-Za-z]+)$')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, settings_dict, *args, **kwargs):
+        super().__init__(settings_dict, *args, **kwargs)
+        options = self.settings_dict['OPTIONS']
+        self.pragmas = options.get('pragmas', {})
+        self.transaction_mode = options.get('transaction_mode')
+        for name, value in self.pragmas.items():
+            if not PRAGMA_NAME.match(name) or not PRAGMA_VALUE.match(str(value)):
+                raise ImproperlyConfigured(f'Invalid SQLite PRAGMA: {name} = {value}')
+        if self.transaction_mode is not None and self.transaction_mode.upper() not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(f'Invalid SQLite transaction mode: {self.transaction_mode}')
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        kwargs.pop('pragmas', None)
+        kwargs.pop('transaction_mode', None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode is None:
+            super()._start_transaction_under_autocommit()
+        else:
+            self.cursor().execute(f'BEGIN {self.transaction_mode.upper()}')
@@ -0,0 +1,113 @@
+"""
+The default database settings, read from the environment.
+
+DB_BACKEND selects the profile:
+    'sqlite' (default): the SQLite file DB_NAME (db.sqlite3 in the project
+        directory), opened by todo_list.backends.sqlite3 with SQLITE_PRAGMAS
+        (each overridable with SQLITE_<NAME>, e.g. SQLITE_MMAP_SIZE=0) and
+        write transactions started with BEGIN IMMEDIATE
+        (SQLITE_TRANSACTION_MODE).
+    'postgresql': DB_NAME on DB_HOST:DB_PORT as DB_USER/DB_PASSWORD. Set
+        DB_POOLER=pgbouncer when connecting through PgBouncer in transaction
+        pooling mode, which server-side cursors don't survive.
+
+Both keep connections open for DB_CONN_MAX_AGE seconds, checking them before
+reuse unless DB_CONN_HEALTH_CHECKS=0.
+
+DB_REPLICAS lists read replicas of the default database, separated by
+commas: SQLite files, or PostgreSQL hosts (host or host:port). They get the
+aliases replica1, replica2, ... and are used by todo_list.routers.
+"""
+import os
+from django.core.exceptions import ImproperlyConfigured
+
+
+SQLITE_PRAGMAS = {
+    # Readers and the writer don't block each other
+    'journal_mode': 'WAL',
+    # Durable enough with WAL: a power loss may drop the last commits but can't corrupt the file
+    'synchronous': 'NORMAL',
+    # Milliseconds to wait for a lock before failing with "database is locked"
+    'busy_timeout': 5000,
+    # Bytes of the file read through memory mapping instead of read() calls
+    'mmap_size': 128 * 1024 * 1024,
+    # Page cache per connection, in KiB when negative
+    'cache_size': -20000,
+}
+
+CONN_MAX_AGE = {
+    'sqlite': 60,
+    'postgresql': 600,
+}
+
+POOLERS = ('', 'pgbouncer')
+
+
+def _flag(value):
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+def _connection_settings(environ, backend):
+    """Returns the persistent connection settings shared by the profiles."""
+    return {
+        'CONN_MAX_AGE': int(environ.get('DB_CONN_MAX_AGE', CONN_MAX_AGE[backend])),
+        'CONN_HEALTH_CHECKS': _flag(environ.get('DB_CONN_HEALTH_CHECKS', '1')),
+    }
+
+
+def sqlite_settings(environ, base_dir):
+    pragmas = {name: environ.get(f'SQLITE_{name.upper()}', value) for name, value in SQLITE_PRAGMAS.items()}
+    return {
+        'ENGINE': 'todo_list.backends.sqlite3',
+        'NAME': environ.get('DB_NAME', os.path.join(base_dir, 'db.sqlite3')),
+        'OPTIONS': {
+            'pragmas': pragmas,
+            'transaction_mode': environ.get('SQLITE_TRANSACTION_MODE', 'IMMEDIATE') or None,
+        },
+        **_connection_settings(environ, 'sqlite'),
+    }
+
+
+def postgresql_settings(environ):
+    pooler = environ.get('DB_POOLER', '')
+    if pooler not in POOLERS:
+        raise ImproperlyConfigured(f'Unknown DB_POOLER: {pooler}')
+    return {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': environ.get('DB_NAME', 'todo_list'),
+        'USER': environ.get('DB_USER', ''),
+        'PASSWORD': environ.get('DB_PASSWORD', ''),
+        'HOST': environ.get('DB_HOST', 'localhost'),
+        'PORT': environ.get('DB_PORT', '5432'),
+        'OPTIONS': {
+            'connect_timeout': int(environ.get('DB_CONNECT_TIMEOUT', '5')),
+            'application_name': 'todo_list',
+        },
+        # PgBouncer hands each transaction to any server connection, so cursors can't outlive it
+        'DISABLE_SERVER_SIDE_CURSORS': pooler == 'pgbouncer',
+        **_connection_settings(environ, 'postgresql'),
+    }
+
+
+def database_settings(environ=os.environ, base_dir=''):
+    """Returns the settings of the default database for the DB_* variables of `environ`."""
+    backend = environ.get('DB_BACKEND', 'sqlite')
+    if backend == 'sqlite':
+        return sqlite_settings(environ, base_dir)
+    if backend == 'postgresql':
+        return postgresql_settings(environ)
+    raise ImproperlyConfigured(f'Unknown DB_BACKEND: {backend}')
+
+
+def replica_settings(environ, primary):
+    """Returns the settings of the DB_REPLICAS aliases, which differ from `primary` by file or host."""
+    replicas = {}
+    for number, location in enumerate(filter(None, environ.get('DB_REPLICAS', '').split(',')), 1):
+        replica = {**primary, 'TEST': {'MIRROR': 'default'}}
+        if primary['ENGINE'] == 'django.db.backends.postgresql':
+            replica['HOST'], _, port = location.strip().partition(':')
+            replica['PORT'] = port or primary['PORT']
+        else:
+            replica['NAME'] = location.strip()
+        replicas[f'replica{number}'] = replica
+    return replicas
@@ -0,0 +1,94 @@
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from .proxies import client_ip
+
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class ViewMetrics:
+    """Totals recorded for one view."""
+
+    def __init__(self):
+        self.requests = 0
+        self.duration = 0.0
+        self.queries = 0
+        self.db_duration = 0.0
+        self.render_duration = 0.0
+        self.response_bytes = 0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+
+
+class MetricsRegistry:
+    """Process-local, thread-safe store of per-view request metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = defaultdict(ViewMetrics)
+        self._collectors = []
+
+    def add_collector(self, collector):
+        """Adds a callable returning more metrics, in the exposition format, to append to the rendered ones."""
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def record(self, view, duration, queries, db_duration, render_duration, response_bytes):
+        with self._lock:
+            metrics = self._views[view]
+            metrics.requests += 1
+            metrics.duration += duration
+            metrics.queries += queries
+            metrics.db_duration += db_duration
+            metrics.render_duration += render_duration
+            metrics.response_bytes += response_bytes
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    metrics.buckets[index] += 1
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+    def get(self, view):
+        with self._lock:
+            return self._views.get(view)
+
+    def render(self):
+        """Returns the metrics in the Prometheus text exposition format."""
+        with self._lock:
+            views = sorted(self._views.items())
+            lines = [
+                '# HELP django_view_duration_seconds Wall time spent handling requests.',
+                '# TYPE django_view_duration_seconds histogram',
+            ]
+            for view, metrics in views:
+                for bound, count in zip(DURATION_BUCKETS, metrics.buckets):
+                    lines.append(f'django_view_duration_seconds_bucket{{view="{view}",le="{bound}"}} {count}')
+                lines.append(f'django_view_duration_seconds_bucket{{view="{view}",le="+Inf"}} {metrics.requests}')
+                lines.append(f'django_view_duration_seconds_sum{{view="{view}"}} {metrics.duration:.6f}')
+                lines.append(f'django_view_duration_seconds_count{{view="{view}"}} {metrics.requests}')
+            for name, attribute, help_text in (
+                ('django_view_db_queries_total', 'queries', 'Database queries run.'),
+                ('django_view_db_duration_seconds_total', 'db_duration', 'Time spent in database queries.'),
+                ('django_view_render_duration_seconds_total', 'render_duration', 'Time spent rendering templates.'),
+                ('django_view_response_bytes_total', 'response_bytes', 'Size of the response bodies.'),
+            ):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} counter')
+                for view, metrics in views:
+                    value = getattr(metrics, attribute)
+                    lines.append(f'{name}{{view="{view}"}} {value:.6f}' if isinstance(value, float)
+                                 else f'{name}{{view="{view}"}} {value}')
+        return '\n'.join(lines) + '\n' + ''.join(collector() for collector in self._collectors)
+
+
+registry = MetricsRegistry()
+
+
+def metrics_view(request):
+    """Exposes the recorded metrics to Prometheus, only for the allowed client addresses."""
+    if client_ip(request) not in getattr(settings, 'METRICS_ALLOWED_IPS', ['127.0.0.1']):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,256 @@
+import logging
+import mimetypes
+import os
+import random
+import time
+from collections import Counter
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from contextvars import ContextVar
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.db import connections
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+from .metrics import registry
+
+
+logger = logging.getLogger('todo_list.instrumentation')
+
+
+class QueryRecorder:
+    """Database execute wrapper timing every query run by the request."""
+
+    def __init__(self, slow_query_seconds):
+        self.slow_query_seconds = slow_query_seconds
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.duration += duration
+            self.statements[sql] += 1
+            if duration > self.slow_query_seconds:
+                logger.warning('Slow query (%.1f ms): %s', duration * 1000, sql)
+
+
+# Recorder of the request being measured; sync_to_async copies the context, so the
+# queries which async requests run in worker threads find it as well
+_recorder = ContextVar('query_recorder', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper handing the queries of measured requests to their recorder."""
+    recorder = _recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_query_recorder():
+    """
+    Installs record_query on the current thread's connections of every alias,
+    the read replicas included. It goes first, so that the wrappers pushed
+    and popped by connection.execute_wrapper() blocks are left in place.
+    """
+    for alias in connections:
+        wrappers = connections[alias].execute_wrappers
+        if record_query not in wrappers:
+            wrappers.insert(0, record_query)
+
+
+class InstrumentationMiddleware:
+    """
+    Records the wall time, database queries and time, template render time
+    and response size of sampled requests. The totals are exposed through
+    the Server-Timing header and the Prometheus metrics endpoint, and
+    repeated statements (N+1 patterns) and slow queries are logged.
+    Under ASGI the requests are measured without leaving the event loop.
+    """
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        install_query_recorder()
+        recorder = QueryRecorder(getattr(settings, 'INSTRUMENTATION_SLOW_QUERY_MS', 100) / 1000)
+        request._render_duration = 0.0
+        token = _recorder.set(recorder)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _recorder.reset(token)
+        return self.record(request, response, recorder, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        # Queries run in the thread of thread-sensitive sync_to_async calls
+        await sync_to_async(install_query_recorder)()
+        recorder = QueryRecorder(getattr(settings, 'INSTRUMENTATION_SLOW_QUERY_MS', 100) / 1000)
+        request._render_duration = 0.0
+        token = _recorder.set(recorder)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _recorder.reset(token)
+        return self.record(request, response, recorder, time.perf_counter() - start)
+
+    @staticmethod
+    def sampled():
+        sample_rate = getattr(settings, 'INSTRUMENTATION_SAMPLE_RATE', 0.0)
+        return sample_rate >= 1 or (sample_rate > 0 and random.random() < sample_rate)
+
+    def record(self, request, response, recorder, duration):
+        """Records the measured request and adds the Server-Timing header to its response."""
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else '<unresolved>'
+        response_bytes = 0 if response.streaming else len(response.content)
+        registry.record(view, duration, recorder.count, recorder.duration, request._render_duration, response_bytes)
+
+        threshold = getattr(settings, 'INSTRUMENTATION_N_PLUS_ONE_THRESHOLD', 5)
+        for sql, count in recorder.statements.items():
+            if count >= threshold:
+                logger.warning('Possible N+1 in %s: statement run %d times: %s', view, count, sql)
+
+        response['Server-Timing'] = ', '.join([
+            f'total;dur={duration * 1000:.1f}',
+            f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries"',
+            f'render;dur={request._render_duration * 1000:.1f}',
+        ])
+        return response
+
+    def process_template_response(self, request, response):
+        """Times the rendering of template responses, which happens after the view returns."""
+        if hasattr(request, '_render_duration'):
+            start = time.perf_counter()
+
+            def record_render_time(rendered):
+                request._render_duration += time.perf_counter() - start
+
+            response.add_post_render_callback(record_render_time)
+        return response
+
+
+# Lifetime of files whose name contains a hash of their content, which never change
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+# Precompressed variants written by collectstatic, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class StaticFile:
+    """A collected file, with its precompressed variants."""
+
+    def __init__(self, path, immutable):
+        self.path = path
+        self.immutable = immutable
+        self.mtime = os.stat(path).st_mtime
+        self.content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.variants = [(encoding, path + suffix) for encoding, suffix in ENCODINGS if os.path.exists(path + suffix)]
+
+    def negotiate(self, accept_encoding):
+        """Returns the encoding (None for identity) and path of the variant to send."""
+        accepted = set()
+        for item in accept_encoding.split(','):
+            coding, _, params = item.strip().partition(';')
+            if params.strip().replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+                accepted.add(coding.strip().lower())
+        for encoding, path in self.variants:
+            if encoding in accepted or '*' in accepted:
+                return encoding, path
+        return None, self.path
+
+
+class StaticFilesMiddleware:
+    """
+    Serves the files collected to STATIC_ROOT, before any other middleware
+    but SecurityMiddleware, which adds its headers (e.g. nosniff) to them.
+    The precompressed .br or .gz variant is sent to clients accepting it.
+    Files named with their content hash are cached by browsers for a year,
+    the others for STATIC_MAX_AGE seconds. The collected files are indexed
+    on the first request, so collectstatic must run before the server starts.
+    Under ASGI only static requests leave the event loop, to read the files.
+    """
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.files = None
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.serve_static(request) if self.is_static(request) else None
+        return response if response is not None else self.get_response(request)
+
+    async def __acall__(self, request):
+        response = await sync_to_async(self.serve_static)(request) if self.is_static(request) else None
+        return response if response is not None else await self.get_response(request)
+
+    @staticmethod
+    def is_static(request):
+        return request.method in ('GET', 'HEAD') and request.path_info.startswith(settings.STATIC_URL)
+
+    def serve_static(self, request):
+        """Returns the response serving the requested file, or None if it wasn't collected."""
+        static_file = self.find(request.path_info[len(settings.STATIC_URL):])
+        return self.serve(request, static_file) if static_file is not None else None
+
+    def find(self, name):
+        if self.files is None:
+            self.files = self.index()
+        return self.files.get(name)
+
+    def index(self):
+        """Maps the names of the collected files, except the compressed variants, to StaticFiles."""
+        root = settings.STATIC_ROOT
+        if not root or not os.path.isdir(root):
+            return {}
+        hashed_names = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+        files = {}
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                if filename.endswith(tuple(suffix for _, suffix in ENCODINGS)):
+                    continue
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                files[name] = StaticFile(path, name in hashed_names)
+        return files
+
+    def serve(self, request, static_file):
+        if not was_modified_since(request.headers.get('If-Modified-Since'), static_file.mtime):
+            response = HttpResponseNotModified()
+        else:
+            encoding, path = static_file.negotiate(request.headers.get('Accept-Encoding', ''))
+            response = FileResponse(open(path, 'rb'), content_type=static_file.content_type)
+            del response['Content-Disposition']
+            if encoding:
+                response['Content-Encoding'] = encoding
+        if static_file.variants:
+            response['Vary'] = 'Accept-Encoding'
+        response['Last-Modified'] = http_date(static_file.mtime)
+        if static_file.immutable:
+            response['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        else:
+            response['Cache-Control'] = f"public, max-age={getattr(settings, 'STATIC_MAX_AGE', 60)}"
+        return response
@@ -0,0 +1,20 @@
+"""
+Client addresses of requests served behind reverse proxies.
+
+Each of the TRUSTED_PROXY_HOPS proxies in front of the server appends the
+address it received the request from to X-Forwarded-For, so the client is
+the entry that many places from the right; the entries to its left were sent
+by the client and can't be trusted. Without proxies, REMOTE_ADDR is used.
+"""
+from django.conf import settings
+
+
+def client_ip(request):
+    """Returns the address of the client which sent the request."""
+    hops = getattr(settings, 'TRUSTED_PROXY_HOPS', 0)
+    if hops > 0:
+        forwarded = [address.strip() for address in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')]
+        forwarded = [address for address in forwarded if address]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.META.get('REMOTE_ADDR', '')
@@ -0,0 +1,108 @@
+"""
+Primary/replica database routing.
+
+Reads of the task models go to one of the settings.DATABASE_REPLICAS
+aliases, picked at random, and everything else to the default (primary)
+database. Reads stay on the primary:
+  - outside requests, e.g. in management commands,
+  - inside transactions, so read-then-write sequences see the rows they change,
+  - for the rest of a request once it has written a task model,
+  - for DATABASE_REPLICA_PIN_SECONDS after a client's last write (a cookie
+    set by ReplicaPinMiddleware), so users see their own changes despite
+    the replication lag.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+_routing = ContextVar('database_routing', default=None)
+
+
+class RequestRouting:
+    """Routing state of the current request."""
+    __slots__ = ('pinned', 'wrote')
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+@contextmanager
+def request_routing(pinned=False):
+    """Lets the reads run within the block use the replicas, unless `pinned` to the primary."""
+    routing = RequestRouting(pinned)
+    token = _routing.set(routing)
+    try:
+        yield routing
+    finally:
+        _routing.reset(token)
+
+
+class PrimaryReplicaRouter:
+    route_app_labels = {'tasks'}
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in self.route_app_labels:
+            return None
+        replicas = getattr(settings, 'DATABASE_REPLICAS', ())
+        routing = _routing.get()
+        if not replicas or routing is None or routing.pinned or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label not in self.route_app_labels:
+            return None
+        routing = _routing.get()
+        if routing is not None:
+            routing.pinned = routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """The replicas hold the same rows as the primary."""
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        """Replicas receive their schema through replication."""
+        return db not in getattr(settings, 'DATABASE_REPLICAS', ())
+
+
+class ReplicaPinMiddleware:
+    """
+    Scopes the replica routing to the request and keeps the client's reads on
+    the primary for DATABASE_REPLICA_PIN_SECONDS after a request that wrote.
+    """
+    cookie_name = 'primary_pin'
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with request_routing(pinned=self.cookie_name in request.COOKIES) as routing:
+            response = self.get_response(request)
+        return self.pin(response, routing)
+
+    async def __acall__(self, request):
+        # The routing state is a mutable object, so writes made in the threads
+        # running the async views' queries are seen here
+        with request_routing(pinned=self.cookie_name in request.COOKIES) as routing:
+            response = await self.get_response(request)
+        return self.pin(response, routing)
+
+    def pin(self, response, routing):
+        """Keeps the client on the primary if the request wrote."""
+        if routing.wrote:
+            response.set_cookie(
+                self.cookie_name, '1', max_age=getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 5),
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -10,7 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
+from datetime import timedelta
 from pathlib import Path
+from .database import database_settings, replica_settings
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -45,6 +48,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'todo_list.middleware.StaticFilesMiddleware',
+    'todo_list.middleware.InstrumentationMiddleware',
+    'todo_list.routers.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -53,7 +59,10 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'todo_list.urls'
+# Serve the task views with their async versions, meant for ASGI deployments
+TASKS_ASYNC_VIEWS = os.environ.get('TASKS_ASYNC_VIEWS', '') == '1'
+
+ROOT_URLCONF = 'todo_list.async_urls' if TASKS_ASYNC_VIEWS else 'todo_list.urls'
 
 TEMPLATES = [
     {
@@ -76,14 +85,133 @@ WSGI_APPLICATION = 'todo_list.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
+# Profile selected with DB_BACKEND: 'sqlite' (default) or 'postgresql', see todo_list/database.py
 
 DATABASES = {
+    'default': database_settings(os.environ, BASE_DIR),
+}
+# Read replicas listed by DB_REPLICAS, see todo_list/routers.py
+DATABASES.update(replica_settings(os.environ, DATABASES['default']))
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['todo_list.routers.PrimaryReplicaRouter']
+
+# Seconds a client keeps reading from the primary after a write, to cover the replication lag
+DATABASE_REPLICA_PIN_SECONDS = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Backend selected with CACHE_BACKEND: 'locmem' (default), 'file' or 'redis'
+
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'todo-list'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / '.cache')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379'),
+}
+
+CACHE_BACKEND, CACHE_LOCATION = CACHE_BACKENDS[os.environ.get('CACHE_BACKEND', 'locmem')]
+
+# Whether the server processes share the cache (the file cache only between the processes of one host); with
+# per-process locmem caches, data cached by one process is not invalidated by writes made in another
+CACHE_SHARED = os.environ.get('CACHE_BACKEND', 'locmem') != 'locmem'
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.environ.get('CACHE_LOCATION', CACHE_LOCATION),
     }
 }
 
+# Login rate limit buckets (accounts/ratelimit.py) get a cache of their own, so that they are not culled to make
+# room for other entries (locmem and file caches evict at random once full); redis keeps them with the rest
+CACHE_REDIS = CACHE_BACKEND.endswith('RedisCache')
+
+CACHES['ratelimit'] = {
+    'BACKEND': CACHE_BACKEND,
+    'LOCATION': CACHES['default']['LOCATION'] + ('' if CACHE_REDIS else '-ratelimit'),
+    'OPTIONS': {} if CACHE_REDIS else {'MAX_ENTRIES': 100000},
+}
+
+# Cached sessions (SESSION_CACHE_ALIAS), in a cache of their own as well
+CACHES['sessions'] = {
+    'BACKEND': CACHE_BACKEND,
+    'LOCATION': CACHES['default']['LOCATION'] + ('' if CACHE_REDIS else '-sessions'),
+    'OPTIONS': {} if CACHE_REDIS else {'MAX_ENTRIES': 100000},
+}
+
+
+# Sessions and authentication
+# Session storage selected with SESSION_BACKEND: 'cached_db' (read from the cache and written through
+# to the database), 'db' or 'signed_cookies' (kept by the client). Sessions are cached by default only
+# when the cache is shared: a per-process locmem cache would keep serving a session which another
+# process flushed on logout
+
+SESSION_ENGINES = {
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'db': 'django.contrib.sessions.backends.db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get('SESSION_BACKEND', 'cached_db' if CACHE_SHARED else 'db')]
+
+# Cached sessions are kept apart from the other entries, so that those don't cull them
+SESSION_CACHE_ALIAS = 'sessions'
+
+AUTHENTICATION_BACKENDS = ['accounts.backends.CachedModelBackend']
+
+# Seconds the user of a session is kept in the memory of the process (0 disables it) and the
+# number of users kept; changes made by other processes are seen after at most this long
+AUTH_USER_CACHE_TIMEOUT = 30
+
+AUTH_USER_CACHE_SIZE = 10000
+
+
+# Password hashing (accounts/hashers.py)
+# Hasher of new passwords selected with PASSWORD_HASHER: 'pbkdf2' (default), 'scrypt' or
+# 'argon2' (needs argon2-cffi); the others remain to verify existing hashes
+
+PASSWORD_HASHER_CLASSES = {
+    'pbkdf2': 'accounts.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'accounts.hashers.ScryptPasswordHasher',
+    'argon2': 'accounts.hashers.Argon2PasswordHasher',
+}
+
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    path for name, path in PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
+# Cost of the hashers, time it per login with `python manage.py benchmark_hashers`
+PASSWORD_HASHER_COST = {
+    'pbkdf2_iterations': 600000,
+    'scrypt_work_factor': 2 ** 14,
+    'argon2_time_cost': 2,
+    'argon2_memory_cost': 102400,
+    'argon2_parallelism': 8,
+}
+
+# Login throttling (accounts/ratelimit.py), checked before any password is hashed:
+# token buckets as (burst size, tokens refilled per second) per client address and per username
+# for logins, and per client address for registrations
+
+LOGIN_RATE_LIMITS = {
+    'ip': (30, 0.5),
+    'username': (5, 1 / 30),
+    'register': (5, 1 / 60),
+}
+
+LOGIN_RATE_LIMIT_CACHE = 'ratelimit'
+
+# Number of reverse proxies in front of the server, each appending the address it got the request from
+# to X-Forwarded-For (todo_list/proxies.py); 0 uses the address of the connection (REMOTE_ADDR)
+TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', '0'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -118,6 +246,88 @@ USE_TZ = True
 LOGIN_URL = 'login'
 
 
+# Task list
+
+# Keyset pagination page size (overridable per request with ?page-size=)
+TASKS_PAGE_SIZE = 50
+
+TASKS_MAX_PAGE_SIZE = 200
+
+# Read the list header counters from the denormalized TaskCounter row
+TASKS_USE_COUNTER_TABLE = True
+
+# Cache alias for rendered task list pages (None disables the cache) and their lifetime in seconds,
+# which also bounds how stale the "time left" badges can get. Pages are invalidated through generation
+# counters kept in the same cache, so it is only used when the cache is shared by the server processes
+TASKS_FRAGMENT_CACHE = 'default' if CACHE_SHARED else None
+
+TASKS_FRAGMENT_CACHE_TIMEOUT = 60
+
+# Occurrences of recurring tasks listed above the first page: from today to this many days ahead, at most
+# TASKS_MAX_OCCURRENCES of them
+TASKS_OCCURRENCE_DAYS = 7
+
+TASKS_MAX_OCCURRENCES = 50
+
+# Live updates of the task list (tasks/events.py): events buffered per stream connection before its client is
+# told to reload, seconds between keep-alive comments and seconds after which a stream is closed and reconnected
+TASKS_EVENTS_BUFFER_SIZE = 100
+TASKS_EVENTS_HEARTBEAT = 15
+TASKS_EVENTS_MAX_AGE = 300
+
+# Maximum number of items accepted by a single bulk API request
+TASKS_API_MAX_BATCH = 1000
+# Number of days shown on the statistics dashboard
+TASKS_STATS_DAYS = 30
+# Rows fetched per database round trip while streaming exports
+TASKS_EXPORT_CHUNK_SIZE = 2000
+# Rows validated and inserted per transaction by imports, and the number of row errors shown after an upload
+TASKS_IMPORT_BATCH_SIZE = 1000
+TASKS_IMPORT_MAX_REPORTED_ERRORS = 100
+# Above this many rows (per the database statistics), the unfiltered admin task list shows an estimated count
+TASKS_ADMIN_EXACT_COUNT_LIMIT = 100000
+
+
+# Background jobs (tasks/jobs.py), run by `manage.py run_jobs` or, with TASKS_JOBS_IN_PROCESS=1, a thread of the server
+
+TASKS_JOBS_IN_PROCESS = os.environ.get('TASKS_JOBS_IN_PROCESS', '') == '1'
+
+# Jobs claimed per round trip and the pause of idle workers (in seconds)
+TASKS_JOB_BATCH_SIZE = 100
+TASKS_JOB_POLL_INTERVAL = 1.0
+# Running jobs older than this are marked lost and never retried; finished jobs are purged after TASKS_JOB_RETENTION
+TASKS_JOB_TIMEOUT = timedelta(minutes=10)
+TASKS_JOB_RETENTION = timedelta(days=7)
+
+# How often workers scan the due dates, how far back a scan reaches and how many rows one tick reads per scan
+TASKS_SCHEDULER_INTERVAL = timedelta(minutes=1)
+TASKS_SCHEDULER_LOOKBACK = timedelta(hours=1)
+TASKS_SCHEDULER_BATCH_SIZE = 500
+TASKS_SCHEDULER_MAX_BATCHES = 10
+
+# Reminders are sent this long before the due date of open tasks
+TASKS_REMINDER_OFFSETS = [timedelta(days=1), timedelta(hours=1)]
+
+# Reminders and overdue notices are emailed to the task owners
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'todo-list@localhost')
+
+
+# Request instrumentation (todo_list/middleware.py)
+
+# Fraction of requests measured, 0 (default) turns the instrumentation off
+INSTRUMENTATION_SAMPLE_RATE = float(os.environ.get('INSTRUMENTATION_SAMPLE_RATE', '0'))
+
+INSTRUMENTATION_SLOW_QUERY_MS = 100
+
+# Number of runs of the same statement within one request reported as a possible N+1 pattern
+INSTRUMENTATION_N_PLUS_ONE_THRESHOLD = 5
+
+# Client addresses allowed to read the Prometheus metrics endpoint (behind proxies, the address
+# found with TRUSTED_PROXY_HOPS)
+METRICS_ALLOWED_IPS = ['127.0.0.1']
+
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/4.2/howto/static-files/
 
@@ -129,6 +339,20 @@ STATICFILES_DIRS = [
 
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# collectstatic copies the files under content-hashed names and writes their gzip/brotli variants,
+# which todo_list.middleware.StaticFilesMiddleware serves
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'todo_list.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Seconds browsers may cache static files requested by their unhashed names (hashed ones are cached for a year)
+STATIC_MAX_AGE = 60
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,61 @@
+import gzip
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, StaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Types worth compressing; images, woff fonts and archives are compressed already
+COMPRESSED_EXTENSIONS = ('.css', '.js', '.map', '.json', '.svg', '.txt', '.html', '.xml', '.ico', '.ttf', '.otf',
+                         '.eot', '.webmanifest')
+
+# Variants saving less than this fraction of the original size are not worth an extra file
+MIN_SAVING = 0.05
+
+
+def compress(data):
+    """Yields the (extension, content) of the gzip and, with the brotli package installed, brotli variants."""
+    yield '.gz', gzip.compress(data, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield '.br', brotli.compress(data, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Manifest storage, which copies the collected files under names containing
+    a hash of their content, that also writes .gz and .br variants of the
+    compressible files for todo_list.middleware.StaticFilesMiddleware to serve.
+    Until collectstatic has written the manifest (e.g. in development and in
+    tests), URLs point to the unhashed files.
+    """
+
+    def url(self, name, force=False):
+        if not self.hashed_files and not force:
+            return StaticFilesStorage.url(self, name)
+        return super().url(name, force)
+
+    def post_process(self, paths, dry_run=False, **options):
+        names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if not isinstance(processed, Exception):
+                names.update(name for name in (name, hashed_name) if name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in sorted(names):
+            if name.endswith(COMPRESSED_EXTENSIONS):
+                self.compress_file(name)
+
+    def compress_file(self, name):
+        """Writes the worthwhile compressed variants of a collected file next to it."""
+        with self.open(name) as file:
+            data = file.read()
+        for extension, content in compress(data):
+            variant = name + extension
+            if self.exists(variant):
+                self.delete(variant)
+            if len(content) <= len(data) * (1 - MIN_SAVING):
+                self._save(variant, ContentFile(content))
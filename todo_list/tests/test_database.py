@@ -0,0 +1,113 @@
+import threading
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError, connections, transaction
+from django.test import SimpleTestCase
+from todo_list.backends.sqlite3.base import DatabaseWrapper
+from todo_list.database import database_settings, replica_settings
+from todo_list.tests.utils import file_database
+
+
+class TestDatabaseSettings(SimpleTestCase):
+    def test_sqlite_profile(self):
+        settings_dict = database_settings({}, '/srv/todo')
+        self.assertEqual(settings_dict['ENGINE'], 'todo_list.backends.sqlite3')
+        self.assertEqual(settings_dict['NAME'], '/srv/todo/db.sqlite3')
+        self.assertEqual(settings_dict['OPTIONS']['pragmas']['journal_mode'], 'WAL')
+        self.assertEqual(settings_dict['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+        self.assertEqual((settings_dict['CONN_MAX_AGE'], settings_dict['CONN_HEALTH_CHECKS']), (60, True))
+
+    def test_sqlite_overrides(self):
+        settings_dict = database_settings({'SQLITE_MMAP_SIZE': '0', 'SQLITE_TRANSACTION_MODE': ''}, '')
+        self.assertEqual(settings_dict['OPTIONS']['pragmas']['mmap_size'], '0')
+        self.assertIsNone(settings_dict['OPTIONS']['transaction_mode'])
+
+    def test_postgresql_profile(self):
+        settings_dict = database_settings({
+            'DB_BACKEND': 'postgresql', 'DB_NAME': 'tasks', 'DB_POOLER': 'pgbouncer',
+            'DB_CONN_MAX_AGE': '300', 'DB_CONN_HEALTH_CHECKS': '0',
+        })
+        self.assertEqual(settings_dict['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual(settings_dict['NAME'], 'tasks')
+        self.assertTrue(settings_dict['DISABLE_SERVER_SIDE_CURSORS'])
+        self.assertEqual((settings_dict['CONN_MAX_AGE'], settings_dict['CONN_HEALTH_CHECKS']), (300, False))
+
+    def test_replicas(self):
+        primary = database_settings({}, '')
+        replicas = replica_settings({'DB_REPLICAS': 'a.sqlite3, b.sqlite3'}, primary)
+        self.assertEqual([replica['NAME'] for replica in replicas.values()], ['a.sqlite3', 'b.sqlite3'])
+        self.assertEqual(list(replicas), ['replica1', 'replica2'])
+        self.assertEqual(replicas['replica1']['TEST'], {'MIRROR': 'default'})
+        primary = database_settings({'DB_BACKEND': 'postgresql'})
+        replica = replica_settings({'DB_REPLICAS': 'db2:6432'}, primary)['replica1']
+        self.assertEqual((replica['HOST'], replica['PORT']), ('db2', '6432'))
+        self.assertEqual(replica_settings({}, primary), {})
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ImproperlyConfigured):
+            database_settings({'DB_BACKEND': 'oracle'})
+        with self.assertRaises(ImproperlyConfigured):
+            database_settings({'DB_BACKEND': 'postgresql', 'DB_POOLER': 'pgpool'})
+
+
+class TestSQLiteBackend(SimpleTestCase):
+    def test_pragmas_applied(self):
+        with file_database('pragmas', database_settings({}, '')) as connection:
+            with connection.cursor() as cursor:
+                for pragma, expected in [('journal_mode', 'wal'), ('synchronous', 1), ('busy_timeout', 5000)]:
+                    cursor.execute(f'PRAGMA {pragma}')
+                    self.assertEqual(cursor.fetchone()[0], expected)
+
+    def test_invalid_pragma(self):
+        settings_dict = database_settings({}, '')
+        settings_dict['OPTIONS']['pragmas'] = {'cache_size': '1; DROP TABLE tasks_task'}
+        with self.assertRaises(ImproperlyConfigured):
+            DatabaseWrapper(settings_dict)
+
+
+class TestConcurrentWrites(SimpleTestCase):
+    """Threads incrementing a counter with read-then-write transactions, like the task toggles."""
+    threads = 8
+    increments = 25
+
+    def run_writers(self, alias):
+        """Returns the number of "database is locked" errors and the final counter value."""
+        errors = []
+        barrier = threading.Barrier(self.threads)
+
+        def write():
+            connection = connections[alias]
+            barrier.wait()
+            try:
+                for _ in range(self.increments):
+                    try:
+                        with transaction.atomic(using=alias):
+                            with connection.cursor() as cursor:
+                                cursor.execute('SELECT value FROM counter')
+                                value = cursor.fetchone()[0]
+                                cursor.execute('UPDATE counter SET value = %s', [value + 1])
+                    except OperationalError as error:
+                        errors.append(error)
+            finally:
+                connection.close()
+
+        with connections[alias].cursor() as cursor:
+            cursor.execute('CREATE TABLE counter (value integer)')
+            cursor.execute('INSERT INTO counter VALUES (0)')
+        workers = [threading.Thread(target=write) for _ in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SELECT value FROM counter')
+            return len(errors), cursor.fetchone()[0]
+
+    def test_tuned_profile_reduces_lock_errors(self):
+        with file_database('stock', {'ENGINE': 'django.db.backends.sqlite3'}):
+            stock_errors, _ = self.run_writers('stock')
+        with file_database('tuned', database_settings({}, '')):
+            tuned_errors, value = self.run_writers('tuned')
+        self.assertGreater(stock_errors, 0)
+        self.assertEqual(tuned_errors, 0)
+        # Without lost updates either
+        self.assertEqual(value, self.threads * self.increments)
@@ -0,0 +1,98 @@
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.contrib.auth.models import User
+from tasks.models import Task
+from todo_list.metrics import registry
+from todo_list.middleware import InstrumentationMiddleware
+
+
+@override_settings(INSTRUMENTATION_SAMPLE_RATE=1.0)
+class TestInstrumentationMiddleware(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        Task.objects.create(user=self.user, title='Task')
+        self.client.force_login(self.user)
+
+    def test_server_timing_header(self):
+        """Sampled responses should carry the total, database and render timings."""
+        response = self.client.get(reverse('tasks'))
+        timing = response['Server-Timing']
+        self.assertIn('total;dur=', timing)
+        self.assertIn('db;dur=', timing)
+        self.assertIn('render;dur=', timing)
+
+    def test_metrics_recorded_per_view(self):
+        """Requests should be aggregated under their view name."""
+        self.client.get(reverse('tasks'))
+        self.client.get(reverse('tasks'))
+        metrics = registry.get('tasks')
+        self.assertEqual(metrics.requests, 2)
+        self.assertGreater(metrics.queries, 0)
+        self.assertGreater(metrics.render_duration, 0)
+        self.assertGreater(metrics.response_bytes, 0)
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_sampling_off(self):
+        """With sampling off, requests should pass through untouched."""
+        response = self.client.get(reverse('tasks'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertIsNone(registry.get('tasks'))
+
+    def test_prometheus_endpoint(self):
+        self.client.get(reverse('tasks'))
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1')
+        self.assertEqual(response.status_code, 200)
+        content = response.content.decode()
+        self.assertIn('django_view_duration_seconds_count{view="tasks"} 1', content)
+        self.assertIn('django_view_db_queries_total{view="tasks"}', content)
+
+    def test_prometheus_endpoint_restricted(self):
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(TRUSTED_PROXY_HOPS=1)
+    def test_prometheus_endpoint_restricted_behind_proxy(self):
+        """Behind a local proxy, the allowlist should apply to the forwarded client address."""
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1', HTTP_X_FORWARDED_FOR='203.0.113.5')
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1', HTTP_X_FORWARDED_FOR='127.0.0.1')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(ROOT_URLCONF='todo_list.async_urls')
+    async def test_async_requests(self):
+        """Under ASGI the middleware should stay async and still see the queries run in worker threads."""
+        async def view(request):
+            return HttpResponse()
+
+        self.assertTrue(iscoroutinefunction(InstrumentationMiddleware(view)))
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.get(reverse('tasks'))
+        self.assertNotIn('desc="0 queries"', response['Server-Timing'])
+        metrics = registry.get('tasks')
+        self.assertEqual(metrics.requests, 1)
+        self.assertGreater(metrics.queries, 0)
+
+    @override_settings(INSTRUMENTATION_N_PLUS_ONE_THRESHOLD=3)
+    def test_n_plus_one_logged(self):
+        """A statement repeated once per row should be logged as a possible N+1 pattern."""
+        def view(request):
+            for task in Task.objects.all():
+                User.objects.get(pk=task.user_id)
+            return HttpResponse()
+
+        for index in range(2):
+            Task.objects.create(user=self.user, title=f'Task {index}')
+        with self.assertLogs('todo_list.instrumentation', level='WARNING') as logs:
+            InstrumentationMiddleware(view)(RequestFactory().get('/'))
+        self.assertTrue(any('Possible N+1 in <unresolved>' in message for message in logs.output))
+
+    @override_settings(INSTRUMENTATION_SLOW_QUERY_MS=0)
+    def test_slow_queries_logged(self):
+        with self.assertLogs('todo_list.instrumentation', level='WARNING') as logs:
+            self.client.get(reverse('tasks'))
+        self.assertTrue(any('Slow query' in message for message in logs.output))
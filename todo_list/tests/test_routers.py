@@ -0,0 +1,110 @@
+import csv
+from io import StringIO
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import router, transaction
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from tasks.models import Task, TaskCounter
+from todo_list.database import database_settings
+from todo_list.routers import PrimaryReplicaRouter, request_routing
+from todo_list.tests.utils import file_database
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class TestPrimaryReplicaRouter(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(self.router.db_for_read(Task), 'default')
+
+    def test_reads_in_requests_use_replicas(self):
+        with request_routing():
+            self.assertEqual(self.router.db_for_read(Task), 'replica')
+            # Only the task models are routed
+            self.assertIsNone(self.router.db_for_read(User))
+
+    def test_write_pins_request(self):
+        """After a write, the rest of the request should read from the primary."""
+        with request_routing() as routing:
+            self.assertEqual(self.router.db_for_write(Task), 'default')
+            self.assertTrue(routing.wrote)
+            self.assertEqual(self.router.db_for_read(Task), 'default')
+
+    def test_pinned_request(self):
+        with request_routing(pinned=True):
+            self.assertEqual(self.router.db_for_read(Task), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        with request_routing():
+            self.assertEqual(self.router.db_for_read(Task), 'default')
+
+    def test_no_migrations_on_replicas(self):
+        self.assertFalse(self.router.allow_migrate('replica', 'tasks'))
+        self.assertTrue(self.router.allow_migrate('default', 'tasks'))
+
+
+@override_settings(TASKS_FRAGMENT_CACHE=None)
+class TestReplicaRouting(TransactionTestCase):
+    """The test database is the primary and a separate SQLite file stands in for the replica."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.enterClassContext(file_database('replica', database_settings({}, '')))
+        call_command('migrate', database='replica', verbosity=0)
+        cls.enterClassContext(override_settings(DATABASE_REPLICAS=['replica']))
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        Task.objects.create(user=self.user, title='On primary')
+        # What the replica has received so far
+        User.objects.using('replica').create(pk=self.user.pk, username='testuser')
+        Task.objects.using('replica').create(user_id=self.user.pk, title='Replicated')
+        TaskCounter.objects.using('replica').create(user_id=self.user.pk, incompleted_count=1)
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        User.objects.using('replica').all().delete()
+
+    def titles(self, response):
+        return [task.title for task in response.context['tasks']]
+
+    def test_list_reads_replica(self):
+        response = self.client.get(reverse('tasks'))
+        self.assertEqual(self.titles(response), ['Replicated'])
+        self.assertNotIn('primary_pin', response.cookies)
+
+    def test_sticky_reads_after_write(self):
+        """After a write the client should read its own changes from the primary until the pin expires."""
+        response = self.client.post(reverse('task-create'), {'title': 'New'})
+        self.assertEqual(response.cookies['primary_pin']['max-age'], 5)
+        response = self.client.get(reverse('tasks'))
+        self.assertEqual(sorted(self.titles(response)), ['New', 'On primary'])
+        del self.client.cookies['primary_pin']
+        response = self.client.get(reverse('tasks'))
+        self.assertEqual(self.titles(response), ['Replicated'])
+
+    @override_settings(ROOT_URLCONF='todo_list.async_urls')
+    async def test_sticky_reads_after_async_write(self):
+        """Writes made by the async views, in worker threads, should pin the client as well."""
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.post(reverse('task-create'), {'title': 'New'})
+        self.assertEqual(response.cookies['primary_pin']['max-age'], 5)
+        response = await self.async_client.get(reverse('tasks'))
+        self.assertEqual(sorted(self.titles(response)), ['New', 'On primary'])
+
+    def test_export_streams_from_replica(self):
+        response = self.client.get(reverse('task-export'))
+        rows = csv.DictReader(StringIO(b''.join(response.streaming_content).decode()))
+        self.assertEqual([row['title'] for row in rows], ['Replicated'])
+
+    def test_transactions_read_primary(self):
+        with request_routing():
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(Task), 'default')
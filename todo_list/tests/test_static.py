@@ -0,0 +1,100 @@
+import gzip
+import re
+import tempfile
+from unittest import mock, skipUnless
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from todo_list.storage import brotli
+
+
+class TestStaticPipeline(TestCase):
+    """Serves the assets of base.html from a STATIC_ROOT filled by collectstatic."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        static_root = cls.enterClassContext(tempfile.TemporaryDirectory())
+        cls.enterClassContext(override_settings(STATIC_ROOT=static_root))
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def get(self, url, **headers):
+        response = self.client.get(url, **headers)
+        response.body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response
+
+    def assets(self):
+        """Returns the static URLs linked by base.html."""
+        html = self.client.get(reverse('login')).content.decode()
+        return re.findall(r'href="(/static/[^"]+)"', html)
+
+    def test_hashed_urls(self):
+        assets = self.assets()
+        self.assertTrue(any(re.search(r'/css/style\.[0-9a-f]{12}\.css$', url) for url in assets))
+        self.assertTrue(any(re.search(r'/favicons/favicon\.[0-9a-f]{12}\.ico$', url) for url in assets))
+
+    def test_compressed_and_cached_for_a_year(self):
+        """The assets should come gzipped when accepted, with far-future caching and fewer bytes."""
+        identity_bytes = compressed_bytes = 0
+        for url in self.assets():
+            identity = self.get(url)
+            compressed = self.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+            self.assertEqual(compressed['Content-Encoding'], 'gzip')
+            self.assertEqual(compressed['Vary'], 'Accept-Encoding')
+            self.assertEqual(compressed['Cache-Control'], 'public, max-age=31536000, immutable')
+            self.assertEqual(compressed['Content-Type'], identity['Content-Type'])
+            self.assertNotIn('Content-Encoding', identity)
+            self.assertEqual(gzip.decompress(compressed.body), identity.body)
+            identity_bytes += len(identity.body)
+            compressed_bytes += len(compressed.body)
+        self.assertLess(compressed_bytes, identity_bytes / 2)
+
+    def test_fonts_referenced_by_hashed_css(self):
+        css_url = next(url for url in self.assets() if url.endswith('.css'))
+        css = self.get(css_url).body.decode()
+        font = re.search(r'url\([\'"]([^\'"]+\.ttf)', css).group(1)
+        self.assertRegex(font, r'\.[0-9a-f]{12}\.ttf$')
+        response = self.get(f'/static/fonts/nunito/{font.rsplit("/", 1)[1]}', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    @skipUnless(brotli, 'brotli is not installed')
+    def test_brotli_preferred(self):
+        css_url = next(url for url in self.assets() if url.endswith('.css'))
+        self.assertEqual(self.get(css_url, HTTP_ACCEPT_ENCODING='gzip, br')['Content-Encoding'], 'br')
+
+    def test_rejected_encoding(self):
+        css_url = next(url for url in self.assets() if url.endswith('.css'))
+        self.assertNotIn('Content-Encoding', self.get(css_url, HTTP_ACCEPT_ENCODING='gzip;q=0'))
+
+    def test_unhashed_name_short_lived(self):
+        response = self.get('/static/css/style.css')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+
+    def test_security_headers(self):
+        """Static responses should get the headers of SecurityMiddleware, such as nosniff."""
+        response = self.get('/static/css/style.css')
+        self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+
+    def test_not_modified(self):
+        response = self.get('/static/css/style.css')
+        response = self.get('/static/css/style.css', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_file(self):
+        self.assertEqual(self.get('/static/css/missing.css').status_code, 404)
+
+    @override_settings(DEBUG=True)
+    def test_not_adapted_under_asgi(self):
+        """The ASGI handler should call the middleware without a thread hop, which it logs in DEBUG."""
+        with mock.patch('django.core.handlers.base.logger') as logger:
+            ASGIHandler()
+        adapted = [call.args for call in logger.debug.call_args_list if 'StaticFilesMiddleware' in str(call.args)]
+        self.assertEqual(adapted, [])
+
+    async def test_served_under_asgi(self):
+        response = await self.async_client.get('/static/css/style.css', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual((await self.async_client.get('/static/css/missing.css')).status_code, 404)
@@ -0,0 +1,18 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+@contextmanager
+def file_database(alias, settings_dict):
+    """Registers a connection alias to a temporary SQLite file, which threads can share."""
+    with tempfile.TemporaryDirectory() as directory:
+        settings_dict = {**settings_dict, 'NAME': os.path.join(directory, 'db.sqlite3')}
+        connections.settings[alias] = connections.configure_settings({DEFAULT_DB_ALIAS: {}, alias: settings_dict})[alias]
+        try:
+            yield connections[alias]
+        finally:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'todo_list.settings')
 
 application = get_wsgi_application()
+
+# Runs background jobs in this process when TASKS_JOBS_IN_PROCESS is set
+from tasks.jobs import start_in_process_worker  # noqa: E402
+
+start_in_process_worker()